@@ -1,45 +1,24 @@
 import psycopg
 
-# Database connection parameters
-host = "localhost"
-port = 5432
-database = "employee"
-user = "postgres"
-password = "postgres"
+from migrations.runner import env_conninfo, upgrade
 
-try:
-    # Connect to the PostgreSQL database
-    conn = psycopg.connect(
-        host=host,
-        port=port,
-        dbname=database,
-        user=user,
-        password=password
-    )
-
-    with conn.cursor() as cursor:
-        # Create schema
-        cursor.execute("CREATE SCHEMA IF NOT EXISTS school;")
+# The schema now lives in migrations/ and is managed with:
+#   python -m migrations upgrade
+# This script is kept for existing setups: it applies pending migrations and
+# inserts the sample record. Connection settings come from the DB_* variables.
 
-        # Create student table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS school.student (
-                roll_number SERIAL PRIMARY KEY,
-                first_name VARCHAR(50),
-                last_name VARCHAR(50),
-                age INTEGER,
-                email_address VARCHAR(100)
-            );
-        """)
+try:
+    conninfo = env_conninfo()
+    upgrade(conninfo)
 
-        # Insert a single record
-        cursor.execute("""
+    with psycopg.connect(**conninfo) as conn:
+        # Insert a single record (skipped if it is already there)
+        conn.execute("""
             INSERT INTO school.student (first_name, last_name, age, email_address)
-            VALUES (%s, %s, %s, %s);
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT DO NOTHING;
         """, ("John", "Doe", 20, "john.doe@example.com"))
 
-    conn.commit()
-    conn.close()
     print("Schema and student table created successfully, and one record inserted.")
 
 except Exception as e:
@@ -27,15 +27,16 @@ try:
     )
 
     with conn.cursor() as cursor:
-        # Insert multiple records into the student table
-        cursor.executemany("""
-            INSERT INTO school.student (first_name, last_name, age, email_address)
-            VALUES (%s, %s, %s, %s);
-        """, new_students)
+        # Load multiple records into the student table in one COPY round trip
+        with cursor.copy("""
+            COPY school.student (first_name, last_name, age, email_address) FROM STDIN
+        """) as copy:
+            for student in new_students:
+                copy.write_row(student)
 
     conn.commit()
     conn.close()
-    print("5 new student records inserted successfully.")
+    print(f"{len(new_students)} new student records inserted successfully.")
 
 except Exception as e:
     print(f"An error occurred: {e}")
@@ -0,0 +1,131 @@
+"""Nightly-sync style write: one bulk upsert versus a request per student.
+
+Seeds the table, builds a sync batch against it (by default 60% changed
+students, 20% unchanged, 20% new; see benchmarks/seed.py for the data set)
+and applies it to the chosen app twice, re-seeding in between:
+
+* per row: PUT /api/students/{roll} for existing students, POST for new ones,
+  sequentially over one keep-alive connection;
+* bulk: a single POST /api/students/bulk/upsert?on=email_address.
+
+For each it prints wall time, requests sent and the WAL PostgreSQL wrote,
+which shows the write amplification (unchanged rows cost nothing in bulk).
+Run from the repository root:
+
+    python -m benchmarks.bench_bulk_upsert --app flask --rows 100000 --batch 5000
+"""
+import argparse
+import json
+import random
+import time
+
+import psycopg
+
+from benchmarks.loadgen import _connect, wait_until_ready
+from benchmarks.seed import create_schema, seed
+from benchmarks.servers import APPS, start_server
+from migrations.runner import env_conninfo
+
+
+def seeded_student(i):
+    # Mirrors SEED_SQL in benchmarks/seed.py
+    return {"first_name": f"First{i}", "last_name": f"Last{i % 5000}", "age": 18 + i % 10,
+            "email_address": f"student{i}@example.com"}
+
+
+def sync_batch(rows, size, changed, unchanged, seed_value):
+    """Return [(roll_number or None, student)] for one sync run."""
+    rng = random.Random(seed_value)
+    existing = rng.sample(range(1, rows + 1), int(size * (changed + unchanged)))
+    batch = []
+    for position, i in enumerate(existing):
+        student = seeded_student(i)
+        if position < size * changed:
+            student["age"] = 18 + (student["age"] - 17) % 10
+        batch.append((i, student))
+    for n in range(size - len(batch)):
+        batch.append((None, {"first_name": f"New{n}", "last_name": f"Sync{n % 5000}", "age": 18 + n % 10,
+                             "email_address": f"sync-{seed_value}-{n}@example.com"}))
+    rng.shuffle(batch)
+    return batch
+
+
+def wal_position():
+    with psycopg.connect(**env_conninfo()) as conn:
+        return conn.execute("SELECT pg_current_wal_lsn()").fetchone()[0]
+
+
+def wal_bytes_since(lsn):
+    with psycopg.connect(**env_conninfo()) as conn:
+        return int(conn.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)", (lsn,)).fetchone()[0])
+
+
+def per_row(port, batch):
+    conn = _connect("127.0.0.1", port)
+    statuses = {}
+    try:
+        for roll_number, student in batch:
+            if roll_number is None:
+                conn.request("POST", "/api/students/", body=json.dumps(student),
+                             headers={"Content-Type": "application/json"})
+            else:
+                conn.request("PUT", f"/api/students/{roll_number}", body=json.dumps(student),
+                             headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            statuses[response.status] = statuses.get(response.status, 0) + 1
+    finally:
+        conn.close()
+    return {"requests": len(batch), "statuses": statuses}
+
+
+def bulk(port, batch):
+    conn = _connect("127.0.0.1", port)
+    try:
+        conn.request("POST", "/api/students/bulk/upsert?on=email_address",
+                     body=json.dumps([student for _, student in batch]),
+                     headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        result = json.loads(response.read())
+    finally:
+        conn.close()
+    return {"requests": 1, "statuses": {response.status: 1},
+            **{key: result.get(key) for key in ("inserted", "updated", "unchanged", "rejected")}}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=sorted(APPS), required=True)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--changed", type=float, default=0.6)
+    parser.add_argument("--unchanged", type=float, default=0.2)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    create_schema()
+    batch = sync_batch(args.rows, args.batch, args.changed, args.unchanged, args.seed)
+    results = {}
+    for name, apply in (("per_row", per_row), ("bulk", bulk)):
+        seed(args.rows, log=lambda message: None)
+        server = start_server(args.app, 1, args.port)
+        try:
+            wait_until_ready("127.0.0.1", args.port)
+            lsn = wal_position()
+            start = time.perf_counter()
+            outcome = apply(args.port, batch)
+            elapsed = time.perf_counter() - start
+            results[name] = {"seconds": round(elapsed, 3), "wal_bytes": wal_bytes_since(lsn), **outcome}
+        finally:
+            server.terminate()
+            server.wait(timeout=60)
+
+    print(f"{args.app}: {args.batch} students against {args.rows} rows")
+    print(f"{'method':<8} {'seconds':>8} {'rows/s':>9} {'requests':>9} {'WAL MB':>8}  statuses")
+    for name, result in results.items():
+        print(f"{name:<8} {result['seconds']:>8} {args.batch / result['seconds']:>9.0f} {result['requests']:>9} "
+              f"{result['wal_bytes'] / 1e6:>8.2f}  {result['statuses']}")
+    counts = results["bulk"]
+    print(f"bulk outcome: {counts['inserted']} inserted, {counts['updated']} updated, "
+          f"{counts['unchanged']} unchanged, {counts['rejected']} rejected")
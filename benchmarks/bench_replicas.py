@@ -0,0 +1,138 @@
+"""Read throughput with replicas (DB_REPLICA_DSNS) and a read-your-writes check.
+
+Needs a primary (the DB_* variables) and at least one streaming replica of
+it. Two local instances are enough, e.g. a replica on port 5433:
+
+    pg_basebackup -h localhost -p 5432 -U postgres -D /tmp/replica -R -X stream
+    echo "port = 5433" >> /tmp/replica/postgresql.auto.conf
+    pg_ctl -D /tmp/replica -l /tmp/replica.log start
+
+The primary needs wal_level=replica (the default) and a pg_hba.conf entry
+allowing replication connections. Seeds the table on the primary, then runs
+the same read mix (get by roll, list page, search) against the chosen app
+without replicas and with them, printing req/s, latency and how reads were
+spread across replicas (from /stats/replicas of the worker that answered).
+Finally it creates students and reads each one back at once, both by
+default and with ``X-Read-Consistency: primary``; misses on the default
+path show replication lag, the header path must have none. Run from the
+repository root:
+
+    python -m benchmarks.bench_replicas --app flask --replicas "host=localhost port=5433"
+    python -m benchmarks.bench_replicas --app fastapi --replicas "port=5433,port=5434" --balance least_connections
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks.loadgen import _connect, run_load, wait_until_ready
+from benchmarks.run_suite import student_body
+from benchmarks.seed import create_schema, seed
+from benchmarks.servers import APPS, start_server
+from student_common.replicas import DEFAULT_MAX_LAG_MS
+
+
+def read_workload(rows):
+    def next_request(rng):
+        draw = rng.random()
+        if draw < 0.6:
+            return "get_student", "GET", f"/api/students/{rng.randint(1, rows)}", None, None
+        if draw < 0.85:
+            return "list_students", "GET", f"/api/students/?limit=50&min_age={rng.randint(18, 27)}", None, None
+        return "search", "GET", f"/api/students/search?q=last{rng.randint(0, 4999)}", None, None
+    return next_request
+
+
+def get_json(port, path, headers=None):
+    conn = _connect("127.0.0.1", port)
+    try:
+        conn.request("GET", path, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b"null")
+    finally:
+        conn.close()
+
+
+def read_your_writes(port, attempts, seed_value):
+    """Create students and read each back immediately; count reads that missed the new row."""
+    rng = random.Random(seed_value)
+    misses = {"default": 0, "primary": 0}
+    conn = _connect("127.0.0.1", port)
+    try:
+        for attempt in range(attempts):
+            conn.request("POST", "/api/students/", body=student_body(rng),
+                         headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            roll_number = json.loads(response.read())["roll_number"]
+            mode = "primary" if attempt % 2 else "default"
+            headers = {"X-Read-Consistency": "primary"} if mode == "primary" else {}
+            conn.request("GET", f"/api/students/{roll_number}", headers=headers)
+            response = conn.getresponse()
+            response.read()
+            misses[mode] += response.status == 404
+    finally:
+        conn.close()
+    return {mode: {"reads": (attempts + (mode == "default")) // 2, "misses": count} for mode, count in misses.items()}
+
+
+def measure(app, replicas, args):
+    server = start_server(app, args.workers, args.port, DB_REPLICA_DSNS=replicas,
+                          DB_REPLICA_BALANCE=args.balance, DB_REPLICA_MAX_LAG_MS=args.max_lag_ms,
+                          DB_REPLICA_CHECK_INTERVAL=args.check_interval)
+    try:
+        wait_until_ready("127.0.0.1", args.port)
+        if replicas:
+            # Replicas serve nothing until their first health check passes
+            time.sleep(args.check_interval + 1)
+        load = run_load("127.0.0.1", args.port, read_workload(args.rows), args.concurrency, args.duration,
+                        seed=args.seed)
+        _, replica_stats = get_json(args.port, "/stats/replicas")
+        consistency = read_your_writes(args.port, args.rw_attempts, args.seed) if replicas else None
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+    return {"load": load, "replicas": replica_stats, "read_your_writes": consistency}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=sorted(APPS), required=True)
+    parser.add_argument("--replicas", required=True, help="DB_REPLICA_DSNS for the replica run")
+    parser.add_argument("--balance", choices=["round_robin", "least_connections"], default="round_robin")
+    parser.add_argument("--max-lag-ms", type=float, default=DEFAULT_MAX_LAG_MS)
+    parser.add_argument("--check-interval", type=float, default=2)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the current table contents")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--rw-attempts", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        create_schema()
+        seed(args.rows)
+
+    results = {"primary_only": measure(args.app, "", args), "replicas": measure(args.app, args.replicas, args)}
+
+    print(f"{args.app}: read mix, concurrency {args.concurrency}, {args.workers} worker(s), balance {args.balance}")
+    print(f"{'run':<13} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, result in results.items():
+        total = result["load"]["total"]
+        print(f"{name:<13} {total['throughput_rps']:>9} {total['p50_ms']:>8} {total['p99_ms']:>8} {total['errors']:>7}")
+    stats = results["replicas"]["replicas"]
+    if not stats.get("enabled"):
+        print("replicas were not enabled in the replica run")
+    else:
+        for replica in stats["replicas"]:
+            print(f"replica {replica['name']}: healthy={replica['healthy']} reads={replica['reads']} "
+                  f"lag_ms={replica['lag_ms']} ejections={replica['ejections']} last_error={replica['last_error']}")
+        for mode, outcome in results["replicas"]["read_your_writes"].items():
+            print(f"read after write ({mode}): {outcome['misses']} of {outcome['reads']} reads missed the new row")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"app": args.app, "rows": args.rows, "balance": args.balance, **results}, f, indent=2)
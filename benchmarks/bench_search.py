@@ -0,0 +1,127 @@
+"""Latency of GET /api/students/search on a large table.
+
+Seeds school.student (1M rows by default, with the migrations/ indexes),
+then reports two things:
+
+* Query latency straight from PostgreSQL for each search kind, with the
+  planner free to use the search indexes and again with index scans
+  disabled, i.e. what the same queries cost before the migration.
+* End-to-end latency of the chosen app under gunicorn for a mix of exact
+  email, name prefix, last-name prefix and fuzzy (typo) searches.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_search --app fastapi --rows 1000000
+    python -m benchmarks.bench_search --app flask --skip-seed --concurrency 32
+"""
+import argparse
+import json
+import random
+import time
+from urllib.parse import urlencode
+
+import psycopg
+
+from benchmarks.loadgen import percentile, run_load, wait_until_ready
+from benchmarks.seed import create_schema, seed
+from benchmarks.servers import APPS, start_server
+from student_common.queries import QUERIES
+from migrations.runner import env_conninfo
+
+
+def search_params(rng, rows):
+    """(label, query string params) for one search, matching the seed.py data set."""
+    i = rng.randint(1, rows)
+    draw = rng.random()
+    if draw < 0.3:
+        return "email_exact", {"email": f"student{i}@example.com"}
+    if draw < 0.6:
+        return "prefix_name", {"q": f"first{i}"}
+    if draw < 0.8:
+        return "prefix_last", {"q": f"last{i % 5000}"}
+    # Transposed letters in the last name
+    return "fuzzy", {"q": f"first{i} lsat{i % 5000}", "mode": "fuzzy"}
+
+
+def search_workload(rows, limit):
+    def next_request(rng):
+        label, params = search_params(rng, rows)
+        return label, "GET", f"/api/students/search?{urlencode({**params, 'limit': limit})}", None, None
+    return next_request
+
+
+def statement_for(params, limit):
+    """The (query name, parameters) search_students() would run."""
+    if "email" in params:
+        return "student_by_email", (params["email"],)
+    term = params["q"].lower()
+    if params.get("mode") == "fuzzy":
+        return "student_search_fuzzy", (term, term, limit)
+    return "student_search_prefix", (term + "%", term + "%", term, limit)
+
+
+def db_latencies(rows, limit, samples, use_indexes, seed_value):
+    rng = random.Random(seed_value)
+    timings = {}
+    with psycopg.connect(**env_conninfo(), autocommit=True) as conn:
+        if not use_indexes:
+            conn.execute("SET enable_indexscan = off")
+            conn.execute("SET enable_bitmapscan = off")
+        for _ in range(samples):
+            label, params = search_params(rng, rows)
+            name, args = statement_for(params, limit)
+            start = time.perf_counter()
+            conn.execute(QUERIES[name], args).fetchall()
+            timings.setdefault(label, []).append((time.perf_counter() - start) * 1000)
+    return {label: {"p50_ms": percentile(sorted(values), 50), "p99_ms": percentile(sorted(values), 99)}
+            for label, values in sorted(timings.items())}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=sorted(APPS), required=True)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the current table contents")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--db-samples", type=int, default=200, help="queries for the indexed DB timing")
+    parser.add_argument("--scan-samples", type=int, default=20, help="queries for the no-index timing (slow)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        create_schema()
+        seed(args.rows)
+
+    indexed = db_latencies(args.rows, args.limit, args.db_samples, True, args.seed)
+    scanned = db_latencies(args.rows, args.limit, args.scan_samples, False, args.seed)
+    print(f"Direct query latency on {args.rows} rows (ms)")
+    print(f"{'search':<12} {'indexed p50':>12} {'indexed p99':>12} {'no-index p50':>13} {'no-index p99':>13}")
+    for label in indexed:
+        with_index, without = indexed[label], scanned.get(label, {})
+        print(f"{label:<12} {with_index['p50_ms']:>12} {with_index['p99_ms']:>12} "
+              f"{without.get('p50_ms', '-'):>13} {without.get('p99_ms', '-'):>13}")
+
+    server = start_server(args.app, args.workers, args.port)
+    try:
+        wait_until_ready("127.0.0.1", args.port)
+        http = run_load("127.0.0.1", args.port, search_workload(args.rows, args.limit), args.concurrency,
+                        args.duration, seed=args.seed)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+    print(f"\n{args.app} search endpoint, concurrency {args.concurrency}")
+    print(f"{'search':<12} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'db p50 ms':>10} {'errors':>7}")
+    for label, stats in sorted(http["endpoints"].items()):
+        print(f"{label:<12} {stats['throughput_rps']:>9} {stats['p50_ms']:>8} {stats['p99_ms']:>8} "
+              f"{stats.get('db_p50_ms', '-'):>10} {stats['errors']:>7}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"app": args.app, "rows": args.rows, "db_indexed": indexed, "db_no_index": scanned,
+                       "http": http}, f, indent=2)
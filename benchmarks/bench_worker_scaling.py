@@ -0,0 +1,61 @@
+"""Throughput of the production server as the number of workers grows.
+
+Starts the chosen app under gunicorn (gunicorn.conf.py, so the same settings as
+production) once per worker count, drives it with a read-heavy workload
+(80% GET /api/students/{roll}, 20% GET /api/students/?limit=50) and prints
+requests/sec, p50/p99 latency and scaling efficiency relative to one worker.
+The student cache is disabled so every request reaches PostgreSQL. Needs a
+seeded database reachable with the app's .env. Run from the repository root:
+
+    python -m benchmarks.bench_worker_scaling --app flask --workers 1 2 4 8
+    python -m benchmarks.bench_worker_scaling --app fastapi --workers 1 2 4 --output scaling.json
+"""
+import argparse
+import json
+
+from benchmarks.loadgen import run_load, wait_until_ready
+from benchmarks.servers import APPS, start_server
+
+
+def read_heavy(max_roll):
+    def next_request(rng):
+        if rng.random() < 0.8:
+            return "get_student", "GET", f"/api/students/{rng.randint(1, max_roll)}", None, None
+        return "list_students", "GET", "/api/students/?limit=50", None, None
+    return next_request
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=sorted(APPS), required=True)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--max-roll", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for workers in args.workers:
+        server = start_server(args.app, workers, args.port)
+        try:
+            wait_until_ready("127.0.0.1", args.port)
+            run = run_load("127.0.0.1", args.port, read_heavy(args.max_roll), args.concurrency, args.duration)
+        finally:
+            # SIGTERM: gunicorn drains in-flight requests and closes each worker's pool
+            server.terminate()
+            server.wait(timeout=60)
+        results.append({"workers": workers, **run})
+
+    baseline = results[0]["total"]["throughput_rps"] / results[0]["workers"]
+    print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'efficiency':>10}")
+    for result in results:
+        total = result["total"]
+        efficiency = total["throughput_rps"] / (baseline * result["workers"]) if baseline else 0.0
+        print(f"{result['workers']:>7} {total['throughput_rps']:>9.1f} {total['p50_ms']:>8} {total['p99_ms']:>8} "
+              f"{efficiency:>10.0%}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"app": args.app, "concurrency": args.concurrency, "results": results}, f, indent=2)
@@ -0,0 +1,115 @@
+"""Write throughput with and without group commit (WRITE_BATCH_ENABLED).
+
+Seeds the table, then for each concurrency level runs the same create/update
+write load against the chosen app twice: once committing every write on its
+own and once with write batching on. For each run it prints writes/s,
+p50/p99 latency, the PostgreSQL transactions committed per write and the
+batch sizes reported by /stats/writes.
+
+Group commit pays off when the COMMIT (a WAL flush) dominates a write, so
+compare on the storage you deploy to; on a tmpfs or with synchronous_commit
+off the batched run mostly shows the added delay. Run from the repository root:
+
+    python -m benchmarks.bench_write_batching --app fastapi --concurrency 8 32 128
+    python -m benchmarks.bench_write_batching --app flask --max-delay-ms 5 --workers 2
+"""
+import argparse
+import json
+
+import psycopg
+
+from benchmarks.loadgen import _connect, run_load, wait_until_ready
+from benchmarks.run_suite import student_body
+from benchmarks.seed import create_schema, seed
+from benchmarks.servers import APPS, start_server
+from migrations.runner import env_conninfo
+
+
+def write_workload(rows, update_ratio):
+    json_headers = {"Content-Type": "application/json"}
+
+    def next_request(rng):
+        if rng.random() < update_ratio:
+            return "update_student", "PUT", f"/api/students/{rng.randint(1, rows)}", student_body(rng), json_headers
+        return "create_student", "POST", "/api/students/", student_body(rng), json_headers
+
+    return next_request
+
+
+def committed_transactions():
+    with psycopg.connect(**env_conninfo()) as conn:
+        # Counters are flushed lazily; force a fresh read
+        conn.execute("SELECT pg_stat_clear_snapshot()")
+        return conn.execute(
+            "SELECT xact_commit FROM pg_stat_database WHERE datname = current_database()"
+        ).fetchone()[0]
+
+
+def write_stats(port):
+    conn = _connect("127.0.0.1", port)
+    try:
+        conn.request("GET", "/stats/writes")
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def measure(app, batched, args):
+    results = []
+    server = start_server(app, args.workers, args.port, WRITE_BATCH_ENABLED=batched,
+                          WRITE_BATCH_MAX_DELAY_MS=args.max_delay_ms, WRITE_BATCH_MAX_SIZE=args.max_size)
+    try:
+        wait_until_ready("127.0.0.1", args.port)
+        for concurrency in args.concurrency:
+            before = committed_transactions()
+            load = run_load("127.0.0.1", args.port, write_workload(args.rows, args.update_ratio), concurrency,
+                            args.duration, seed=args.seed)
+            commits = committed_transactions() - before
+            writes = load["total"]["requests"]
+            results.append({"concurrency": concurrency, "commits_per_write": round(commits / writes, 3) if writes else None,
+                            **load["total"]})
+        # Cumulative over all concurrency levels, for the last worker that answered
+        stats = write_stats(args.port)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+    return {"runs": results, "write_stats": stats}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=sorted(APPS), required=True)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the current table contents")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--update-ratio", type=float, default=0.5, help="share of writes that are PUTs")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max-delay-ms", type=float, default=2)
+    parser.add_argument("--max-size", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        create_schema()
+        seed(args.rows)
+
+    results = {mode: measure(args.app, mode == "batched", args) for mode in ("per_write", "batched")}
+
+    print(f"{args.app}: {args.workers} worker(s), batching delay {args.max_delay_ms} ms, max {args.max_size}")
+    print(f"{'mode':<10} {'conc':>5} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'commits/write':>14} {'errors':>7}")
+    for mode, result in results.items():
+        for run in result["runs"]:
+            print(f"{mode:<10} {run['concurrency']:>5} {run['throughput_rps']:>9} {run['p50_ms']:>8} "
+                  f"{run['p99_ms']:>8} {run['commits_per_write']!s:>14} {run['errors']:>7}")
+    stats = results["batched"]["write_stats"]
+    if stats.get("enabled"):
+        print(f"batches: {stats['batches']}, avg size {stats['avg_batch']}, max {stats['max_batch']}, "
+              f"failed writes {stats['failed_writes']}, failed batches {stats['failed_batches']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"app": args.app, "rows": args.rows, "workers": args.workers,
+                       "max_delay_ms": args.max_delay_ms, "max_size": args.max_size, **results}, f, indent=2)
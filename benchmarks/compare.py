@@ -0,0 +1,59 @@
+"""Compare two run_suite result files endpoint by endpoint.
+
+    python -m benchmarks.compare benchmarks/results/abc123-....json benchmarks/results/def456-....json
+
+Prints throughput and p99 for every (app, rows, concurrency, endpoint) present
+in both files, with the relative change. Exits non-zero when any p99 got worse
+by more than --fail-over percent, so it can gate a CI job.
+"""
+import argparse
+import json
+import sys
+
+
+def index_runs(report):
+    indexed = {}
+    for run in report["runs"]:
+        for endpoint, stats in {"total": run["total"], **run["endpoints"]}.items():
+            indexed[(run["app"], run["rows"], run["concurrency"], endpoint)] = stats
+    return indexed
+
+
+def change(before, after):
+    if not before or after is None:
+        return None
+    return (after - before) / before * 100
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--fail-over", type=float, help="fail if any p99 regresses by more than this many percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    before, after = index_runs(baseline), index_runs(candidate)
+
+    print(f"{baseline['commit']} -> {candidate['commit']}")
+    print(f"{'app':<8} {'rows':>9} {'conc':>5} {'endpoint':<15} {'req/s':>23} {'p99 ms':>26}")
+    worst = 0.0
+    for key in sorted(before.keys() & after.keys()):
+        app, rows, concurrency, endpoint = key
+        old, new = before[key], after[key]
+        rps_change = change(old["throughput_rps"], new["throughput_rps"])
+        p99_change = change(old["p99_ms"], new["p99_ms"])
+        if p99_change is not None:
+            worst = max(worst, p99_change)
+        rps = f"{old['throughput_rps']}->{new['throughput_rps']}"
+        p99 = f"{old['p99_ms']}->{new['p99_ms']}"
+        print(f"{app:<8} {rows:>9} {concurrency:>5} {endpoint:<15} {rps:>17} "
+              f"{'' if rps_change is None else f'{rps_change:+.0f}%':>5} {p99:>20} "
+              f"{'' if p99_change is None else f'{p99_change:+.0f}%':>5}")
+
+    if args.fail_over is not None and worst > args.fail_over:
+        print(f"p99 regressed by {worst:.0f}% (limit {args.fail_over:.0f}%)")
+        sys.exit(1)
@@ -0,0 +1,154 @@
+"""Small closed-loop HTTP load generator shared by the benchmark scripts.
+
+Each client thread keeps one keep-alive connection open and sends its next
+request as soon as the previous response has been read, so ``concurrency`` is
+the number of requests in flight. Only the standard library is used.
+"""
+import http.client
+import random
+import socket
+import threading
+import time
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.statuses = {}
+        self.db_ms = []
+
+    def merge(self, other):
+        self.latencies.extend(other.latencies)
+        self.db_ms.extend(other.db_ms)
+        self.errors += other.errors
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+
+    def summary(self, elapsed):
+        latencies = sorted(self.latencies)
+        db_ms = sorted(self.db_ms)
+        result = {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            "statuses": dict(sorted(self.statuses.items())),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99)
+        }
+        if db_ms:
+            result["db_p50_ms"] = percentile(db_ms, 50)
+            result["db_p99_ms"] = percentile(db_ms, 99)
+        return result
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 3)
+
+
+def parse_server_timing(header):
+    """Return the ``db`` duration (ms) from a Server-Timing header, if present."""
+    if not header:
+        return None
+    for metric in header.split(","):
+        parts = [part.strip() for part in metric.split(";")]
+        if parts[0] == "db":
+            for part in parts[1:]:
+                if part.startswith("dur="):
+                    return float(part[4:])
+    return None
+
+
+def _connect(host, port):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    conn.connect()
+    # Without NODELAY, small writes can stall on delayed ACKs and dominate the measured latency
+    conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return conn
+
+
+def wait_until_ready(host, port, path="/metrics", timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", path)
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on {host}:{port} did not become ready within {timeout}s")
+
+
+def run_load(host, port, next_request, concurrency, duration, warmup=1.0, seed=0):
+    """Drive the server with ``concurrency`` clients for ``duration`` seconds.
+
+    ``next_request(rng)`` returns ``(label, method, path, body, headers)``;
+    results are aggregated per label. Requests sent during the first
+    ``warmup`` seconds are not counted.
+    """
+    stats = {}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def client(index):
+        rng = random.Random(seed * 1000 + index)
+        conn = None
+        local = {}
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                break
+            label, method, path, body, headers = next_request(rng)
+            sent = time.perf_counter()
+            try:
+                conn = conn or _connect(host, port)
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+                db_ms = parse_server_timing(response.getheader("Server-Timing"))
+            except (OSError, http.client.HTTPException):
+                if conn is not None:
+                    conn.close()
+                conn = None
+                status, db_ms = None, None
+            finished = time.perf_counter()
+            if sent < measure_from:
+                continue
+            endpoint = local.setdefault(label, EndpointStats())
+            if status is None or status >= 500:
+                endpoint.errors += 1
+            if status is not None:
+                endpoint.statuses[status] = endpoint.statuses.get(status, 0) + 1
+                endpoint.latencies.append((finished - sent) * 1000)
+                if db_ms is not None:
+                    endpoint.db_ms.append(db_ms)
+        if conn is not None:
+            conn.close()
+        with lock:
+            for label, endpoint in local.items():
+                stats.setdefault(label, EndpointStats()).merge(endpoint)
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    total = EndpointStats()
+    for endpoint in stats.values():
+        total.merge(endpoint)
+    return {
+        "concurrency": concurrency,
+        "duration_sec": duration,
+        "total": total.summary(duration),
+        "endpoints": {label: endpoint.summary(duration) for label, endpoint in sorted(stats.items())}
+    }
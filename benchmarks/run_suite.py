@@ -0,0 +1,143 @@
+"""Reproducible benchmark of both student APIs under a mixed read/write workload.
+
+For every table size the database is re-seeded (benchmarks/seed.py), then
+each app is started under gunicorn and driven at every concurrency level.
+Results go to one JSON file per run, tagged with the git commit, holding
+throughput, p50/p95/p99 latency and database time per endpoint. DB time is
+read from the Server-Timing header the apps set. Compare two runs with
+benchmarks/compare.py. Run from the repository root:
+
+    python -m benchmarks.run_suite --sizes 1000 100000 1000000 --concurrency 1 8 32 128
+
+Workload, by default: 50% GET /{roll}, 15% paginated listing, 15% batch-get of
+20 ids, 12% PUT /{roll}, 8% POST /. Tune it with --write-ratio.
+
+Before timing an app, one POST and one PUT from the workload are sent and the
+run stops unless both succeed. Only 5xx responses count as errors, so an app
+that rejects the benchmark's writes (the Flask app answered them with 400
+before PUT/POST validation was fixed) would otherwise be timed serving cheap
+4xx responses. Use --write-ratio 0 to benchmark reads alone.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import uuid
+
+from benchmarks.loadgen import run_load, wait_until_ready
+from benchmarks.seed import create_schema, seed
+from benchmarks.servers import APPS, ROOT, start_server
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def student_body(rng):
+    i = rng.randint(1, 10 ** 9)
+    return json.dumps({
+        "first_name": f"Bench{i}",
+        "last_name": f"Load{i % 5000}",
+        "age": 18 + i % 10,
+        # Unique per request so writes never collide on the email address
+        "email_address": f"bench-{uuid.UUID(int=rng.getrandbits(128)).hex}@example.com"
+    })
+
+
+def mixed_workload(rows, write_ratio):
+    json_headers = {"Content-Type": "application/json"}
+    read_ratio = 1.0 - write_ratio
+
+    def next_request(rng):
+        draw = rng.random()
+        if draw < read_ratio * 0.625:
+            return "get_student", "GET", f"/api/students/{rng.randint(1, rows)}", None, None
+        if draw < read_ratio * 0.8125:
+            return "list_students", "GET", f"/api/students/?limit=50&min_age={rng.randint(18, 27)}", None, None
+        if draw < read_ratio:
+            ids = [rng.randint(1, rows) for _ in range(20)]
+            return "batch_get", "POST", "/api/students/batch-get", json.dumps({"roll_numbers": ids}), json_headers
+        if draw < read_ratio + write_ratio * 0.6:
+            return "update_student", "PUT", f"/api/students/{rng.randint(1, rows)}", student_body(rng), json_headers
+        return "create_student", "POST", "/api/students/", student_body(rng), json_headers
+
+    return next_request
+
+
+def check_writes(app, port, rows):
+    """Send one create and one update as the workload would; exit unless the app accepts both."""
+    json_headers = {"Content-Type": "application/json"}
+    rng = random.Random()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        for method, path in (("POST", "/api/students/"), ("PUT", f"/api/students/{rng.randint(1, rows)}")):
+            conn.request(method, path, body=student_body(rng), headers=json_headers)
+            response = conn.getresponse()
+            body = response.read().decode(errors="replace")
+            if not 200 <= response.status < 300:
+                raise SystemExit(f"{app} rejected a benchmark write ({method} {path} -> {response.status}: "
+                                 f"{body[:200]}). Fix the app or pass --write-ratio 0 to benchmark reads only.")
+    finally:
+        conn.close()
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", nargs="+", choices=sorted(APPS), default=sorted(APPS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--seed", type=int, default=42, help="workload random seed, for repeatable request mixes")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "runs": []
+    }
+
+    create_schema()
+    for rows in args.sizes:
+        for app in args.apps:
+            # Re-seed per app so both start from the same table after the other's writes
+            seed(rows)
+            server = start_server(app, args.workers, args.port)
+            try:
+                wait_until_ready("127.0.0.1", args.port)
+                if args.write_ratio > 0:
+                    check_writes(app, args.port, rows)
+                for concurrency in args.concurrency:
+                    print(f"{app}: {rows} rows, concurrency {concurrency}")
+                    result = run_load("127.0.0.1", args.port, mixed_workload(rows, args.write_ratio), concurrency,
+                                      args.duration, warmup=args.warmup, seed=args.seed)
+                    report["runs"].append({"app": app, "rows": rows, **result})
+                    total = result["total"]
+                    print(f"  {total['throughput_rps']} req/s, p50 {total['p50_ms']} ms, p99 {total['p99_ms']} ms, "
+                          f"errors {total['errors']}")
+            finally:
+                server.terminate()
+                server.wait(timeout=60)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
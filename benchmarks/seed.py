@@ -0,0 +1,58 @@
+"""Create the student schema and fill school.student with a deterministic data set.
+
+The schema comes from the migration runner (migrations/); the rows are
+generated inside PostgreSQL with generate_series, so seeding 10M rows takes
+one round trip per chunk rather than one per row. Roll numbers restart at 1,
+so a run at N rows always has students 1..N. Connection settings come from
+the DB_* variables the apps use. Run from the repository root:
+
+    python -m benchmarks.seed --rows 1000000
+"""
+import argparse
+import time
+
+import psycopg
+
+from migrations.runner import env_conninfo, upgrade
+
+SEED_CHUNK = 1000000
+
+SEED_SQL = """
+    INSERT INTO school.student (first_name, last_name, age, email_address)
+    SELECT 'First' || i, 'Last' || (i % 5000), 18 + i % 10, 'student' || i || '@example.com'
+    FROM generate_series(%s::bigint, %s::bigint) AS i
+"""
+
+
+def create_schema():
+    upgrade(env_conninfo())
+
+
+def seed(rows, chunk=SEED_CHUNK, log=print):
+    """Replace the contents of school.student with ``rows`` generated students."""
+    start = time.perf_counter()
+    with psycopg.connect(**env_conninfo()) as conn:
+        conn.execute("TRUNCATE school.student RESTART IDENTITY")
+        conn.commit()
+        # Bulk load only: losing the last commit on a crash just means seeding again
+        conn.execute("SET synchronous_commit = off")
+        for first in range(1, rows + 1, chunk):
+            last = min(first + chunk - 1, rows)
+            conn.execute(SEED_SQL, (first, last))
+            conn.commit()
+            log(f"  seeded {last}/{rows} rows")
+        conn.autocommit = True
+        conn.execute("VACUUM ANALYZE school.student")
+    elapsed = time.perf_counter() - start
+    log(f"Seeded {rows} rows in {elapsed:.1f}s")
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--skip-schema", action="store_true", help="assume migrations are already applied")
+    args = parser.parse_args()
+    if not args.skip_schema:
+        create_schema()
+    seed(args.rows)
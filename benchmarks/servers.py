@@ -0,0 +1,25 @@
+"""Start either student API under its production gunicorn config for benchmarking."""
+import os
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APPS = {
+    "flask": ("flask_student_api", "app:app"),
+    "fastapi": ("fast_api_student_apis", "main:app")
+}
+
+
+def start_server(app, workers, port, **env_overrides):
+    """Launch ``app`` on 127.0.0.1:``port``; stop it with ``terminate()`` for a graceful drain.
+
+    The student cache is disabled by default so every request reaches PostgreSQL.
+    """
+    app_dir, module = APPS[app]
+    env = dict(os.environ, FORCE_HTTPS="False", CACHE_BACKEND="none", LOG_LEVEL="WARNING")
+    env.update({key: str(value) for key, value in env_overrides.items()})
+    return subprocess.Popen(
+        ["gunicorn", "-c", "gunicorn.conf.py", "--workers", str(workers), "--bind", f"127.0.0.1:{port}", module],
+        cwd=os.path.join(ROOT, app_dir),
+        env=env
+    )
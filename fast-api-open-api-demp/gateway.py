@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerCache:
+    """Exact-prompt LRU cache with a time-to-live per entry."""
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value):
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def cache_key(model, messages):
+    payload = json.dumps([model, messages], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class AskGateway:
+    """Wraps an AsyncOpenAI client with a response cache, request coalescing and a concurrency limit.
+
+    Identical prompts that arrive while one is already in flight wait on that
+    call instead of starting their own. Timeouts and retries with backoff are
+    handled by the client itself (``timeout`` / ``max_retries``).
+    """
+
+    def __init__(self, client, model, max_concurrency=16, cache=None):
+        self.client = client
+        self.model = model
+        self.cache = cache or AnswerCache()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = {}
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.streams = StreamStats()
+
+    async def complete(self, messages):
+        key = cache_key(self.model, messages)
+        answer = self.cache.get(key)
+        if answer is not None:
+            return answer
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call_upstream(key, messages))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: one caller disconnecting must not cancel the call others are waiting on
+        return await asyncio.shield(task)
+
+    async def _call_upstream(self, key, messages):
+        async with self._semaphore:
+            self.upstream_calls += 1
+            response = await self.client.chat.completions.create(model=self.model, messages=messages)
+        answer = response.choices[0].message.content
+        self.cache.set(key, answer)
+        return answer
+
+    async def stream(self, messages):
+        """Yield the answer as it is generated, one content delta at a time.
+
+        A cached answer is replayed as a single delta. Closing the generator
+        (e.g. when the client disconnects) closes the upstream response, which
+        stops generation instead of letting it run to completion unread.
+        """
+        key = cache_key(self.model, messages)
+        answer = self.cache.get(key)
+        if answer is not None:
+            yield answer
+            return
+
+        started = time.perf_counter()
+        first_token_at = None
+        tokens = 0
+        parts = []
+        completed = False
+        async with self._semaphore:
+            self.upstream_calls += 1
+            upstream = await self.client.chat.completions.create(model=self.model, messages=messages, stream=True)
+            try:
+                async for chunk in upstream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    # Each content chunk carries one token from the chat-completions API
+                    tokens += 1
+                    parts.append(delta)
+                    yield delta
+                completed = True
+            finally:
+                await upstream.close()
+                self.streams.record(started, first_token_at, time.perf_counter(), tokens, completed)
+        self.cache.set(key, "".join(parts))
+
+    def stats(self):
+        return {
+            "model": self.model,
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+            "cache": self.cache.stats(),
+            "streams": self.streams.summary()
+        }
+
+
+class StreamStats:
+    """Time-to-first-token and generation rate of recent streamed answers."""
+
+    def __init__(self, window=1000):
+        self.completed = 0
+        self.cancelled = 0
+        self._recent = deque(maxlen=window)
+
+    def record(self, started, first_token_at, finished, tokens, completed):
+        if completed:
+            self.completed += 1
+        else:
+            self.cancelled += 1
+        if first_token_at is None:
+            return
+        ttft = first_token_at - started
+        generating = finished - first_token_at
+        tokens_per_sec = tokens / generating if generating > 0 else 0.0
+        self._recent.append((ttft, tokens_per_sec))
+        logger.info("ask stream %s: ttft=%.3fs tokens=%d tokens/sec=%.1f",
+                    "completed" if completed else "cancelled", ttft, tokens, tokens_per_sec)
+
+    def summary(self):
+        recent = sorted(self._recent)
+        rates = sorted(rate for _, rate in self._recent)
+        return {
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "ttft_p50_sec": round(recent[len(recent) // 2][0], 4) if recent else None,
+            "ttft_p95_sec": round(recent[int(len(recent) * 0.95)][0], 4) if recent else None,
+            "tokens_per_sec_p50": round(rates[len(rates) // 2], 1) if rates else None
+        }
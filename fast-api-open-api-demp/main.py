@@ -1,14 +1,35 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
+import json
 import os
 
+from gateway import AnswerCache, AskGateway
+
 # Load environment variables from .env
 load_dotenv()
 
-# Initialize OpenAI client with API key from .env
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Initialize OpenAI client with API key from .env.
+# OPENAI_BASE_URL points it at another chat-completions server, e.g. stub_server.py.
+# The client retries failed requests with exponential backoff up to OPENAI_MAX_RETRIES times.
+client = AsyncOpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    base_url=os.getenv("OPENAI_BASE_URL") or None,
+    timeout=float(os.getenv("OPENAI_TIMEOUT", "30")),
+    max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+)
+
+gateway = AskGateway(
+    client,
+    model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),  # can be changed to gpt-4o or gpt-3.5-turbo
+    max_concurrency=int(os.getenv("ASK_MAX_CONCURRENCY", "16")),
+    cache=AnswerCache(
+        max_entries=int(os.getenv("ASK_CACHE_MAX_ENTRIES", "1024")),
+        ttl=float(os.getenv("ASK_CACHE_TTL", "300"))
+    )
+)
 
 # Initialize FastAPI app
 app = FastAPI()
@@ -17,20 +38,51 @@ app = FastAPI()
 class PromptRequest(BaseModel):
     prompt: str
 
+def build_messages(prompt):
+    return [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": prompt}
+    ]
+
+@app.on_event("shutdown")
+async def shutdown():
+    await client.close()
+
 @app.get("/ping")
 def ping():
     return {"status": "ok", "message": "FastAPI is running 🚀"}
 
+@app.get("/stats")
+def stats():
+    return gateway.stats()
+
 @app.post("/ask")
-def ask_openai(request: PromptRequest):
+async def ask_openai(request: PromptRequest):
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # can be changed to gpt-4o or gpt-3.5-turbo
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": request.prompt}
-            ]
-        )
-        return {"response": response.choices[0].message.content}
+        return {"response": await gateway.complete(build_messages(request.prompt))}
     except Exception as e:
         return {"error": str(e)}
+
+def sse(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@app.post("/ask/stream")
+async def ask_openai_stream(request: PromptRequest, http_request: Request):
+    """Relay the answer as Server-Sent Events: one {"token": ...} event per delta, then [DONE]."""
+    async def events():
+        tokens = gateway.stream(build_messages(request.prompt))
+        try:
+            async for delta in tokens:
+                if await http_request.is_disconnected():
+                    # Leaving the loop closes the upstream stream in the finally below
+                    return
+                yield sse({"token": delta})
+            yield "data: [DONE]\n\n"
+        except Exception as e:
+            yield sse({"error": str(e)}, event="error")
+        finally:
+            await tokens.aclose()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,93 @@
+"""Local stand-in for the OpenAI chat-completions API, for testing the gateway without a key.
+
+    uvicorn stub_server:app --port 8001
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=stub uvicorn main:app
+
+The reply echoes the last user message. STUB_LATENCY (seconds) delays every
+response and STUB_FAILURE_RATE (0-1) returns that share of requests as 500s
+so retries can be exercised. With ``"stream": true`` the reply is sent as
+chat.completion.chunk events, one word every STUB_TOKEN_DELAY seconds.
+GET /stats counts the requests received and streams abandoned by the client.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY = float(os.getenv("STUB_LATENCY", "0.5"))
+FAILURE_RATE = float(os.getenv("STUB_FAILURE_RATE", "0"))
+TOKEN_DELAY = float(os.getenv("STUB_TOKEN_DELAY", "0.05"))
+
+app = FastAPI()
+counters = {"requests": 0, "failures": 0, "streams_abandoned": 0}
+
+
+def reply_for(messages):
+    prompt = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    return f"Stub answer to: {prompt}"
+
+
+async def stream_chunks(completion_id, model, content):
+    def chunk(delta, finish_reason=None):
+        data = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+        return f"data: {json.dumps(data)}\n\n"
+
+    try:
+        yield chunk({"role": "assistant", "content": ""})
+        for i, word in enumerate(content.split(" ")):
+            await asyncio.sleep(TOKEN_DELAY)
+            yield chunk({"content": word if i == 0 else f" {word}"})
+        yield chunk({}, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+    except asyncio.CancelledError:
+        counters["streams_abandoned"] += 1
+        raise
+
+
+@app.get("/stats")
+def stats():
+    return counters
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    counters["requests"] += 1
+    await asyncio.sleep(LATENCY)
+    if random.random() < FAILURE_RATE:
+        counters["failures"] += 1
+        return JSONResponse({"error": {"message": "stub failure", "type": "server_error"}}, status_code=500)
+
+    content = reply_for(body.get("messages", []))
+    if body.get("stream"):
+        return StreamingResponse(stream_chunks(f"chatcmpl-{uuid.uuid4().hex}", body.get("model", "stub"), content),
+                                 media_type="text/event-stream")
+    prompt_tokens = sum(len(m.get("content", "").split()) for m in body.get("messages", []))
+    completion_tokens = len(content.split())
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
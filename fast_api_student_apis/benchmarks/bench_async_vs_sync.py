@@ -0,0 +1,101 @@
+"""Compare the blocking and async student lookup paths under concurrency.
+
+Each simulated client issues ``--requests`` lookups of GET /api/students/{roll_number}
+through the service layer, inside one event loop, the way the routers run them:
+
+* ``sync``  - the pre-async behaviour: a blocking psycopg query called straight
+  from the coroutine, so every client waits behind the one currently on the loop.
+* ``async`` - ``services.student_service.get_student_by_roll`` on the async pool.
+
+Run from the ``fast_api_student_apis`` directory against a seeded database:
+
+    python -m benchmarks.bench_async_vs_sync --concurrency 1 16 128 --query-delay-ms 5
+
+``--query-delay-ms`` adds ``pg_sleep`` to each query to model a slower statement.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+
+import repo_path  # before anything that imports student_common
+from db.connection import close_async_pool, close_pool, get_connection, get_async_connection, open_async_pool
+from services.student_service import get_student_by_roll
+
+LOOKUP_SQL = """
+    SELECT roll_number, first_name, last_name, age, email_address
+    FROM school.student
+    WHERE roll_number = %s;
+"""
+
+
+def sync_lookup(roll_number, delay):
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            if delay:
+                cur.execute("SELECT pg_sleep(%s);", (delay,))
+            cur.execute(LOOKUP_SQL, (roll_number,))
+            return cur.fetchone()
+
+
+async def async_lookup(roll_number, delay):
+    if delay:
+        async with get_async_connection() as conn:
+            await conn.execute("SELECT pg_sleep(%s);", (delay,))
+    return await get_student_by_roll(roll_number)
+
+
+async def run_level(mode, concurrency, requests_per_client, roll_numbers, delay):
+    latencies = []
+
+    async def client(offset):
+        for i in range(requests_per_client):
+            roll_number = roll_numbers[(offset + i) % len(roll_numbers)]
+            start = time.perf_counter()
+            if mode == "sync":
+                sync_lookup(roll_number, delay)
+            else:
+                await async_lookup(roll_number, delay)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c * requests_per_client) for c in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3)
+    }
+
+
+async def main(args):
+    await open_async_pool()
+    try:
+        with get_connection() as conn:
+            rows = conn.execute("SELECT roll_number FROM school.student ORDER BY roll_number LIMIT 10000;").fetchall()
+        roll_numbers = [row[0] for row in rows] or [1]
+        delay = args.query_delay_ms / 1000
+        results = []
+        for concurrency in args.concurrency:
+            for mode in ("sync", "async"):
+                results.append(await run_level(mode, concurrency, args.requests, roll_numbers, delay))
+        print(json.dumps(results, indent=2))
+    finally:
+        await close_async_pool()
+        close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 128])
+    parser.add_argument("--requests", type=int, default=50, help="lookups per client")
+    parser.add_argument("--query-delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(main(args))
@@ -1,4 +1,5 @@
 # config.py
+import os
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -8,7 +9,68 @@ class Settings(BaseSettings):
     db_user: str
     db_password: str
 
+    # Connection pool sizing and lifetimes (seconds)
+    db_pool_min_size: int = 2
+    db_pool_max_size: int = 10
+    db_pool_max_idle: float = 300
+    db_pool_max_lifetime: float = 3600
+    db_pool_timeout: float = 10
+    db_pool_check: bool = True
+    # Behind PgBouncer in transaction mode server-side prepared statements must be disabled
+    db_pgbouncer_compat: bool = False
+
+    # Read replicas (none by default): comma-separated libpq DSNs, e.g. "host=10.0.0.2,host=10.0.0.3 port=5433";
+    # parameters a DSN leaves out come from the db_* settings. See student_common/replicas.py for routing and
+    # health checks. Only primary reads refill the student cache: replica lag never leaves a stale record cached
+    # for cache_ttl
+    db_replica_dsns: str = ""
+    # round_robin or least_connections
+    db_replica_balance: str = "round_robin"
+    # Eject replicas replaying more than this many ms behind the primary; 0 disables the lag check
+    db_replica_max_lag_ms: float = 1000
+    db_replica_check_interval: float = 5
+
+    # Directory for exported files (xlsx/csv/parquet)
+    export_dir: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exports")
+
+    # Background export jobs: concurrent exports, queued+running cap, finished jobs kept
+    export_max_jobs: int = 2
+    export_max_pending: int = 10
+    export_job_retention: int = 50
+
+    # Read-through cache for student lookups: memory, redis or none. memory is per process, so it
+    # limits the server to one worker (see gunicorn.conf.py)
+    cache_backend: str = "memory"
+    cache_ttl: int = 60
+    cache_max_entries: int = 10000
+    redis_url: str = "redis://localhost:6379/0"
+
+    # Query profiler (off by default): slow-query log, sampled EXPLAIN and the X-Query-Profile header
+    query_profile_enabled: bool = False
+    query_profile_redact_params: bool = True
+    slow_query_ms: float = 200
+    slow_query_explain_rate: float = 0.05
+
+    # Group commit for single-row writes (off by default): concurrent writes share one transaction
+    # after waiting at most write_batch_max_delay_ms; see services/write_batcher.py for the durability contract
+    write_batch_enabled: bool = False
+    write_batch_max_delay_ms: float = 2
+    write_batch_max_size: int = 64
+    # Seconds a write waits for its batch to commit before the request fails (the write is not withdrawn)
+    write_batch_timeout: float = 30
+
+    # Logging: level for the JSON log stream and the share of successful-request access lines kept
+    log_level: str = "INFO"
+    log_sample_rate: float = 0.1
+
+    # Server (python main.py; gunicorn.conf.py reads the same variables). 0 workers = one per CPU core
+    web_host: str = "0.0.0.0"
+    web_port: int = 8000
+    web_workers: int = 0
+    web_keepalive: int = 5
+    web_graceful_timeout: int = 30
+
     class Config:
         env_file = ".env"
 
-settings = Settings()  # ✅ This line creates the instance you're trying to import
\ No newline at end of file
+settings = Settings()  # ✅ This line creates the instance you're trying to import
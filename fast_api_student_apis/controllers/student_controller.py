@@ -1,89 +1,417 @@
 import logging
-from fastapi import APIRouter, HTTPException, Path
-from fastapi.responses import JSONResponse
-from models.models import Student
+import os
+from typing import Literal, Optional
+from fastapi import APIRouter, Header, HTTPException, Path, Query, Request, Response
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, StreamingResponse
+import orjson
+from psycopg.errors import UniqueViolation
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from models.models import Student, StudentBatchRequest, StudentCreate, StudentUpdate, StudentUpsert
 
 
 
 from services.student_service import (
     get_all_students,
-    get_student_by_roll,
+    stream_students,
+    get_students_by_rolls,
+    get_student_version,
     create_student,
     update_student,
+    patch_student,
     delete_student,
-    export_students_to_excel
+    search_students,
+    DEFAULT_SEARCH_LIMIT,
+    MAX_BATCH_IDS,
+    MAX_SEARCH_LIMIT
 )
+from services.bulk_service import bulk_create_students, bulk_upsert_students, validate_bulk_rows
+from services.export_jobs import get_job_manager
+from services.export_service import export_students, iter_csv_export
+from student_common.batch_loader import BatchLoader
+from student_common.bulk import parse_bulk_payload
+from student_common.etag import (etag_in, http_date, listing_etag, not_modified_since, parse_student_etag,
+                                  split_version, student_etag)
+from student_common.export_jobs import ExportQueueFull
+from student_common.exports import EXPORT_FORMATS
+from student_common.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from student_common.replicas import begin_request_route, end_request_route, reads_from_primary
 
 router = APIRouter()
 logger = logging.getLogger("student_api")
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def _load_students(roll_numbers, primary):
+    # A batch runs in a task copied from its first caller's context: give it a route of its own so it neither
+    # reads from nor pins that request's replica, and so primary-consistency requests are batched separately
+    token = begin_request_route(primary)
+    try:
+        return await get_students_by_rolls(roll_numbers)
+    finally:
+        end_request_route(token)
+
+
+# Concurrent GET /{roll_number} requests in the same tick share one ANY(...) query per read route
+student_loader = BatchLoader(_load_students, MAX_BATCH_IDS, partition=reads_from_primary)
+
+
+def _wants_ndjson(request: Request):
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def _ndjson_lines(students):
+    async for student in students:
+        yield orjson.dumps(student) + b"\n"
+
+
+def _is_not_modified(request: Request, etag, last_modified=None):
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return etag_in(if_none_match, etag)
+    return not_modified_since(request.headers.get("if-modified-since"), last_modified)
+
+
+def _validators(etag, last_modified=None):
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def _if_match_version(if_match, roll_number):
+    """updated_at named by an If-Match header; None without one (or for *), 412 if it names another version."""
+    if not if_match or if_match.strip() == "*":
+        return None
+    expected_updated_at = parse_student_etag(if_match.split(",")[0], roll_number)
+    if expected_updated_at is None:
+        raise HTTPException(status_code=412, detail="If-Match does not match this student")
+    return expected_updated_at
+
+
+async def _json_array_chunks(students):
+    # Same body as the non-streamed listing, emitted one row at a time
+    yield b"["
+    first = True
+    async for student in students:
+        yield (b"" if first else b",") + orjson.dumps(student)
+        first = False
+    yield b"]"
+
 @router.get("/", response_model=list[Student], tags=["Students"])
-async def get_students():
+async def get_students(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    min_age: Optional[int] = Query(None, ge=0),
+    max_age: Optional[int] = Query(None, ge=0),
+    last_name: Optional[str] = Query(None, description="Last name prefix"),
+    stream: bool = Query(False, description="Stream every matching student (ignores limit/after); "
+                                            "send Accept: application/x-ndjson for one JSON object per line")
+):
     try:
-        students = get_all_students()
-        logger.info("Fetched all students")
-        return students
+        if stream or _wants_ndjson(request):
+            students = stream_students(min_age, max_age, last_name)
+            logger.info("Streaming all students")
+            if _wants_ndjson(request):
+                return StreamingResponse(_ndjson_lines(students), media_type=NDJSON_MEDIA_TYPE)
+            return StreamingResponse(_json_array_chunks(students), media_type="application/json")
+        # The ETag describes the page actually served, cached or not
+        students, next_cursor, version = await get_all_students(limit, after, min_age, max_age, last_name)
+        etag = listing_etag(version, limit, after, min_age, max_age, last_name)
+        if _is_not_modified(request, etag):
+            return Response(status_code=304, headers=_validators(etag))
+        logger.debug("Fetched all students")
+        headers = _validators(etag)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        # DB rows are trusted: return them directly and skip response_model re-validation
+        return ORJSONResponse(students, headers=headers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception:
         logger.exception("Error fetching students")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/batch-get", tags=["Students"])
+async def batch_get_students(batch: StudentBatchRequest):
+    """Fetch up to MAX_BATCH_IDS students in one query.
+
+    ``students`` follows the order of ``roll_numbers`` with null for misses;
+    ``missing`` lists the roll numbers that were not found.
+    """
+    if len(batch.roll_numbers) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} roll numbers per request")
+    try:
+        students = [split_version(student)[0] if student else None
+                    for student in await get_students_by_rolls(batch.roll_numbers)]
+        missing = [roll for roll, student in zip(batch.roll_numbers, students) if student is None]
+        logger.debug("Fetched %s of %s students by roll number", len(students) - len(missing), len(students))
+        return ORJSONResponse({"students": students, "missing": missing})
+    except Exception:
+        logger.exception("Error batch fetching students")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# Declared before /{roll_number} so "search" is not parsed as a roll number
+@router.get("/search", response_model=list[Student], tags=["Students"])
+async def search(
+    q: Optional[str] = Query(None, description='Name to search for (first name, last name or "first last")'),
+    mode: Literal["prefix", "fuzzy"] = Query("prefix", description="prefix matches the start of a name; "
+                                                                   "fuzzy tolerates typos"),
+    email: Optional[str] = Query(None, description="Exact email address; use instead of q"),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT, description="Maximum results")
+):
+    """Matching students, best match first."""
+    try:
+        students = await search_students(q, email, mode, limit)
+        logger.debug("Search returned %s students", len(students))
+        return ORJSONResponse(students)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        logger.exception("Error searching students")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.get("/{roll_number}", response_model=Student, tags=["Students"])
-async def get_student(roll_number: int = Path(..., description="Roll number of the student")):
+async def get_student(request: Request,
+                      roll_number: int = Path(..., description="Roll number of the student")):
     try:
-        student = get_student_by_roll(roll_number)
+        student = await student_loader.load(roll_number)
         if student:
-            logger.info(f"Fetched student with roll number {roll_number}")
-            return student
-        logger.warning(f"Student with roll number {roll_number} not found")
+            # Validators come from the record served, so a cached body never carries a newer ETag
+            body, updated_at = split_version(student)
+            etag = student_etag(roll_number, updated_at)
+            if _is_not_modified(request, etag, updated_at):
+                return Response(status_code=304, headers=_validators(etag, updated_at))
+            logger.debug("Fetched student with roll number %s", roll_number)
+            return ORJSONResponse(body, headers=_validators(etag, updated_at))
+        logger.warning("Student with roll number %s not found", roll_number)
         raise HTTPException(status_code=404, detail="Student not found")
+    except HTTPException:
+        raise
     except Exception:
-        logger.exception(f"Error fetching student {roll_number}")
+        logger.exception("Error fetching student %s", roll_number)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.post("/", status_code=201, tags=["Students"])
-async def add_student(student: Student):
+async def add_student(student: StudentCreate):
     try:
-        roll_number = create_student(student.dict())
-        logger.info(f"Created student with roll number {roll_number}")
+        roll_number = await create_student(student.dict())
+        logger.info("Created student with roll number %s", roll_number)
         return {"message": "Student created", "roll_number": roll_number}
+    except UniqueViolation:
+        logger.warning("Email address already in use")
+        raise HTTPException(status_code=409, detail="A student with this email address already exists")
     except Exception:
         logger.exception("Error creating student")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/bulk", status_code=201, tags=["Students"])
+async def add_students_bulk(request: Request, response: Response):
+    """Load a JSON array, NDJSON or CSV (with header row) of students via COPY.
+
+    ``roll_numbers`` is aligned with the input (null for rejected rows);
+    ``errors`` lists the index and validation messages of each rejected row,
+    including emails already in use. 409 means a concurrent write claimed one
+    of the email addresses and nothing was written.
+    """
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip()
+    body = await request.body()
+    try:
+        # Parsing and validating up to MAX_BULK_ROWS rows is CPU work; keep it off the event loop
+        rows = await run_in_threadpool(parse_bulk_payload, body, content_type)
+        valid, errors = await run_in_threadpool(validate_bulk_rows, rows)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        result = await bulk_create_students(valid, errors, len(rows))
+        logger.info("Bulk created %s students (%s rejected)", result["inserted"], len(result["errors"]))
+    except UniqueViolation:
+        logger.warning("Bulk insert hit a concurrent email address change")
+        raise HTTPException(status_code=409, detail="An email address in the batch was taken concurrently; "
+                                                    "retry the batch")
+    except Exception:
+        logger.exception("Error bulk creating students")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    if not result["inserted"]:
+        response.status_code = 400
+    return result
+
+@router.post("/bulk/upsert", tags=["Students"])
+async def upsert_students_bulk(request: Request,
+                               on: Literal["email_address", "roll_number"] = Query(
+                                   "email_address", description="Conflict key; with roll_number, rows without one "
+                                                                "are inserted")):
+    """Insert or update a JSON array, NDJSON or CSV of students in one transaction.
+
+    ``results`` is aligned with the input: inserted/updated/unchanged with the
+    roll number, or rejected with the reasons. 409 means a concurrent write
+    claimed one of the email addresses and nothing was written.
+    """
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip()
+    body = await request.body()
+    try:
+        rows = await run_in_threadpool(parse_bulk_payload, body, content_type)
+        valid, errors = await run_in_threadpool(validate_bulk_rows, rows, StudentUpsert)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        result = await bulk_upsert_students(valid, errors, len(rows), on)
+    except UniqueViolation:
+        logger.warning("Bulk upsert hit a concurrent email address change")
+        raise HTTPException(status_code=409, detail="An email address in the batch was taken concurrently; "
+                                                    "retry the batch")
+    except Exception:
+        logger.exception("Error bulk upserting students")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    logger.info("Bulk upserted %s students (%s inserted, %s updated, %s rejected)",
+                len(rows), result["inserted"], result["updated"], result["rejected"])
+    return ORJSONResponse(result, status_code=400 if result["rejected"] == len(rows) else 200)
+
 @router.put("/{roll_number}", tags=["Students"])
-async def modify_student(roll_number: int, student: Student):
+async def modify_student(roll_number: int, student: StudentCreate,
+                         if_match: Optional[str] = Header(None, description="ETag from a previous GET")):
     try:
-        updated = update_student(roll_number, student.dict())
+        # If-Match: only update if the client's copy is current (optimistic concurrency)
+        expected_updated_at = _if_match_version(if_match, roll_number)
+        updated = await update_student(roll_number, student.dict(), expected_updated_at)
         if updated:
-            logger.info(f"Updated student with roll number {roll_number}")
+            logger.info("Updated student with roll number %s", roll_number)
             return {"message": "Student updated"}
-        logger.warning(f"Student with roll number {roll_number} not found for update")
+        if expected_updated_at is not None and await get_student_version(roll_number) is not None:
+            logger.warning("Student with roll number %s changed since the If-Match version", roll_number)
+            raise HTTPException(status_code=412, detail="Student was modified by another request")
+        logger.warning("Student with roll number %s not found for update", roll_number)
         raise HTTPException(status_code=404, detail="Student not found")
+    except HTTPException:
+        raise
+    except UniqueViolation:
+        logger.warning("Email address already in use")
+        raise HTTPException(status_code=409, detail="A student with this email address already exists")
     except Exception:
-        logger.exception(f"Error updating student {roll_number}")
+        logger.exception("Error updating student %s", roll_number)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.patch("/{roll_number}", response_model=Student, tags=["Students"])
+async def patch_student_fields(roll_number: int, changes: StudentUpdate,
+                               if_match: Optional[str] = Header(None, description="ETag from a previous GET")):
+    """Write only the fields present in the body; returns the updated student and its new ETag."""
+    fields = changes.dict(exclude_unset=True)
+    if not fields:
+        raise HTTPException(status_code=400, detail="Provide at least one field to update")
+    try:
+        expected_updated_at = _if_match_version(if_match, roll_number)
+        student = await patch_student(roll_number, fields, expected_updated_at)
+        if student:
+            logger.info("Patched student with roll number %s", roll_number)
+            updated_at = student.pop("updated_at")
+            return ORJSONResponse(student, headers=_validators(student_etag(roll_number, updated_at), updated_at))
+        if expected_updated_at is not None and await get_student_version(roll_number) is not None:
+            logger.warning("Student with roll number %s changed since the If-Match version", roll_number)
+            raise HTTPException(status_code=412, detail="Student was modified by another request")
+        logger.warning("Student with roll number %s not found for patch", roll_number)
+        raise HTTPException(status_code=404, detail="Student not found")
+    except HTTPException:
+        raise
+    except UniqueViolation:
+        logger.warning("Email address already in use")
+        raise HTTPException(status_code=409, detail="A student with this email address already exists")
+    except Exception:
+        logger.exception("Error patching student %s", roll_number)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.delete("/{roll_number}", tags=["Students"])
 async def remove_student(roll_number: int):
     try:
-        deleted = delete_student(roll_number)
+        deleted = await delete_student(roll_number)
         if deleted:
-            logger.info(f"Deleted student with roll number {roll_number}")
+            logger.info("Deleted student with roll number %s", roll_number)
             return {"message": "Student deleted"}
-        logger.warning(f"Student with roll number {roll_number} not found for deletion")
+        logger.warning("Student with roll number %s not found for deletion", roll_number)
         raise HTTPException(status_code=404, detail="Student not found")
+    except HTTPException:
+        raise
     except Exception:
-        logger.exception(f"Error deleting student {roll_number}")
+        logger.exception("Error deleting student %s", roll_number)
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@router.get("/export/to-excel", tags=["Students"])
-async def export_to_excel():
-    
+async def _queue_export_job(request: Request, response: Response, fmt):
     try:
-        file_path = export_students_to_excel()
-        logger.info(f"Exported student data to Excel at {file_path}")
-        return {"message": "Student data exported successfully", "file_path": file_path}
+        # Submitting writes the job's status row; keep the blocking query off the event loop
+        job = await run_in_threadpool(get_job_manager().submit, fmt)
+    except ExportQueueFull as e:
+        logger.warning("Rejected export job: %s", e)
+        raise HTTPException(status_code=429, detail="Too many export jobs pending, retry later")
+    body = job.as_dict()
+    body["status_url"] = str(request.url_for("get_export_job", job_id=job.id))
+    body["download_url"] = str(request.url_for("download_export_job", job_id=job.id))
+    response.headers["Location"] = body["status_url"]
+    return body
+
+@router.get("/export/to-excel", status_code=202, deprecated=True, tags=["Students"])
+async def export_to_excel(request: Request, response: Response):
+    """Deprecated: use ``POST /export/jobs?format=xlsx``.
+
+    Queues the same xlsx export job instead of building the file inside the
+    request; poll ``status_url`` and fetch ``download_url`` when it is done.
+    """
+    logger.warning("Deprecated GET /export/to-excel called; queueing an xlsx export job")
+    response.headers["Deprecation"] = "true"
+    response.headers["Link"] = f'<{request.url_for("start_export_job")}>; rel="successor-version"'
+    return await _queue_export_job(request, response, "xlsx")
+
+@router.get("/export/download", tags=["Students"])
+async def download_export(format: str = Query("csv", description=f"One of: {', '.join(EXPORT_FORMATS)}")):
+    fmt = format.lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}")
+    download_name = f"student_data.{fmt}"
+    try:
+        if fmt == "csv":
+            # COPY output is relayed to the client as PostgreSQL produces it;
+            # Starlette iterates the sync generator in its threadpool
+            return StreamingResponse(
+                iter_csv_export(),
+                media_type=EXPORT_FORMATS[fmt],
+                headers={"Content-Disposition": f'attachment; filename="{download_name}"'}
+            )
+        file_path, stats = await run_in_threadpool(export_students, fmt)
+        logger.info("Exported student data to %s for download (%s rows)", fmt, stats.rows)
+        return FileResponse(
+            file_path,
+            media_type=EXPORT_FORMATS[fmt],
+            filename=download_name,
+            background=BackgroundTask(os.remove, file_path)
+        )
     except Exception:
-        logger.exception("Error exporting student data to Excel")
+        logger.exception("Error exporting student data to %s", fmt)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/export/jobs", status_code=202, tags=["Students"])
+async def start_export_job(request: Request, response: Response,
+                           format: str = Query("xlsx", description=f"One of: {', '.join(EXPORT_FORMATS)}")):
+    fmt = format.lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}")
+    return await _queue_export_job(request, response, fmt)
+
+@router.get("/export/jobs/{job_id}", tags=["Students"])
+async def get_export_job(job_id: str):
+    job = await run_in_threadpool(get_job_manager().get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job.as_dict()
+
+@router.get("/export/jobs/{job_id}/download", tags=["Students"])
+async def download_export_job(job_id: str):
+    job = await run_in_threadpool(get_job_manager().get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Export job is {job.status}")
+    if not os.path.exists(job.file_path):
+        # Pruned by the worker that ran it since the status was read
+        raise HTTPException(status_code=410, detail="Export file is no longer available")
+    return FileResponse(job.file_path, media_type=EXPORT_FORMATS[job.format], filename=f"student_data.{job.format}")
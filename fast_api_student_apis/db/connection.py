@@ -1,12 +1,266 @@
 # db/connection.py
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+
 import psycopg
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
 from config import settings
+from db.profiler import ProfilingAsyncCursor, ProfilingCursor, profiling_enabled
+from student_common.instrumentation import (InstrumentedAsyncCursor, InstrumentedCursor, configure_async_connection,
+                                            configure_connection)
+from student_common.replicas import ReplicaSet, replica_conninfo, stick_to_primary
+
+_pool = None
+_async_pool = None
+_pool_lock = threading.Lock()
+# Read replicas (DB_REPLICA_DSNS) and their pools, keyed by replica name
+_replicas = None
+_replica_pools = {}
+_async_replica_pools = {}
+
+# Checkout latency counters (time spent waiting for a pooled connection), per pool
+_checkout_stats = {
+    "sync": {"count": 0, "total_ms": 0.0, "max_ms": 0.0},
+    "async": {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+}
+_stats_lock = threading.Lock()
+
+
+def _conninfo_kwargs():
+    return {
+        "host": settings.db_host,
+        "port": settings.db_port,
+        "dbname": settings.db_name,
+        "user": settings.db_user,
+        "password": settings.db_password,
+        # psycopg default of 5; None (PgBouncer mode) disables server-side prepared statements
+        "prepare_threshold": None if settings.db_pgbouncer_compat else 5
+    }
+
+
+def _pool_options():
+    return {
+        "min_size": settings.db_pool_min_size,
+        "max_size": settings.db_pool_max_size,
+        "max_idle": settings.db_pool_max_idle,
+        "max_lifetime": settings.db_pool_max_lifetime,
+        "timeout": settings.db_pool_timeout
+    }
+
+
+def _create_pool(kwargs, name):
+    return ConnectionPool(
+        kwargs=kwargs,
+        check=ConnectionPool.check_connection if settings.db_pool_check else None,
+        configure=configure_connection,
+        name=name,
+        open=True,
+        **_pool_options()
+    )
 
-def get_connection():
-    return psycopg.connect(
-        host=settings.db_host,
-        port=settings.db_port,
-        dbname=settings.db_name,
-        user=settings.db_user,
-        password=settings.db_password
+
+async def _open_async_pool(kwargs, name):
+    pool = AsyncConnectionPool(
+        kwargs=kwargs,
+        check=AsyncConnectionPool.check_connection if settings.db_pool_check else None,
+        configure=configure_async_connection,
+        name=name,
+        open=False,
+        **_pool_options()
     )
+    await pool.open()
+    return pool
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _create_pool(_conninfo_kwargs(), "student_api")
+    return _pool
+
+
+def close_pool():
+    global _pool, _replicas
+    with _pool_lock:
+        if _replicas is not None:
+            _replicas.close()
+            _replicas = None
+        for pool in _replica_pools.values():
+            pool.close()
+        _replica_pools.clear()
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+async def open_async_pool():
+    # The async pool has to be opened on the running event loop (see the startup event)
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = await _open_async_pool(_conninfo_kwargs(), "student_api_async")
+    return _async_pool
+
+
+async def close_async_pool():
+    global _async_pool
+    for pool in _async_replica_pools.values():
+        await pool.close()
+    _async_replica_pools.clear()
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+
+
+def get_replica_set():
+    """The process's ReplicaSet, or None when DB_REPLICA_DSNS is empty."""
+    global _replicas
+    if not settings.db_replica_dsns:
+        return None
+    if _replicas is None:
+        with _pool_lock:
+            if _replicas is None:
+                dsns = [dsn.strip() for dsn in settings.db_replica_dsns.split(",") if dsn.strip()]
+                _replicas = ReplicaSet(
+                    replica_conninfo(dsns, _conninfo_kwargs()),
+                    balance=settings.db_replica_balance.lower(),
+                    max_lag_ms=settings.db_replica_max_lag_ms,
+                    check_interval=settings.db_replica_check_interval
+                )
+    return _replicas
+
+
+def _route_read(read_only):
+    """(replica set, replica) for one connection; the replica is None when the primary should serve it."""
+    replicas = get_replica_set()
+    replica = replicas.choose() if read_only and replicas is not None else None
+    if not read_only:
+        stick_to_primary()
+    return replicas, replica
+
+
+def _get_replica_pool(replica):
+    pool = _replica_pools.get(replica.name)
+    if pool is None:
+        with _pool_lock:
+            pool = _replica_pools.get(replica.name)
+            if pool is None:
+                pool = _replica_pools[replica.name] = _create_pool(replica.kwargs, f"student_api_{replica.name}")
+    return pool
+
+
+async def _get_async_replica_pool(replica):
+    # Only touched from the event loop, so no lock is needed
+    pool = _async_replica_pools.get(replica.name)
+    if pool is None:
+        pool = await _open_async_pool(replica.kwargs, f"student_api_async_{replica.name}")
+        if replica.name in _async_replica_pools:
+            # Another request opened one while this one was connecting
+            await pool.close()
+        else:
+            _async_replica_pools[replica.name] = pool
+        pool = _async_replica_pools[replica.name]
+    return pool
+
+
+def _record_checkout(kind, elapsed_ms):
+    with _stats_lock:
+        stats = _checkout_stats[kind]
+        stats["count"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+
+@contextmanager
+def get_connection(read_only=False):
+    # Borrow a connection from the shared pool; it is returned (not closed) on exit.
+    # read_only connections may come from a replica (see db/replicas.py)
+    replicas, replica = _route_read(read_only)
+    pool = _get_replica_pool(replica) if replica is not None else get_pool()
+    start = time.perf_counter()
+    conn = None
+    try:
+        with replicas.track(replica) if replica is not None else nullcontext(), pool.connection() as conn:
+            _record_checkout("sync", (time.perf_counter() - start) * 1000)
+            if not profiling_enabled():
+                yield conn
+                return
+            conn.cursor_factory = ProfilingCursor
+            try:
+                yield conn
+            finally:
+                conn.cursor_factory = InstrumentedCursor
+    except psycopg.OperationalError as e:
+        # A checkout that failed or a dropped connection takes the replica out until its next good check
+        if replica is not None and (conn is None or conn.broken):
+            replicas.eject(replica, str(e))
+        raise
+
+
+@asynccontextmanager
+async def get_async_connection(read_only=False):
+    # Async counterpart of get_connection(), used by the routers
+    replicas, replica = _route_read(read_only)
+    pool = await _get_async_replica_pool(replica) if replica is not None else await open_async_pool()
+    start = time.perf_counter()
+    conn = None
+    try:
+        with replicas.track(replica) if replica is not None else nullcontext():
+            async with pool.connection() as conn:
+                _record_checkout("async", (time.perf_counter() - start) * 1000)
+                if not profiling_enabled():
+                    yield conn
+                    return
+                conn.cursor_factory = ProfilingAsyncCursor
+                try:
+                    yield conn
+                finally:
+                    conn.cursor_factory = InstrumentedAsyncCursor
+    except psycopg.OperationalError as e:
+        if replica is not None and (conn is None or conn.broken):
+            replicas.eject(replica, str(e))
+        raise
+
+
+def _summarize_pool(stats, checkouts):
+    return {
+        "pool_min": stats.get("pool_min", 0),
+        "pool_max": stats.get("pool_max", 0),
+        "pool_size": stats.get("pool_size", 0),
+        "in_use": stats.get("pool_size", 0) - stats.get("pool_available", 0),
+        "available": stats.get("pool_available", 0),
+        "waiting": stats.get("requests_waiting", 0),
+        "requests_errors": stats.get("requests_errors", 0),
+        "connections_lost": stats.get("connections_lost", 0),
+        "checkouts": checkouts["count"],
+        "checkout_avg_ms": round(checkouts["total_ms"] / checkouts["count"], 3) if checkouts["count"] else 0.0,
+        "checkout_max_ms": round(checkouts["max_ms"], 3)
+    }
+
+
+def get_pool_stats():
+    with _stats_lock:
+        checkouts = {kind: dict(stats) for kind, stats in _checkout_stats.items()}
+    result = {}
+    if _async_pool is not None:
+        result["async"] = _summarize_pool(_async_pool.get_stats(), checkouts["async"])
+    if _pool is not None:
+        result["sync"] = _summarize_pool(_pool.get_stats(), checkouts["sync"])
+    return result
+
+
+def get_replica_stats():
+    replicas = get_replica_set()
+    if replicas is None:
+        return {"enabled": False}
+    stats = replicas.stats()
+    for replica in stats["replicas"]:
+        for kind, pools in (("sync", _replica_pools), ("async", _async_replica_pools)):
+            pool = pools.get(replica["name"])
+            if pool is not None:
+                pool_stats = pool.get_stats()
+                replica[f"{kind}_pool_size"] = pool_stats.get("pool_size", 0)
+                replica[f"{kind}_waiting"] = pool_stats.get("requests_waiting", 0)
+    return {"enabled": True, **stats}
@@ -0,0 +1,135 @@
+"""Opt-in per-request query profiler and slow-query log.
+
+Enabled with ``QUERY_PROFILE_ENABLED``. While enabled, ``get_connection()`` and
+``get_async_connection()`` hand out connections whose cursors record every
+statement (text, parameters, duration, rows). Statements slower than
+``SLOW_QUERY_MS`` are logged, and a ``SLOW_QUERY_EXPLAIN_RATE`` share of slow
+SELECTs are re-run under ``EXPLAIN (ANALYZE, BUFFERS)`` with the plan logged
+alongside. Requests sent with ``X-Query-Profile: 1`` get their statements back
+in the ``X-Query-Profile`` response header.
+"""
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+import orjson
+from psycopg import AsyncCursor, Cursor
+
+from config import settings
+from student_common.instrumentation import InstrumentedAsyncCursor, InstrumentedCursor, _rows_returned
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Query-Profile"
+# Keep the response header well under common proxy limits
+MAX_PROFILE_ENTRIES = 50
+MAX_SQL_LENGTH = 300
+
+_current_profile = ContextVar("query_profile", default=None)
+
+
+def profiling_enabled():
+    return settings.query_profile_enabled
+
+
+def _redact(params):
+    if params is None:
+        return None
+    if not settings.query_profile_redact_params:
+        return params
+    # Keep the shape (how many values, of what type) without the values themselves
+    if isinstance(params, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in params.items()}
+    return [f"<{type(value).__name__}>" for value in params]
+
+
+def _capture(cur, query, params, elapsed_ms, rows):
+    """Add the statement to the request profile and log it if slow.
+
+    Returns the statement text when it is a slow SELECT sampled for EXPLAIN, else None.
+    """
+    profile = _current_profile.get()
+    if profile is None and elapsed_ms < settings.slow_query_ms:
+        return None
+    query_text = query if isinstance(query, str) else query.as_string(cur)
+    sql = " ".join(query_text.split())
+    if profile is not None and len(profile) < MAX_PROFILE_ENTRIES:
+        profile.append({
+            "sql": sql[:MAX_SQL_LENGTH],
+            "params": _redact(params),
+            "ms": round(elapsed_ms, 3),
+            "rows": rows
+        })
+    if elapsed_ms < settings.slow_query_ms:
+        return None
+    logger.warning("Slow query (%.1f ms, %d rows): %s params=%s", elapsed_ms, rows, sql, _redact(params))
+    if sql[:6].upper() == "SELECT" and random.random() < settings.slow_query_explain_rate:
+        return query_text
+    return None
+
+
+class ProfilingCursor(InstrumentedCursor):
+    def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        result = super().execute(query, params, **kwargs)
+        explain = _capture(self, query, params, (time.perf_counter() - start) * 1000, _rows_returned(self))
+        if explain is not None:
+            # Plain cursor so the EXPLAIN itself is not profiled; the savepoint keeps a
+            # failed EXPLAIN from aborting the caller's transaction
+            try:
+                with self.connection.transaction(), Cursor(self.connection) as explain_cur:
+                    explain_cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {explain}", params)
+                    plan = "\n".join(row[0] for row in explain_cur.fetchall())
+                logger.warning("Plan for slow query %s:\n%s", " ".join(explain.split()), plan)
+            except Exception:
+                logger.exception("EXPLAIN of slow query failed")
+        return result
+
+
+class ProfilingAsyncCursor(InstrumentedAsyncCursor):
+    async def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        result = await super().execute(query, params, **kwargs)
+        explain = _capture(self, query, params, (time.perf_counter() - start) * 1000, _rows_returned(self))
+        if explain is not None:
+            try:
+                async with self.connection.transaction(), AsyncCursor(self.connection) as explain_cur:
+                    await explain_cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {explain}", params)
+                    plan = "\n".join(row[0] for row in await explain_cur.fetchall())
+                logger.warning("Plan for slow query %s:\n%s", " ".join(explain.split()), plan)
+            except Exception:
+                logger.exception("EXPLAIN of slow query failed")
+        return result
+
+
+class QueryProfileMiddleware:
+    """Collect the statements of requests sent with ``X-Query-Profile: 1`` and return them in that header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or not settings.query_profile_enabled
+                or (PROFILE_HEADER.lower().encode(), b"1") not in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        profile = []
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Streaming responses report the statements run before the first chunk
+                summary = orjson.dumps({
+                    "statements": len(profile),
+                    "total_ms": round(sum(entry["ms"] for entry in profile), 3),
+                    "queries": profile
+                }, default=str)
+                message["headers"] = [*message.get("headers", []), (PROFILE_HEADER.lower().encode(), summary)]
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
@@ -0,0 +1,21 @@
+"""Per-request replica routing state for the FastAPI app (see student_common.replicas)."""
+from student_common.replicas import CONSISTENCY_HEADER, begin_request_route, end_request_route
+
+
+class ReplicaRoutingMiddleware:
+    """Give each request its own routing state; ``X-Read-Consistency: primary`` keeps its reads on the primary."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header = CONSISTENCY_HEADER.lower().encode()
+        value = next((value for name, value in scope["headers"] if name == header), b"")
+        token = begin_request_route(value.decode().lower() == "primary")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            end_request_route(token)
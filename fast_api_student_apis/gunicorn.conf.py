@@ -0,0 +1,71 @@
+"""Production server settings for the FastAPI app: gunicorn managing uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+(``python main.py`` starts the same app under plain uvicorn.) Every setting can
+be overridden from the environment. Each worker is one event loop with its own
+async connection pool of DB_POOL_MAX_SIZE connections, so PostgreSQL sees up
+to workers * DB_POOL_MAX_SIZE; DB_CONNECTION_BUDGET splits a fixed total
+across the workers instead.
+
+CACHE_BACKEND=memory keeps a separate cache in every worker, and a write
+through one worker would leave the others serving the old student. It
+therefore runs a single worker by default and refuses to start with more;
+use CACHE_BACKEND=redis (or none) to scale out. Export jobs are shared
+through PostgreSQL and work with any number of workers.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", f"{os.getenv('WEB_HOST', '0.0.0.0')}:{os.getenv('WEB_PORT', '8000')}")
+
+_per_process_cache = os.getenv("CACHE_BACKEND", "memory").lower() == "memory"
+
+# One event loop per core already overlaps many requests; more processes only add pools and memory
+workers = int(os.getenv("WEB_WORKERS", "0")) or (1 if _per_process_cache else multiprocessing.cpu_count())
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master; workers fork with the code already loaded.
+# Pools are opened per worker by the startup event, after the fork.
+preload_app = True
+
+# Reuse client connections behind a load balancer; keep this above the balancer's idle timeout
+keepalive = int(os.getenv("WEB_KEEPALIVE", "5"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+# Time a worker gets to finish in-flight requests (and run the shutdown event) after SIGTERM
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+accesslog = None  # the app writes its own structured access lines
+errorlog = "-"
+
+# Per-worker pool sizing, applied before the app (and config.py) is imported
+_budget = int(os.getenv("DB_CONNECTION_BUDGET", "0"))
+if _budget:
+    os.environ.setdefault("DB_POOL_MAX_SIZE", str(max(1, _budget // workers)))
+    os.environ.setdefault("DB_POOL_MIN_SIZE", str(min(2, max(1, _budget // workers))))
+
+
+def on_starting(server):
+    # server.cfg also reflects a --workers given on the command line
+    if server.cfg.workers > 1 and _per_process_cache:
+        raise RuntimeError(f"CACHE_BACKEND=memory cannot be shared by {server.cfg.workers} workers: "
+                           "set CACHE_BACKEND=redis (or none), or WEB_WORKERS=1")
+
+
+def when_ready(server):
+    server.log.info("%d uvicorn workers, pool max %s per worker", workers, os.getenv("DB_POOL_MAX_SIZE", "default"))
+
+
+def post_fork(server, worker):
+    # Threads do not survive fork: restart the log listener in every worker
+    from config import settings
+    from student_common.logging_config import setup_logging
+    setup_logging(settings.log_level, settings.log_sample_rate)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
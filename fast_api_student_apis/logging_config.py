@@ -0,0 +1,47 @@
+"""Per-request log tagging and access lines for the FastAPI app (see student_common.logging_config)."""
+import logging
+import time
+import uuid
+
+from student_common.logging_config import REQUEST_ID_HEADER, access_logger, request_id_var, route_var
+
+
+class RequestLoggingMiddleware:
+    """Tag log records with a per-request id (echoed in X-Request-ID) and emit one access line per request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = REQUEST_ID_HEADER.lower().encode()
+        request_id = next((value.decode() for name, value in scope["headers"] if name == header), None)
+        request_id = request_id or uuid.uuid4().hex
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (header, request_id.encode())]
+            await send(message)
+
+        start = time.perf_counter()
+        request_token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if access_logger.isEnabledFor(logging.INFO):
+                # The router stores the matched route in the scope once the request has been dispatched
+                route = scope.get("route")
+                route_token = route_var.set(route.path if route is not None else None)
+                access_logger.log(logging.WARNING if status >= 500 else logging.INFO,
+                                  "%s %s %d", scope["method"], scope["path"], status,
+                                  extra={"method": scope["method"], "status": status,
+                                         "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                                         "sample": status < 400})
+                route_var.reset(route_token)
+            request_id_var.reset(request_token)
@@ -1,10 +1,23 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import RedirectResponse, FileResponse
+from fastapi.responses import ORJSONResponse, RedirectResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import logging
 import os
 
+import repo_path  # before anything that imports student_common
+from config import settings
+from db.connection import close_async_pool, close_pool, get_pool_stats, get_replica_stats, open_async_pool
+from db.profiler import PROFILE_HEADER, QueryProfileMiddleware
+from db.replicas import ReplicaRoutingMiddleware
+from logging_config import RequestLoggingMiddleware
+from metrics import MetricsMiddleware, metrics_endpoint
+from services.cache import get_cache
+from services.export_jobs import shutdown_job_manager
+from services.write_batcher import close_write_batcher, get_write_batch_stats
+from student_common.logging_config import REQUEST_ID_HEADER, setup_logging
+from student_common.queries import get_query_stats
+
 # Try importing the router safely
 try:
     from controllers.student_controller import router as student_router
@@ -22,11 +35,12 @@ app = FastAPI(
     version="1.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse
 )
 
-# Logging setup
-logging.basicConfig(level=logging.INFO)
+# Structured JSON logging, written from a background thread
+setup_logging(settings.log_level, settings.log_sample_rate)
 logger = logging.getLogger("student_api")
 logger.info("Starting the FastAPI application...")
 
@@ -37,12 +51,65 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", PROFILE_HEADER, REQUEST_ID_HEADER, "Server-Timing"],
 )
 
+# Opt-in query profiler; X-Query-Profile: 1 returns a request's statements in a response header
+app.add_middleware(QueryProfileMiddleware)
+
+# Read-replica routing: pins each request to one replica, or to the primary after a write
+# or with X-Read-Consistency: primary
+app.add_middleware(ReplicaRoutingMiddleware)
+
+# Request latency and per-request DB metrics, served in Prometheus format at /metrics
+app.add_middleware(MetricsMiddleware)
+app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], tags=["Monitoring"])
+
+# Request id and access line for every request; added last so it wraps the other middleware
+app.add_middleware(RequestLoggingMiddleware)
+
 # Register routers if available
 if student_router:
     app.include_router(student_router, prefix="/api/students")
 
+# Connection pool statistics for sizing
+@app.get("/stats/pool", tags=["Monitoring"])
+async def pool_stats():
+    return get_pool_stats()
+
+# Per-statement timings from the query registry
+@app.get("/stats/queries", tags=["Monitoring"])
+async def query_stats():
+    return get_query_stats()
+
+# Student cache hit/miss/eviction counters
+@app.get("/stats/cache", tags=["Monitoring"])
+async def cache_stats():
+    return get_cache().stats()
+
+# Replica health, replication lag and balancing
+@app.get("/stats/replicas", tags=["Monitoring"])
+async def replica_stats():
+    return get_replica_stats()
+
+# Group-commit batch sizes and failures
+@app.get("/stats/writes", tags=["Monitoring"])
+async def write_stats():
+    return get_write_batch_stats()
+
+# Open the async pool on the server's event loop
+@app.on_event("startup")
+async def startup_pool():
+    await open_async_pool()
+
+# Commit queued writes, then return pooled connections to the server on shutdown
+@app.on_event("shutdown")
+async def shutdown_pool():
+    shutdown_job_manager()
+    await close_write_batcher()
+    await close_async_pool()
+    close_pool()
+
 # Redirect root to Swagger UI
 @app.get("/", include_in_schema=False)
 async def redirect_to_docs():
@@ -55,3 +122,24 @@ async def favicon():
         path=os.path.join("static", "favicon-32x32.png"),
         media_type="image/png"
     )
+
+# Production entry point: python main.py (or gunicorn -c gunicorn.conf.py main:app)
+if __name__ == "__main__":
+    import uvicorn
+
+    # The memory cache is per process (see gunicorn.conf.py): one worker unless the cache is shared
+    per_process_cache = settings.cache_backend == "memory"
+    workers = settings.web_workers or (1 if per_process_cache else os.cpu_count())
+    if workers > 1 and per_process_cache:
+        raise RuntimeError(f"CACHE_BACKEND=memory cannot be shared by {workers} workers: "
+                           "set CACHE_BACKEND=redis (or none), or WEB_WORKERS=1")
+    uvicorn.run(
+        "main:app",
+        host=settings.web_host,
+        port=settings.web_port,
+        workers=workers,
+        timeout_keep_alive=settings.web_keepalive,
+        timeout_graceful_shutdown=settings.web_graceful_timeout,
+        proxy_headers=True,
+        access_log=False
+    )
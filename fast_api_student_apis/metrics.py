@@ -0,0 +1,84 @@
+import os
+import time
+
+from fastapi import Response
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+from student_common.instrumentation import begin_request_stats, end_request_stats
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"],
+                            buckets=(.005, .01, .025, .05, .075, .1, .25, .5, .75, 1, 2.5, 5, 10))
+REQUESTS = Counter("http_requests_total", "HTTP responses by status", ["method", "route", "status"])
+IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests currently being handled", ["method"],
+                    multiprocess_mode="livesum")
+REQUEST_DB_QUERIES = Histogram("http_request_db_queries", "SQL statements per request", ["route"],
+                               buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+REQUEST_DB_ROWS = Histogram("http_request_db_rows", "Rows returned by PostgreSQL per request", ["route"],
+                            buckets=(0, 1, 10, 100, 1000, 10000, 100000))
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Database time per request", ["route"],
+                               buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5))
+
+
+def server_timing(db_stats, elapsed):
+    # Lets clients and benchmarks split latency into database and application time
+    return f'db;dur={db_stats.seconds * 1000:.3f};desc="{db_stats.queries} queries", app;dur={elapsed * 1000:.3f}'
+
+
+class MetricsMiddleware:
+    """Record request latency, status counts, in-flight requests and per-request DB work.
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware, so streaming
+    responses are timed to their last chunk and no extra task is spawned.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Streaming responses report the DB time spent before the first chunk
+                timing = server_timing(db_stats, time.perf_counter() - start)
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        db_stats, token = begin_request_stats()
+        IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_PROGRESS.labels(method).dec()
+            end_request_stats(token)
+            # FastAPI stores the matched route in the scope; its path template keeps label cardinality bounded
+            route = scope.get("route")
+            route = route.path if route is not None else "unmatched"
+            REQUEST_SECONDS.labels(method, route).observe(elapsed)
+            REQUESTS.labels(method, route, str(status)).inc()
+            REQUEST_DB_QUERIES.labels(route).observe(db_stats.queries)
+            REQUEST_DB_ROWS.labels(route).observe(db_stats.rows)
+            REQUEST_DB_SECONDS.labels(route).observe(db_stats.seconds)
+
+
+def _registry():
+    # Under gunicorn each worker keeps its own metrics; with PROMETHEUS_MULTIPROC_DIR set they are merged here
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+async def metrics_endpoint():
+    return Response(generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
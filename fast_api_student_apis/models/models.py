@@ -1,4 +1,18 @@
-from pydantic import BaseModel, EmailStr
+from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, validator
+
+# Columns a client may write; PATCH builds its SET clause from this whitelist only
+UPDATABLE_FIELDS = ("first_name", "last_name", "age", "email_address")
+
+# Column limits from the school.student table definition
+NAME_MAX_LENGTH = 50
+EMAIL_MAX_LENGTH = 100
+
+def _check_email_length(value):
+    # EmailStr does not accept max_length, so the column limit is checked here
+    if value is not None and len(value) > EMAIL_MAX_LENGTH:
+        raise ValueError(f"longer than {EMAIL_MAX_LENGTH} characters")
+    return value
 
 class Student(BaseModel):
     roll_number: int
@@ -9,3 +23,42 @@ class Student(BaseModel):
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} (Roll No: {self.roll_number})"
+
+class StudentCreate(BaseModel):
+    """Student payload without the generated roll number (used by bulk loads)."""
+    first_name: str = Field(..., max_length=NAME_MAX_LENGTH)
+    last_name: str = Field(..., max_length=NAME_MAX_LENGTH)
+    age: int = Field(..., ge=0)
+    email_address: EmailStr
+
+    _email_length = validator("email_address", allow_reuse=True)(_check_email_length)
+
+class StudentUpdate(BaseModel):
+    """Partial update (PATCH): only the fields sent are written."""
+    first_name: Optional[str] = Field(None, max_length=NAME_MAX_LENGTH)
+    last_name: Optional[str] = Field(None, max_length=NAME_MAX_LENGTH)
+    age: Optional[int] = Field(None, ge=0)
+    email_address: Optional[EmailStr]
+
+    _email_length = validator("email_address", allow_reuse=True)(_check_email_length)
+
+    @validator(*UPDATABLE_FIELDS, pre=True)
+    def reject_null(cls, value):
+        # Omit a field to leave it unchanged; null would blank the column
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+
+class StudentUpsert(StudentCreate):
+    """Bulk upsert row; roll_number identifies the student when upserting on roll_number."""
+    roll_number: Optional[int] = None
+
+    @validator("roll_number", pre=True)
+    def blank_is_none(cls, value):
+        # An empty CSV cell means "no roll number", as in the Flask app
+        if isinstance(value, str) and not value.strip():
+            return None
+        return value
+
+class StudentBatchRequest(BaseModel):
+    roll_numbers: list[int]
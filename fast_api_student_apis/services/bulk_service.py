@@ -0,0 +1,120 @@
+import logging
+
+from pydantic import ValidationError
+
+from db.connection import get_async_connection
+from models.models import StudentCreate
+from services.cache import get_cache
+from student_common.bulk import (BULK_COLUMNS, BULK_COPY_SQL, UPSERT_COPY_SQL, UPSERT_KEYS, UPSERT_SQL,
+                                 UPSERT_STAGING_SQL, check_upsert_rows, reject_taken_emails, resolve_existing,
+                                 upsert_outcomes)
+from student_common.cache import student_key
+from student_common.queries import run_async
+
+logger = logging.getLogger(__name__)
+
+
+def validate_bulk_rows(rows, model=StudentCreate):
+    """Validate rows against ``model``; returns (valid [(index, data)], errors)."""
+    valid = []
+    errors = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append({"index": index, "errors": ["Expected an object"]})
+            continue
+        try:
+            valid.append((index, model(**row).dict()))
+        except ValidationError as e:
+            errors.append({
+                "index": index,
+                "errors": [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()]
+            })
+    return valid, errors
+
+
+async def bulk_create_students(valid, errors, row_count):
+    """Load pre-validated rows with COPY in a single transaction.
+
+    Rows whose email is taken or repeated in the batch are moved to
+    ``errors`` rather than aborting the COPY. Returns ``{"inserted",
+    "roll_numbers", "errors"}`` where ``roll_numbers`` is aligned with the
+    original input (None for rejected rows). A UniqueViolation means a
+    concurrent write took one of the emails and nothing was written.
+    """
+    logger.info("Start: bulk_create_students (%s rows)", len(valid))
+    roll_numbers = [None] * row_count
+    if valid:
+        try:
+            async with get_async_connection() as conn:
+                async with conn.cursor() as cur:
+                    await run_async(cur, "email_owners", ([row["email_address"] for _, row in valid],))
+                    valid = reject_taken_emails(valid, errors, dict(await cur.fetchall()))
+                    if valid:
+                        # COPY cannot return generated keys, so reserve them from the sequence up front
+                        await run_async(cur, "reserve_roll_numbers", (len(valid),))
+                        reserved = [r[0] for r in await cur.fetchall()]
+                        async with cur.copy(BULK_COPY_SQL) as copy:
+                            for roll_number, (index, row) in zip(reserved, valid):
+                                await copy.write_row((roll_number, *(row[c] for c in BULK_COLUMNS)))
+                                roll_numbers[index] = roll_number
+                await conn.commit()
+            if valid:
+                await get_cache().bump_generation()
+        except Exception:
+            logger.exception("Error in bulk_create_students")
+            raise
+    logger.info("End: bulk_create_students - inserted %s, rejected %s", len(valid), len(errors))
+    return {"inserted": len(valid), "roll_numbers": roll_numbers, "errors": errors}
+
+
+async def bulk_upsert_students(valid, errors, row_count, conflict_key="email_address"):
+    """Insert or update many pre-validated students in one transaction, keyed on ``conflict_key``.
+
+    Rows are COPYed into a temporary staging table and merged with a single
+    INSERT ... ON CONFLICT DO UPDATE, then committed once. With
+    ``roll_number`` as the key, rows without one are inserted and rows with
+    one must name an existing student. Returns per-status counts and
+    ``results`` aligned with the input: inserted/updated/unchanged with the
+    roll number, or rejected with the reasons.
+    """
+    if conflict_key not in UPSERT_KEYS:
+        raise ValueError(f"on must be one of: {', '.join(UPSERT_KEYS)}")
+    logger.info("Start: bulk_upsert_students (%s rows, on %s)", row_count, conflict_key)
+    candidates, results = check_upsert_rows(valid, errors, row_count, conflict_key)
+    returned = {}
+    email_owners = {}
+    staged = []
+    if candidates:
+        try:
+            async with get_async_connection() as conn:
+                async with conn.cursor() as cur:
+                    await run_async(cur, "email_owners", ([row["email_address"] for _, row in candidates],))
+                    email_owners = dict(await cur.fetchall())
+                    existing_rolls = set()
+                    given = [row["roll_number"] for _, row in candidates if row["roll_number"] is not None]
+                    if given:
+                        await run_async(cur, "existing_rolls", (given,))
+                        existing_rolls = {r[0] for r in await cur.fetchall()}
+                    staged = resolve_existing(candidates, conflict_key, existing_rolls, email_owners, results)
+                    if staged:
+                        await cur.execute(UPSERT_STAGING_SQL)
+                        async with cur.copy(UPSERT_COPY_SQL) as copy:
+                            for _, row in staged:
+                                await copy.write_row((row["roll_number"], *(row[c] for c in BULK_COLUMNS)))
+                        await cur.execute(UPSERT_SQL[conflict_key])
+                        returned = {email: (roll_number, inserted)
+                                    for roll_number, email, inserted in await cur.fetchall()}
+                await conn.commit()
+            updated = [student_key(roll_number) for roll_number, inserted in returned.values() if not inserted]
+            if updated:
+                # One multi-key delete rather than a round trip per student
+                await get_cache().delete(*updated)
+            if returned:
+                await get_cache().bump_generation()
+        except Exception:
+            logger.exception("Error in bulk_upsert_students")
+            raise
+    outcome = upsert_outcomes(staged, returned, email_owners, results)
+    logger.info("End: bulk_upsert_students - inserted %s, updated %s, unchanged %s, rejected %s",
+                outcome["inserted"], outcome["updated"], outcome["unchanged"], outcome["rejected"])
+    return outcome
@@ -0,0 +1,26 @@
+from config import settings
+from student_common.cache import AsyncCache, AsyncRedisCache, LRUCache, NullCache
+
+_cache = None
+
+
+def create_cache():
+    if settings.cache_backend == "memory":
+        return AsyncCache(LRUCache(settings.cache_max_entries, settings.cache_ttl))
+    if settings.cache_backend == "redis":
+        from redis import asyncio as redis
+        return AsyncRedisCache(redis.Redis.from_url(settings.redis_url), settings.cache_ttl)
+    return AsyncCache(NullCache())
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = create_cache()
+    return _cache
+
+
+def set_cache(cache):
+    # Swap the backend, e.g. set_cache(AsyncRedisCache(fakeredis.FakeAsyncRedis(), 60)) in tests
+    global _cache
+    _cache = cache
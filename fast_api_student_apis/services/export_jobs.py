@@ -0,0 +1,34 @@
+import threading
+
+from config import settings
+from db.connection import get_connection
+from services.export_service import estimate_student_count, export_students
+from student_common.export_jobs import ExportJobManager, JobStore
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ExportJobManager(
+                    lambda fmt, stats: export_students(fmt, stats=stats),
+                    estimate_student_count,
+                    max_workers=settings.export_max_jobs,
+                    max_pending=settings.export_max_pending,
+                    retention=settings.export_job_retention,
+                    # Job status lives in PostgreSQL so every worker can answer for every job
+                    store=JobStore(get_connection)
+                )
+    return _manager
+
+
+def shutdown_job_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.shutdown()
+            _manager = None
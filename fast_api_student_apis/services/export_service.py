@@ -0,0 +1,21 @@
+from config import settings
+from db.connection import get_connection
+from student_common import exports
+
+
+def _connect():
+    return get_connection(read_only=True)
+
+
+def iter_csv_export(stats=None):
+    """Yield CSV bytes straight from PostgreSQL's COPY ... TO STDOUT."""
+    return exports.iter_csv_export(_connect, stats)
+
+
+def estimate_student_count():
+    return exports.estimate_student_count(_connect)
+
+
+def export_students(fmt, output_dir=None, stats=None):
+    """Export every student to a file in ``settings.export_dir`` (see student_common.exports.export_students)."""
+    return exports.export_students(fmt, output_dir or settings.export_dir, _connect, stats)
@@ -1,126 +1,289 @@
-import os
+import asyncio
 import logging
-import pandas as pd
-from db.connection import get_connection
-from models.models import Student
+from psycopg.rows import dict_row
+from db.connection import get_async_connection
+from models.models import UPDATABLE_FIELDS
+from services.cache import get_cache
+from services.write_batcher import get_write_batcher
+from student_common.cache import student_key, student_page_key
+from student_common.etag import page_version, versioned_record
+from student_common.pagination import DEFAULT_PAGE_SIZE, build_student_filters, encode_cursor, escape_like
+from student_common.queries import run_async
+from student_common.replicas import read_from_replica, stick_to_primary
+
+STREAM_FETCH_SIZE = 2000
+MAX_BATCH_IDS = 1000
+SEARCH_MODES = ("prefix", "fuzzy")
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+# Shorter fuzzy queries have too few trigrams to rank meaningfully
+MIN_FUZZY_LENGTH = 3
 
-# Configure logger
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
-def get_all_students():
-    logger.info("Start: get_all_students")
+async def _invalidate_student(roll_number):
+    # Drop the cached record and retire every cached listing page
+    cache = get_cache()
+    await cache.delete(student_key(roll_number))
+    await cache.bump_generation()
+
+async def get_all_students(limit=DEFAULT_PAGE_SIZE, after=None, min_age=None, max_age=None, last_name_prefix=None):
+    """Return one keyset page of students ordered by roll_number, the next-page cursor and the page version.
+
+    The version (see page_version) is computed from the rows fetched and cached
+    with them, so it always describes the page being returned.
+    """
+    logger.debug("Start: get_all_students")
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT roll_number, first_name, last_name, age, email_address 
-                    FROM school.student;
-                """)
-                rows = cur.fetchall()
-                columns = [desc[0] for desc in cur.description]
-                students = [Student(**dict(zip(columns, row))).dict() for row in rows]
-                logger.info("End: get_all_students")
-                return students
+        cache = get_cache()
+        generation = await cache.generation()
+        page_key = None
+        if generation is not None:
+            page_key = student_page_key(generation, limit, after, min_age, max_age, last_name_prefix)
+            cached = await cache.get(page_key)
+            if cached is not None:
+                logger.debug("End: get_all_students (cached)")
+                return cached[0], cached[1], cached[2]
+        where_sql, params = build_student_filters(after, min_age, max_age, last_name_prefix)
+        async with get_async_connection(read_only=True) as conn:
+            # Rows come from our own table: build dicts directly instead of validating each through Student
+            async with conn.cursor(row_factory=dict_row) as cur:
+                # Fetch one extra row to learn whether another page exists
+                await run_async(cur, "student_page", (*params, limit + 1), where=where_sql)
+                rows = await cur.fetchall()
+                page = rows[:limit]
+                next_cursor = encode_cursor(page[-1]["roll_number"]) if len(rows) > limit else None
+                version = page_version(page, next_cursor)
+                students = [{key: value for key, value in row.items() if key != "updated_at"} for row in page]
+                if page_key and not read_from_replica():
+                    await cache.set(page_key, [students, next_cursor, version])
+                logger.debug("End: get_all_students")
+                return students, next_cursor, version
     except Exception as e:
         logger.exception("Error in get_all_students")
         raise
 
-def get_student_by_roll(roll_number):
-    logger.info(f"Start: get_student_by_roll ({roll_number})")
+async def stream_students(min_age=None, max_age=None, last_name_prefix=None):
+    """Yield every matching student as a dict, reading through a server-side cursor.
+
+    Rows are fetched STREAM_FETCH_SIZE at a time, so memory stays flat however
+    large the table is. The pooled connection is held until the generator ends.
+    """
+    logger.debug("Start: stream_students")
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
+        where_sql, params = build_student_filters(None, min_age, max_age, last_name_prefix)
+        async with get_async_connection(read_only=True) as conn:
+            async with conn.cursor(name="student_stream", row_factory=dict_row) as cur:
+                cur.itersize = STREAM_FETCH_SIZE
+                await cur.execute(f"""
                     SELECT roll_number, first_name, last_name, age, email_address 
-                    FROM school.student 
-                    WHERE roll_number = %s;
-                """, (roll_number,))
-                row = cur.fetchone()
-                if row:
-                    columns = [desc[0] for desc in cur.description]
-                    student = Student(**dict(zip(columns, row))).dict()
-                else:
-                    student = None
-                logger.info(f"End: get_student_by_roll ({roll_number})")
+                    FROM school.student
+                    {where_sql}
+                    ORDER BY roll_number;
+                """, params)
+                count = 0
+                async for row in cur:
+                    count += 1
+                    yield row
+                logger.debug("End: stream_students (%s rows)", count)
+    except (GeneratorExit, asyncio.CancelledError):
+        logger.info("Stream of students closed by client")
+        raise
+    except Exception as e:
+        logger.exception("Error in stream_students")
+        raise
+
+async def get_student_by_roll(roll_number):
+    """The student with ``updated_at`` (see versioned_record), or None."""
+    logger.debug("Start: get_student_by_roll (%s)", roll_number)
+    try:
+        cache = get_cache()
+        student = await cache.get(student_key(roll_number))
+        if student is not None:
+            logger.debug("End: get_student_by_roll (%s) (cached)", roll_number)
+            return student
+        async with get_async_connection(read_only=True) as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await run_async(cur, "student_by_roll", (roll_number,))
+                student = await cur.fetchone()
+                if student:
+                    student = versioned_record(student)
+                    # A replica may still hold the row as it was before a write just invalidated it
+                    if not read_from_replica():
+                        await cache.set(student_key(roll_number), student)
+                logger.debug("End: get_student_by_roll (%s)", roll_number)
                 return student
     except Exception as e:
-        logger.exception(f"Error in get_student_by_roll ({roll_number})")
+        logger.exception("Error in get_student_by_roll (%s)", roll_number)
         raise
 
-def create_student(data):
-    logger.info("Start: create_student")
+async def get_students_by_rolls(roll_numbers):
+    """Resolve many roll numbers with one query; results follow the request order, None for misses.
+
+    Students carry ``updated_at`` like get_student_by_roll's.
+    """
+    logger.debug("Start: get_students_by_rolls (%s ids)", len(roll_numbers))
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO school.student (first_name, last_name, age, email_address)
-                    VALUES (%s, %s, %s, %s) RETURNING roll_number;
-                """, (
-                    data['first_name'], 
-                    data['last_name'], 
-                    data['age'], 
-                    data['email_address']
-                ))
-                conn.commit()
-                roll_number = cur.fetchone()[0]
-                logger.info(f"End: create_student (roll_number={roll_number})")
-                return roll_number
+        cache = get_cache()
+        found = {}
+        for roll_number in set(roll_numbers):
+            student = await cache.get(student_key(roll_number))
+            if student is not None:
+                found[roll_number] = student
+        uncached = [roll_number for roll_number in set(roll_numbers) if roll_number not in found]
+        if uncached:
+            async with get_async_connection(read_only=True) as conn:
+                async with conn.cursor(row_factory=dict_row) as cur:
+                    await run_async(cur, "students_by_rolls", (uncached,))
+                    cacheable = not read_from_replica()
+                    for student in await cur.fetchall():
+                        found[student["roll_number"]] = versioned_record(student)
+                        if cacheable:
+                            await cache.set(student_key(student["roll_number"]), student)
+        logger.debug("End: get_students_by_rolls (%s found, %s queried)", len(found), len(uncached))
+        return [found.get(roll_number) for roll_number in roll_numbers]
+    except Exception as e:
+        logger.exception("Error in get_students_by_rolls")
+        raise
+
+async def search_students(query=None, email=None, mode="prefix", limit=DEFAULT_SEARCH_LIMIT):
+    """Exact email lookup, or name search ranked best match first.
+
+    ``prefix`` matches the start of the full name or the last name (exact full
+    names first, then shortest); ``fuzzy`` ranks by trigram word similarity.
+    Raises ValueError for invalid search parameters.
+    """
+    logger.debug("Start: search_students (mode=%s)", mode)
+    if (query is None) == (email is None):
+        raise ValueError("Provide exactly one of q or email")
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(SEARCH_MODES)}")
+    if not 1 <= limit <= MAX_SEARCH_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_SEARCH_LIMIT}")
+    term = (query or "").strip().lower()
+    if email is None and not term:
+        raise ValueError("q must not be empty")
+    if email is None and mode == "fuzzy" and len(term) < MIN_FUZZY_LENGTH:
+        raise ValueError(f"Fuzzy search needs at least {MIN_FUZZY_LENGTH} characters")
+    try:
+        async with get_async_connection(read_only=True) as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                if email is not None:
+                    await run_async(cur, "student_by_email", (email.strip(),))
+                elif mode == "prefix":
+                    pattern = escape_like(term) + "%"
+                    await run_async(cur, "student_search_prefix", (pattern, pattern, term, limit))
+                else:
+                    await run_async(cur, "student_search_fuzzy", (term, term, limit))
+                students = await cur.fetchall()
+                logger.debug("End: search_students (%s results)", len(students))
+                return students
+    except Exception as e:
+        logger.exception("Error in search_students")
+        raise
+
+async def get_student_version(roll_number):
+    """The row's current updated_at, or None if it does not exist (tells a stale If-Match from a 404)."""
+    async with get_async_connection(read_only=True) as conn:
+        async with conn.cursor() as cur:
+            await run_async(cur, "student_version", (roll_number,))
+            row = await cur.fetchone()
+            return row[0] if row else None
+
+async def _insert_student(cur, data):
+    await run_async(cur, "student_insert", (data['first_name'], data['last_name'], data['age'], data['email_address']))
+    return (await cur.fetchone())[0]
+
+async def _update_student(cur, roll_number, data, expected_updated_at):
+    await run_async(cur, "student_update", (
+        data['first_name'],
+        data['last_name'],
+        data['age'],
+        data['email_address'],
+        roll_number,
+        expected_updated_at,
+        expected_updated_at
+    ))
+    return cur.rowcount
+
+async def _delete_student(cur, roll_number):
+    await run_async(cur, "student_delete", (roll_number,))
+    return cur.rowcount
+
+async def _write(statement, *args):
+    """Run one single-row write: through the group-commit batcher when enabled, else in its own transaction."""
+    # The batcher writes from its own connection, so pin this request's later reads to the primary here
+    stick_to_primary()
+    batcher = get_write_batcher()
+    if batcher is not None:
+        return await batcher.submit(statement, *args)
+    async with get_async_connection() as conn:
+        async with conn.cursor() as cur:
+            result = await statement(cur, *args)
+        await conn.commit()
+        return result
+
+async def create_student(data):
+    logger.debug("Start: create_student")
+    try:
+        roll_number = await _write(_insert_student, data)
+        await get_cache().bump_generation()
+        logger.debug("End: create_student (roll_number=%s)", roll_number)
+        return roll_number
     except Exception as e:
         logger.exception("Error in create_student")
         raise
 
-def update_student(roll_number, data):
-    logger.info(f"Start: update_student ({roll_number})")
+async def update_student(roll_number, data, expected_updated_at=None):
+    """Rewrite a student; with ``expected_updated_at`` (from If-Match) only if the row is unchanged."""
+    logger.debug("Start: update_student (%s)", roll_number)
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    UPDATE school.student
-                    SET first_name = %s, last_name = %s, age = %s, email_address = %s
-                    WHERE roll_number = %s;
-                """, (
-                    data['first_name'], 
-                    data['last_name'], 
-                    data['age'], 
-                    data['email_address'], 
-                    roll_number
-                ))
-                conn.commit()
-                rowcount = cur.rowcount
-                logger.info(f"End: update_student ({roll_number}) - Rows affected: {rowcount}")
-                return rowcount
+        rowcount = await _write(_update_student, roll_number, data, expected_updated_at)
+        await _invalidate_student(roll_number)
+        logger.debug("End: update_student (%s) - Rows affected: %s", roll_number, rowcount)
+        return rowcount
     except Exception as e:
-        logger.exception(f"Error in update_student ({roll_number})")
+        logger.exception("Error in update_student (%s)", roll_number)
         raise
 
-def delete_student(roll_number):
-    logger.info(f"Start: delete_student ({roll_number})")
+async def patch_student(roll_number, changes, expected_updated_at=None):
+    """Write only the columns in ``changes`` (validated UPDATABLE_FIELDS).
+
+    Returns the updated student including ``updated_at``, or None when the row
+    does not exist or no longer matches ``expected_updated_at`` (If-Match).
+    """
+    logger.debug("Start: patch_student (%s)", roll_number)
+    columns = [field for field in UPDATABLE_FIELDS if field in changes]
+    if not columns:
+        raise ValueError(f"Provide at least one of: {', '.join(UPDATABLE_FIELDS)}")
+    # Whitelisted names in a fixed order: at most 15 distinct statements to prepare
+    assignments = ", ".join(f"{column} = %s" for column in columns)
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    DELETE FROM school.student 
-                    WHERE roll_number = %s;
-                """, (roll_number,))
-                conn.commit()
-                rowcount = cur.rowcount
-                logger.info(f"End: delete_student ({roll_number}) - Rows affected: {rowcount}")
-                return rowcount
+        async with get_async_connection() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await run_async(cur, "student_patch", (
+                    *(changes[column] for column in columns),
+                    roll_number,
+                    expected_updated_at,
+                    expected_updated_at
+                ), assignments=assignments)
+                student = await cur.fetchone()
+                await conn.commit()
+                if student:
+                    await _invalidate_student(roll_number)
+                logger.debug("End: patch_student (%s) - columns: %s", roll_number, ", ".join(columns))
+                return student
     except Exception as e:
-        logger.exception(f"Error in delete_student ({roll_number})")
+        logger.exception("Error in patch_student (%s)", roll_number)
         raise
 
-def export_students_to_excel():
-    logger.info("Start: export_students_to_excel")
+async def delete_student(roll_number):
+    logger.debug("Start: delete_student (%s)", roll_number)
     try:
-        students = get_all_students()
-        df = pd.DataFrame(students)
-        output_path = r"C:\python-basics\docs\student_data_fast_api.xlsx"
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        df.to_excel(output_path, index=False)
-        logger.info(f"End: export_students_to_excel - File saved at {output_path}")
-        return output_path
+        rowcount = await _write(_delete_student, roll_number)
+        await _invalidate_student(roll_number)
+        logger.debug("End: delete_student (%s) - Rows affected: %s", roll_number, rowcount)
+        return rowcount
     except Exception as e:
-        logger.exception("Error in export_students_to_excel")
+        logger.exception("Error in delete_student (%s)", roll_number)
         raise
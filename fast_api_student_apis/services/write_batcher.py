@@ -0,0 +1,141 @@
+"""Group commit for single-row student writes (opt-in with WRITE_BATCH_ENABLED).
+
+Concurrent create/update/delete calls are collected for up to
+``write_batch_max_delay_ms`` (or until ``write_batch_max_size`` writes are
+waiting) and applied in a single transaction, so a burst of N writes pays
+for one COMMIT and one WAL flush instead of N.
+
+Durability contract:
+
+* ``submit()`` returns only after the batch's COMMIT has succeeded, so an
+  acknowledged write is exactly as durable as an unbatched one under the
+  server's synchronous_commit setting. Nothing is acknowledged early.
+* Each write runs in its own savepoint: a write that fails (a duplicate
+  email, say) raises in its own caller and does not affect the others.
+* If the COMMIT itself fails, every write in the batch raises that error
+  and none of them were applied, unless the connection dropped during
+  COMMIT, where the outcome is unknown exactly as it is without batching.
+* Writes in one batch share a transaction: their row locks are held until
+  the whole batch commits, and a write adds up to the max delay to latency.
+* A caller that gives up after ``write_batch_timeout`` seconds gets a
+  TimeoutError, and one that is cancelled while waiting gets nothing; in
+  neither case is its write withdrawn, and it may still be committed with
+  the rest of the batch.
+"""
+import asyncio
+import logging
+
+from config import settings
+from db.connection import get_async_connection
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncWriteBatcher:
+    def __init__(self, max_delay, max_size, timeout):
+        self.max_delay = max_delay
+        self.max_size = max_size
+        self.timeout = timeout
+        self._pending = []
+        self._timer = None
+        self._flushing = set()
+        self._stats = {"batches": 0, "writes": 0, "failed_writes": 0, "failed_batches": 0, "max_batch": 0}
+
+    async def submit(self, statement, *args):
+        """Run ``await statement(cur, *args)`` in the next batch and return its result once committed."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((future, statement, args))
+        if len(self._pending) >= self.max_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._dispatch)
+        # Shield so a cancelled or timed-out caller cannot cancel the batch it has joined
+        return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._flush(batch))
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+
+    async def _flush(self, batch):
+        outcomes = []
+        try:
+            async with get_async_connection() as conn:
+                # Outer block is the batch transaction; each nested block is a savepoint
+                async with conn.transaction():
+                    async with conn.cursor() as cur:
+                        for future, statement, args in batch:
+                            try:
+                                async with conn.transaction():
+                                    outcomes.append((future, await statement(cur, *args), None))
+                            except Exception as e:
+                                outcomes.append((future, None, e))
+        except Exception as e:
+            logger.exception("Write batch of %s failed to commit", len(batch))
+            self._count(len(batch), len(batch), failed_batch=True)
+            for future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        failed = sum(1 for _, _, error in outcomes if error is not None)
+        self._count(len(batch), failed)
+        if len(batch) > 1:
+            logger.debug("Committed %s writes in one transaction (%s failed)", len(batch), failed)
+        for future, result, error in outcomes:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _count(self, size, failed, failed_batch=False):
+        self._stats["batches"] += 1
+        self._stats["writes"] += size
+        self._stats["failed_writes"] += failed
+        self._stats["failed_batches"] += int(failed_batch)
+        self._stats["max_batch"] = max(self._stats["max_batch"], size)
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats["avg_batch"] = round(stats["writes"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return {"enabled": True, "max_delay_ms": self.max_delay * 1000, "max_size": self.max_size, **stats}
+
+    async def close(self):
+        # Flush whatever is waiting and let in-flight batches commit
+        self._dispatch()
+        await asyncio.gather(*self._flushing, return_exceptions=True)
+
+
+_batcher = None
+
+
+def get_write_batcher():
+    """The process-wide batcher, or None when write batching is disabled."""
+    global _batcher
+    if not settings.write_batch_enabled:
+        return None
+    if _batcher is None:
+        _batcher = AsyncWriteBatcher(
+            settings.write_batch_max_delay_ms / 1000,
+            settings.write_batch_max_size,
+            settings.write_batch_timeout
+        )
+    return _batcher
+
+
+def get_write_batch_stats():
+    return _batcher.stats() if _batcher is not None else {"enabled": False}
+
+
+async def close_write_batcher():
+    global _batcher
+    if _batcher is not None:
+        batcher, _batcher = _batcher, None
+        await batcher.close()
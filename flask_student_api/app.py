@@ -1,11 +1,25 @@
 from flask import Flask, redirect, send_from_directory
 from flasgger import Swagger
 from flask_talisman import Talisman
+from werkzeug.exceptions import HTTPException
 from dotenv import load_dotenv
+import atexit
 import logging
 import os
 
+import repo_path  # before anything that imports student_common
 from controllers.student_controller import student_bp
+from json_provider import ORJSONProvider
+from logging_config import init_request_logging
+from metrics import init_metrics
+from db.connection import close_pool, get_pool_stats, get_replica_stats
+from db.profiler import init_profiler
+from db.replicas import init_replica_routing
+from services.cache import get_cache
+from services.export_jobs import shutdown_job_manager
+from services.write_batcher import get_write_batch_stats, shutdown_write_batcher
+from student_common.logging_config import setup_logging
+from student_common.queries import get_query_stats
 
 # Load environment variables from .env file
 load_dotenv()
@@ -16,6 +30,9 @@ app = Flask(__name__)
 # Load configuration from external file
 app.config.from_pyfile('config.py')
 
+# Serialize JSON responses with orjson
+app.json = ORJSONProvider(app)
+
 # Relaxed CSP to allow Swagger UI to load properly
 csp = {
     'default-src': [
@@ -37,11 +54,11 @@ csp = {
     ]
 }
 
-# Apply security headers with relaxed CSP
-Talisman(app, content_security_policy=csp)
+# Apply security headers with relaxed CSP; FORCE_HTTPS=False when nothing in front of the app terminates TLS
+Talisman(app, content_security_policy=csp, force_https=app.config['FORCE_HTTPS'])
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+# Structured JSON logging, written from a background thread
+setup_logging(app.config['LOG_LEVEL'], app.config['LOG_SAMPLE_RATE'])
 logger = logging.getLogger(__name__)
 logger.info("Starting the Flask application...")
 
@@ -77,6 +94,19 @@ swagger = Swagger(app, template=swagger_template, config=swagger_config)
 # Register Blueprints
 app.register_blueprint(student_bp, url_prefix='/api/students')
 
+# Request id and access line for every request; registered first so other hooks log with the id
+init_request_logging(app)
+
+# Request latency and per-request DB metrics, served in Prometheus format at /metrics
+init_metrics(app)
+
+# Opt-in query profiler; X-Query-Profile: 1 returns a request's statements in a response header
+init_profiler(app)
+
+# Read-replica routing: pins each request to one replica, or to the primary after a write
+# or with X-Read-Consistency: primary
+init_replica_routing(app)
+
 # Optional: Redirect root to Swagger UI
 @app.route('/')
 def redirect_to_swagger():
@@ -91,13 +121,52 @@ def favicon():
         mimetype='image/png'
     )
 
+# Connection pool statistics for sizing
+@app.route('/stats/pool')
+def pool_stats():
+    return get_pool_stats()
+
+# Per-statement timings from the query registry
+@app.route('/stats/queries')
+def query_stats():
+    return get_query_stats()
+
+# Student cache hit/miss/eviction counters
+@app.route('/stats/cache')
+def cache_stats():
+    return get_cache().stats()
+
+# Replica health, replication lag and balancing
+@app.route('/stats/replicas')
+def replica_stats():
+    return get_replica_stats()
+
+# Group-commit batch sizes and failures
+@app.route('/stats/writes')
+def write_stats():
+    return get_write_batch_stats()
+
+# Return pooled connections to the server on shutdown (atexit runs these last-registered first,
+# so queued writes are committed before the pool closes)
+atexit.register(close_pool, app)
+atexit.register(shutdown_job_manager)
+atexit.register(shutdown_write_batcher)
+
+# HTTP errors (BadRequest, unknown routes, ...) keep their status code and headers, with a JSON body
+@app.errorhandler(HTTPException)
+def handle_http_exception(e):
+    response = e.get_response()
+    response.data = app.json.dumps({'error': e.description})
+    response.content_type = 'application/json'
+    return response
+
 # Global error handler
 @app.errorhandler(Exception)
 def handle_exception(e):
     logger.exception("Unhandled exception occurred:")
     return {"error": str(e)}, 500
 
-# Run the app
+# Development server only; in production run: gunicorn -c gunicorn.conf.py app:app
 if __name__ == '__main__':
     debug_mode = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     app.run(debug=debug_mode)
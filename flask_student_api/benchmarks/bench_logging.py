@@ -0,0 +1,64 @@
+"""Per-request logging cost on the request thread, before and after structured logging.
+
+* ``before`` - ``logging.basicConfig`` at INFO with a synchronous StreamHandler;
+  a GET /api/students/{roll} logged three f-string INFO lines (service Start/End
+  and the controller's "Fetched ...").
+* ``after``  - ``setup_logging``: those lines are lazy DEBUG calls (filtered
+  before any formatting), plus one sampled access line handed to the
+  QueueListener thread.
+
+Output goes to /dev/null so only the logging machinery is measured. Run from
+``flask_student_api``:
+
+    python -m benchmarks.bench_logging --requests 200000
+"""
+import argparse
+import logging
+import os
+import time
+
+import repo_path  # before anything that imports student_common
+from student_common.logging_config import access_logger, setup_logging
+
+logger = logging.getLogger('services.student_service')
+
+
+def before_request(roll_number):
+    logger.info(f"Start: get_student_by_roll ({roll_number})")
+    logger.info(f"End: get_student_by_roll ({roll_number})")
+    logger.info(f"Fetched student with roll number {roll_number}")
+
+
+def after_request(roll_number):
+    logger.debug("Start: get_student_by_roll (%s)", roll_number)
+    logger.debug("End: get_student_by_roll (%s)", roll_number)
+    logger.debug("Fetched student with roll number %s", roll_number)
+    access_logger.info("%s %s %d", 'GET', f"/api/students/{roll_number}", 200,
+                       extra={'method': 'GET', 'status': 200, 'duration_ms': 1.234, 'sample': True})
+
+
+def measure(fn, requests):
+    start = time.perf_counter()
+    for roll_number in range(requests):
+        fn(roll_number)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--sample-rate', type=float, default=0.1)
+    args = parser.parse_args()
+
+    with open(os.devnull, 'w') as devnull:
+        logging.basicConfig(level=logging.INFO, stream=devnull,
+                            format="[%(asctime)s] %(levelname)s in %(module)s: %(message)s")
+        before = measure(before_request, args.requests)
+
+        listener = setup_logging('INFO', args.sample_rate, stream=devnull)
+        after = measure(after_request, args.requests)
+        listener.stop()
+
+    for name, seconds in (('before', before), ('after', after)):
+        print(f"{name:>6}: {seconds:.3f}s total, {seconds / args.requests * 1e6:.2f} us/request")
+    print(f"speedup: {before / after:.1f}x")
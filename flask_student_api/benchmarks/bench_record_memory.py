@@ -0,0 +1,70 @@
+"""Bytes per student held in memory, for each way of representing a result set.
+
+* ``dict``     - what the service holds today (psycopg ``dict_row`` rows).
+* ``dataclass`` - the previous ``Student`` dataclass, one ``__dict__`` per instance.
+* ``slots``    - the frozen, slotted ``models.student.Student``.
+* ``batch``    - the columnar ``student_common.records.StudentBatch``.
+
+Strings are freshly allocated for each representation and counted, so the
+figures are totals per record rather than container overhead alone. No
+database is needed. Run from ``flask_student_api``:
+
+    python -m benchmarks.bench_record_memory --rows 100000
+"""
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass
+
+import repo_path  # before anything that imports student_common
+from models.student import Student
+from student_common.records import StudentBatch
+
+COLUMNS = ('roll_number', 'first_name', 'last_name', 'age', 'email_address')
+
+
+@dataclass
+class LegacyStudent:
+    roll_number: int
+    first_name: str
+    last_name: str
+    age: int
+    email_address: str
+
+
+def iter_rows(count):
+    # Roll numbers start above the small-int cache so every int is a real allocation
+    for i in range(1000, count + 1000):
+        yield (i, f"First{i}", f"Last{i}", 18 + i % 10, f"student{i}@example.com")
+
+
+BUILDERS = {
+    'dict': lambda rows: [dict(zip(COLUMNS, row)) for row in rows],
+    'dataclass': lambda rows: [LegacyStudent(*row) for row in rows],
+    'slots': lambda rows: [Student(*row) for row in rows],
+    'batch': StudentBatch.from_rows
+}
+
+
+def measure(build, count):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build(iter_rows(count))
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del held
+    return size
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    baseline = None
+    for name, build in BUILDERS.items():
+        size = measure(build, args.rows)
+        baseline = baseline or size
+        print(f"{name:>9}: {size / args.rows:6.1f} bytes/record, {size / 1e6:6.1f} MB total "
+              f"({size / baseline:.0%} of dict)")
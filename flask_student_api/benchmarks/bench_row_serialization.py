@@ -0,0 +1,68 @@
+"""Per-row cost of turning DB rows into a JSON response body, before and after the fast path.
+
+* ``before`` - what GET /api/students used to do: ``Student(*row).__dict__`` per row,
+  then Flask's default ``json.dumps`` based provider.
+* ``after``  - dicts straight from the ``dict_row`` factory, serialized with the
+  orjson-backed ``ORJSONProvider``.
+
+No database is needed; rows are synthesized. Run from ``flask_student_api``:
+
+    python -m benchmarks.bench_row_serialization --rows 100000
+"""
+import argparse
+import json
+import time
+from dataclasses import dataclass
+
+import orjson
+
+COLUMNS = ['roll_number', 'first_name', 'last_name', 'age', 'email_address']
+
+
+@dataclass
+class Student:
+    # The record type as it was then; models.student.Student is now slotted and has no __dict__
+    roll_number: int
+    first_name: str
+    last_name: str
+    age: int
+    email_address: str
+
+
+def make_rows(count):
+    return [(i, f"First{i}", f"Last{i}", 18 + i % 10, f"student{i}@example.com") for i in range(1, count + 1)]
+
+
+def before(rows):
+    students = [Student(*row).__dict__ for row in rows]
+    return json.dumps(students).encode()
+
+
+def after(rows):
+    # psycopg's dict_row builds exactly these dicts while reading the result
+    students = [dict(zip(COLUMNS, row)) for row in rows]
+    return orjson.dumps(students)
+
+
+def measure(fn, rows, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best, len(body)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    results = {}
+    for name, fn in (('before', before), ('after', after)):
+        seconds, size = measure(fn, rows, args.repeat)
+        results[name] = seconds
+        print(f"{name:>6}: {seconds:.3f}s total, {seconds / args.rows * 1e6:.2f} us/row, {size / 1e6:.1f} MB body")
+    print(f"speedup: {results['before'] / results['after']:.1f}x")
@@ -10,5 +10,60 @@ DB_CONFIG = {
     'port': int(os.getenv('DB_PORT')),
     'dbname': os.getenv('DB_NAME'),
     'user': os.getenv('DB_USER'),
-    'password': os.getenv('DB_PASSWORD')
+    'password': os.getenv('DB_PASSWORD'),
+    # Connection pool sizing and lifetimes (seconds)
+    'pool_min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+    'pool_max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+    'pool_max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+    'pool_max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '3600')),
+    'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+    'pool_check': os.getenv('DB_POOL_CHECK', 'True').lower() == 'true',
+    # Behind PgBouncer in transaction mode server-side prepared statements must be disabled
+    'pgbouncer_compat': os.getenv('DB_PGBOUNCER_COMPAT', 'False').lower() == 'true'
 }
+
+# Read replicas (none by default): comma-separated libpq DSNs, e.g. "host=10.0.0.2,host=10.0.0.3 port=5433";
+# parameters a DSN leaves out come from DB_CONFIG. See student_common/replicas.py for routing and health checks.
+# Only primary reads refill the student cache: replica lag never leaves a stale record cached for CACHE_TTL
+DB_REPLICA_DSNS = [dsn.strip() for dsn in os.getenv('DB_REPLICA_DSNS', '').split(',') if dsn.strip()]
+# round_robin or least_connections
+DB_REPLICA_BALANCE = os.getenv('DB_REPLICA_BALANCE', 'round_robin').lower()
+# Eject replicas replaying more than this many ms behind the primary; 0 disables the lag check
+DB_REPLICA_MAX_LAG_MS = float(os.getenv('DB_REPLICA_MAX_LAG_MS', '1000'))
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', '5'))
+
+# Directory for exported files (xlsx/csv/parquet)
+EXPORT_DIR = os.getenv('EXPORT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exports'))
+
+# Background export jobs: concurrent exports, queued+running cap, finished jobs kept
+EXPORT_MAX_JOBS = int(os.getenv('EXPORT_MAX_JOBS', '2'))
+EXPORT_MAX_PENDING = int(os.getenv('EXPORT_MAX_PENDING', '10'))
+EXPORT_JOB_RETENTION = int(os.getenv('EXPORT_JOB_RETENTION', '50'))
+
+# Read-through cache for student lookups: memory, redis or none. memory is per process, so it
+# limits the server to one worker (see gunicorn.conf.py)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory').lower()
+CACHE_TTL = int(os.getenv('CACHE_TTL', '60'))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+# Query profiler (off by default): slow-query log, sampled EXPLAIN and the X-Query-Profile header
+QUERY_PROFILE_ENABLED = os.getenv('QUERY_PROFILE_ENABLED', 'False').lower() == 'true'
+QUERY_PROFILE_REDACT_PARAMS = os.getenv('QUERY_PROFILE_REDACT_PARAMS', 'True').lower() == 'true'
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_RATE', '0.05'))
+
+# Group commit for single-row writes (off by default): concurrent writes share one transaction
+# after waiting at most WRITE_BATCH_MAX_DELAY_MS; see services/write_batcher.py for the durability contract
+WRITE_BATCH_ENABLED = os.getenv('WRITE_BATCH_ENABLED', 'False').lower() == 'true'
+WRITE_BATCH_MAX_DELAY_MS = float(os.getenv('WRITE_BATCH_MAX_DELAY_MS', '2'))
+WRITE_BATCH_MAX_SIZE = int(os.getenv('WRITE_BATCH_MAX_SIZE', '64'))
+# Seconds a write waits for its batch to commit before the request fails (the write is not withdrawn)
+WRITE_BATCH_TIMEOUT = float(os.getenv('WRITE_BATCH_TIMEOUT', '30'))
+
+# Logging: level for the JSON log stream and the share of successful-request access lines kept
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '0.1'))
+
+# Redirect plain HTTP to HTTPS (behind a TLS-terminating proxy, gunicorn trusts its X-Forwarded-Proto)
+FORCE_HTTPS = os.getenv('FORCE_HTTPS', 'True').lower() == 'true'
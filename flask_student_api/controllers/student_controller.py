@@ -1,33 +1,105 @@
 import logging
-from flask import Blueprint, request, jsonify
+import os
+import orjson
+from flask import Blueprint, Response, request, jsonify, send_file, stream_with_context, url_for
 from flasgger import swag_from
+from psycopg.errors import UniqueViolation
 from werkzeug.exceptions import BadRequest, InternalServerError
 
 from services.student_service import (
     get_all_students,
+    stream_students,
     get_student_by_roll,
+    get_students_by_rolls,
+    get_student_version,
     create_student,
     update_student,
+    patch_student,
     delete_student,
-    export_students_to_excel
+    search_students,
+    DEFAULT_SEARCH_LIMIT,
+    MAX_BATCH_IDS,
+    MAX_SEARCH_LIMIT,
+    SEARCH_MODES
 )
+from models.student import validate_student_data
+from services.bulk_service import bulk_create_students, bulk_upsert_students
+from services.export_jobs import get_job_manager
+from services.export_service import export_students, iter_csv_export
+from student_common.bulk import UPSERT_KEYS, parse_bulk_payload
+from student_common.etag import (etag_in, http_date, listing_etag, not_modified_since, parse_student_etag,
+                                  split_version, student_etag)
+from student_common.export_jobs import ExportQueueFull
+from student_common.exports import EXPORT_FORMATS
+from student_common.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
-# Logger setup
 logger = logging.getLogger('student_api')
-logger.setLevel(logging.INFO)
-handler = logging.StreamHandler()
-formatter = logging.Formatter('[%(asctime)s] %(levelname)s in %(module)s: %(message)s')
-handler.setFormatter(formatter)
-logger.addHandler(handler)
 
 student_bp = Blueprint('student_bp', __name__)
 
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def _wants_ndjson():
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def _ndjson_lines(students):
+    for student in students:
+        yield orjson.dumps(student) + b'\n'
+
+
+def _is_not_modified(etag, last_modified=None):
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        return etag_in(if_none_match, etag)
+    return last_modified is not None and not_modified_since(request.headers.get('If-Modified-Since'), last_modified)
+
+
+def _with_validators(response, etag, last_modified=None):
+    response.headers['ETag'] = etag
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def _if_match_version(roll_number):
+    """updated_at named by the If-Match header; None without one (or for *), False if it names another version."""
+    if_match = request.headers.get('If-Match', '').strip()
+    if not if_match or if_match == '*':
+        return None
+    expected_updated_at = parse_student_etag(if_match.split(',')[0], roll_number)
+    return False if expected_updated_at is None else expected_updated_at
+
+
+def _json_array_chunks(students):
+    # Same body as the non-streamed listing, emitted one row at a time
+    yield b'['
+    for index, student in enumerate(students):
+        yield (b',' if index else b'') + orjson.dumps(student)
+    yield b']'
+
 @student_bp.route('/', methods=['GET'])
 @swag_from({
     'tags': ['Students'],
+    'parameters': [
+        {'name': 'limit', 'in': 'query', 'type': 'integer', 'required': False,
+         'description': f'Page size (1-{MAX_PAGE_SIZE}, default {DEFAULT_PAGE_SIZE})'},
+        {'name': 'after', 'in': 'query', 'type': 'string', 'required': False,
+         'description': 'Opaque cursor from the X-Next-Cursor header of the previous page'},
+        {'name': 'min_age', 'in': 'query', 'type': 'integer', 'required': False},
+        {'name': 'max_age', 'in': 'query', 'type': 'integer', 'required': False},
+        {'name': 'last_name', 'in': 'query', 'type': 'string', 'required': False,
+         'description': 'Last name prefix'},
+        {'name': 'stream', 'in': 'query', 'type': 'boolean', 'required': False,
+         'description': 'Stream every matching student (ignores limit/after); '
+                        'send Accept: application/x-ndjson for one JSON object per line'}
+    ],
+    'produces': ['application/json', NDJSON_MIMETYPE],
     'responses': {
         200: {
-            'description': 'List of all students',
+            'description': 'One page of students ordered by roll number; X-Next-Cursor is set when more pages exist',
             'schema': {
                 'type': 'array',
                 'items': {
@@ -40,18 +112,135 @@ student_bp = Blueprint('student_bp', __name__)
                     }
                 }
             }
-        }
+        },
+        304: {'description': 'Not modified (If-None-Match)'},
+        400: {'description': 'Invalid paging or filter parameters'}
     }
 })
 def get_students():
     try:
-        students = get_all_students()
-        logger.info("Fetched all students")
-        return jsonify(students)
+        if request.args.get('stream', '').lower() == 'true' or _wants_ndjson():
+            students = stream_students(
+                min_age=request.args.get('min_age', type=int),
+                max_age=request.args.get('max_age', type=int),
+                last_name_prefix=request.args.get('last_name')
+            )
+            logger.info("Streaming all students")
+            if _wants_ndjson():
+                return Response(stream_with_context(_ndjson_lines(students)), mimetype=NDJSON_MIMETYPE)
+            return Response(stream_with_context(_json_array_chunks(students)), mimetype='application/json')
+        limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise BadRequest(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        filters = {
+            'after': request.args.get('after'),
+            'min_age': request.args.get('min_age', type=int),
+            'max_age': request.args.get('max_age', type=int),
+            'last_name_prefix': request.args.get('last_name')
+        }
+        # The ETag describes the rows served (cached or not); a deleted row has no timestamp, so no Last-Modified
+        students, next_cursor, version = get_all_students(limit=limit, **filters)
+        etag = listing_etag(version, limit, *filters.values())
+        if _is_not_modified(etag):
+            return _with_validators(Response(status=304), etag)
+        logger.debug("Fetched all students")
+        response = _with_validators(jsonify(students), etag)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
+    except BadRequest as e:
+        raise e
+    except ValueError as e:
+        raise BadRequest(str(e))
     except Exception:
         logger.exception("Error fetching students")
         raise InternalServerError("Internal server error")
 
+@student_bp.route('/batch-get', methods=['POST'])
+@swag_from({
+    'tags': ['Students'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'required': ['roll_numbers'],
+                'properties': {
+                    'roll_numbers': {'type': 'array', 'items': {'type': 'integer'}, 'maxItems': MAX_BATCH_IDS}
+                }
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Students in request order (null for misses) and the roll numbers not found',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'students': {'type': 'array', 'items': {'type': 'object'}},
+                    'missing': {'type': 'array', 'items': {'type': 'integer'}}
+                }
+            }
+        },
+        400: {'description': 'Invalid input'}
+    }
+})
+def batch_get_students():
+    data = request.get_json(silent=True) or {}
+    roll_numbers = data.get('roll_numbers')
+    if not isinstance(roll_numbers, list) or not all(isinstance(r, int) and not isinstance(r, bool) for r in roll_numbers):
+        raise BadRequest("roll_numbers must be a list of integers")
+    if len(roll_numbers) > MAX_BATCH_IDS:
+        raise BadRequest(f"At most {MAX_BATCH_IDS} roll numbers per request")
+    try:
+        students = [split_version(student)[0] if student else None
+                    for student in get_students_by_rolls(roll_numbers)]
+        missing = [roll for roll, student in zip(roll_numbers, students) if student is None]
+        logger.debug("Fetched %s of %s students by roll number", len(students) - len(missing), len(students))
+        return jsonify({'students': students, 'missing': missing})
+    except Exception:
+        logger.exception("Error batch fetching students")
+        raise InternalServerError("Internal server error")
+
+@student_bp.route('/search', methods=['GET'])
+@swag_from({
+    'tags': ['Students'],
+    'parameters': [
+        {'name': 'q', 'in': 'query', 'type': 'string', 'required': False,
+         'description': 'Name to search for (first name, last name or "first last")'},
+        {'name': 'mode', 'in': 'query', 'type': 'string', 'enum': list(SEARCH_MODES), 'required': False,
+         'description': 'prefix (default) matches the start of a name; fuzzy tolerates typos'},
+        {'name': 'email', 'in': 'query', 'type': 'string', 'required': False,
+         'description': 'Exact email address; use instead of q'},
+        {'name': 'limit', 'in': 'query', 'type': 'integer', 'required': False,
+         'description': f'Maximum results (1-{MAX_SEARCH_LIMIT}, default {DEFAULT_SEARCH_LIMIT})'}
+    ],
+    'responses': {
+        200: {
+            'description': 'Matching students, best match first',
+            'schema': {'type': 'array', 'items': {'type': 'object'}}
+        },
+        400: {'description': 'Invalid search parameters'}
+    }
+})
+def search():
+    try:
+        students = search_students(
+            query=request.args.get('q'),
+            email=request.args.get('email'),
+            mode=request.args.get('mode', 'prefix'),
+            limit=request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
+        )
+        logger.debug("Search returned %s students", len(students))
+        return jsonify(students)
+    except ValueError as e:
+        raise BadRequest(str(e))
+    except Exception:
+        logger.exception("Error searching students")
+        raise InternalServerError("Internal server error")
+
 @student_bp.route('/<int:roll_number>', methods=['GET'])
 @swag_from({
     'tags': ['Students'],
@@ -77,6 +266,7 @@ def get_students():
                 }
             }
         },
+        304: {'description': 'Not modified (If-None-Match / If-Modified-Since)'},
         404: {'description': 'Student not found'}
     }
 })
@@ -84,12 +274,17 @@ def get_student(roll_number):
     try:
         student = get_student_by_roll(roll_number)
         if student:
-            logger.info(f"Fetched student with roll number {roll_number}")
-            return jsonify(student)
-        logger.warning(f"Student with roll number {roll_number} not found")
+            # Validators come from the record being served, so a cached body never carries a newer ETag
+            body, updated_at = split_version(student)
+            etag = student_etag(roll_number, updated_at)
+            if _is_not_modified(etag, updated_at):
+                return _with_validators(Response(status=304), etag, updated_at)
+            logger.debug("Fetched student with roll number %s", roll_number)
+            return _with_validators(jsonify(body), etag, updated_at)
+        logger.warning("Student with roll number %s not found", roll_number)
         return jsonify({'error': 'Student not found'}), 404
     except Exception:
-        logger.exception(f"Error fetching student {roll_number}")
+        logger.exception("Error fetching student %s", roll_number)
         raise InternalServerError("Internal server error")
 
 @student_bp.route('/', methods=['POST'])
@@ -102,11 +297,12 @@ def get_student(roll_number):
             'required': True,
             'schema': {
                 'type': 'object',
-                'required': ['name', 'age', 'grade'],
+                'required': ['first_name', 'last_name', 'age', 'email_address'],
                 'properties': {
-                    'name': {'type': 'string'},
+                    'first_name': {'type': 'string'},
+                    'last_name': {'type': 'string'},
                     'age': {'type': 'integer'},
-                    'grade': {'type': 'string'}
+                    'email_address': {'type': 'string'}
                 }
             }
         }
@@ -122,24 +318,148 @@ def get_student(roll_number):
                 }
             }
         },
-        400: {'description': 'Invalid input'}
+        400: {'description': 'Invalid input'},
+        409: {'description': 'Email address already in use'}
     }
 })
 def add_student():
     try:
-        data = request.get_json()
-        if not data or not all(k in data for k in ('name', 'age', 'grade')):
+        data = request.get_json(silent=True)
+        errors = validate_student_data(data)
+        if errors:
             logger.warning("Invalid input data for student creation")
-            raise BadRequest("Missing required fields: name, age, grade")
+            return jsonify({'error': 'Invalid student data', 'errors': errors}), 400
         roll_number = create_student(data)
-        logger.info(f"Created student with roll number {roll_number}")
+        logger.info("Created student with roll number %s", roll_number)
         return jsonify({'message': 'Student created', 'roll_number': roll_number}), 201
     except BadRequest as e:
         raise e
+    except UniqueViolation:
+        logger.warning("Email address already in use")
+        return jsonify({'error': 'A student with this email address already exists'}), 409
     except Exception:
         logger.exception("Error creating student")
         raise InternalServerError("Internal server error")
 
+@student_bp.route('/bulk', methods=['POST'])
+@swag_from({
+    'tags': ['Students'],
+    'consumes': ['application/json', NDJSON_MIMETYPE, 'text/csv'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'description': 'JSON array, NDJSON or CSV (with header row) of students',
+            'schema': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'required': ['first_name', 'last_name', 'age', 'email_address'],
+                    'properties': {
+                        'first_name': {'type': 'string'},
+                        'last_name': {'type': 'string'},
+                        'age': {'type': 'integer'},
+                        'email_address': {'type': 'string'}
+                    }
+                }
+            }
+        }
+    ],
+    'responses': {
+        201: {
+            'description': 'Valid rows loaded; roll_numbers is aligned with the input (null for rejected rows)',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'inserted': {'type': 'integer'},
+                    'roll_numbers': {'type': 'array', 'items': {'type': 'integer'}},
+                    'errors': {'type': 'array', 'items': {'type': 'object'}}
+                }
+            }
+        },
+        400: {'description': 'Unparseable payload or no valid rows'},
+        409: {'description': 'A concurrent write claimed one of the email addresses; nothing was written'}
+    }
+})
+def add_students_bulk():
+    try:
+        rows = parse_bulk_payload(request.get_data(), request.mimetype)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise BadRequest(str(e))
+    try:
+        result = bulk_create_students(rows)
+        logger.info("Bulk created %s students (%s rejected)", result['inserted'], len(result['errors']))
+        return jsonify(result), 201 if result['inserted'] else 400
+    except UniqueViolation:
+        logger.warning("Bulk insert hit a concurrent email address change")
+        return jsonify({'error': 'An email address in the batch was taken concurrently; retry the batch'}), 409
+    except Exception:
+        logger.exception("Error bulk creating students")
+        raise InternalServerError("Internal server error")
+
+@student_bp.route('/bulk/upsert', methods=['POST'])
+@swag_from({
+    'tags': ['Students'],
+    'consumes': ['application/json', NDJSON_MIMETYPE, 'text/csv'],
+    'parameters': [
+        {'name': 'on', 'in': 'query', 'type': 'string', 'enum': list(UPSERT_KEYS), 'required': False,
+         'description': 'Conflict key (default email_address). With roll_number, rows without one are inserted'},
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'description': 'JSON array, NDJSON or CSV (with header row) of students',
+            'schema': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'required': ['first_name', 'last_name', 'age', 'email_address'],
+                    'properties': {
+                        'roll_number': {'type': 'integer'},
+                        'first_name': {'type': 'string'},
+                        'last_name': {'type': 'string'},
+                        'age': {'type': 'integer'},
+                        'email_address': {'type': 'string'}
+                    }
+                }
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'All rows merged in one transaction; results is aligned with the input',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'inserted': {'type': 'integer'},
+                    'updated': {'type': 'integer'},
+                    'unchanged': {'type': 'integer'},
+                    'rejected': {'type': 'integer'},
+                    'results': {'type': 'array', 'items': {'type': 'object'}}
+                }
+            }
+        },
+        400: {'description': 'Unparseable payload, unknown conflict key or no valid rows'},
+        409: {'description': 'A concurrent write claimed one of the email addresses; nothing was written'}
+    }
+})
+def upsert_students_bulk():
+    try:
+        rows = parse_bulk_payload(request.get_data(), request.mimetype)
+        result = bulk_upsert_students(rows, request.args.get('on', 'email_address'))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise BadRequest(str(e))
+    except UniqueViolation:
+        logger.warning("Bulk upsert hit a concurrent email address change")
+        return jsonify({'error': 'An email address in the batch was taken concurrently; retry the batch'}), 409
+    except Exception:
+        logger.exception("Error bulk upserting students")
+        raise InternalServerError("Internal server error")
+    logger.info("Bulk upserted %s students (%s inserted, %s updated, %s rejected)",
+                len(rows), result['inserted'], result['updated'], result['rejected'])
+    return jsonify(result), 400 if result['rejected'] == len(rows) else 200
+
 @student_bp.route('/<int:roll_number>', methods=['PUT'])
 @swag_from({
     'tags': ['Students'],
@@ -157,10 +477,12 @@ def add_student():
             'required': True,
             'schema': {
                 'type': 'object',
+                'required': ['first_name', 'last_name', 'age', 'email_address'],
                 'properties': {
-                    'name': {'type': 'string'},
+                    'first_name': {'type': 'string'},
+                    'last_name': {'type': 'string'},
                     'age': {'type': 'integer'},
-                    'grade': {'type': 'string'}
+                    'email_address': {'type': 'string'}
                 }
             }
         }
@@ -176,25 +498,100 @@ def add_student():
             }
         },
         404: {'description': 'Student not found'},
-        400: {'description': 'Invalid input'}
+        400: {'description': 'Invalid input'},
+        409: {'description': 'Email address already in use'},
+        412: {'description': 'If-Match ETag is stale'}
     }
 })
 def modify_student(roll_number):
     try:
-        data = request.get_json()
-        if not data:
-            logger.warning("No data provided for student to update")
-            raise BadRequest("No data provided")
-        updated = update_student(roll_number, data)
+        data = request.get_json(silent=True)
+        errors = validate_student_data(data)
+        if errors:
+            logger.warning("Invalid input data for student %s update", roll_number)
+            return jsonify({'error': 'Invalid student data', 'errors': errors}), 400
+        # If-Match: only update if the client's copy is current (optimistic concurrency)
+        expected_updated_at = _if_match_version(roll_number)
+        if expected_updated_at is False:
+            return jsonify({'error': 'If-Match does not match this student'}), 412
+        updated = update_student(roll_number, data, expected_updated_at)
         if updated:
-            logger.info(f"Updated student with roll number {roll_number}")
+            logger.info("Updated student with roll number %s", roll_number)
             return jsonify({'message': 'Student updated'})
-        logger.warning(f"Student with roll number {roll_number} not found for update")
+        if expected_updated_at is not None and get_student_version(roll_number) is not None:
+            logger.warning("Student with roll number %s changed since the If-Match version", roll_number)
+            return jsonify({'error': 'Student was modified by another request'}), 412
+        logger.warning("Student with roll number %s not found for update", roll_number)
         return jsonify({'error': 'Student not found'}), 404
     except BadRequest as e:
         raise e
+    except UniqueViolation:
+        logger.warning("Email address already in use")
+        return jsonify({'error': 'A student with this email address already exists'}), 409
     except Exception:
-        logger.exception(f"Error updating student {roll_number}")
+        logger.exception("Error updating student %s", roll_number)
+        raise InternalServerError("Internal server error")
+
+@student_bp.route('/<int:roll_number>', methods=['PATCH'])
+@swag_from({
+    'tags': ['Students'],
+    'parameters': [
+        {
+            'name': 'roll_number',
+            'in': 'path',
+            'type': 'integer',
+            'required': True,
+            'description': 'Roll number of the student to update'
+        },
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'description': 'Any subset of the fields; only these columns are written',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'first_name': {'type': 'string'},
+                    'last_name': {'type': 'string'},
+                    'age': {'type': 'integer'},
+                    'email_address': {'type': 'string'}
+                }
+            }
+        }
+    ],
+    'responses': {
+        200: {'description': 'Updated student, with its new ETag'},
+        400: {'description': 'Invalid input'},
+        404: {'description': 'Student not found'},
+        409: {'description': 'Email address already in use'},
+        412: {'description': 'If-Match ETag is stale'}
+    }
+})
+def patch_student_fields(roll_number):
+    try:
+        data = request.get_json(silent=True)
+        errors = validate_student_data(data, partial=True)
+        if errors:
+            logger.warning("Invalid input data for student %s patch", roll_number)
+            return jsonify({'error': 'Invalid student data', 'errors': errors}), 400
+        expected_updated_at = _if_match_version(roll_number)
+        if expected_updated_at is False:
+            return jsonify({'error': 'If-Match does not match this student'}), 412
+        student = patch_student(roll_number, data, expected_updated_at)
+        if student:
+            logger.info("Patched student with roll number %s", roll_number)
+            updated_at = student.pop('updated_at')
+            return _with_validators(jsonify(student), student_etag(roll_number, updated_at), updated_at)
+        if expected_updated_at is not None and get_student_version(roll_number) is not None:
+            logger.warning("Student with roll number %s changed since the If-Match version", roll_number)
+            return jsonify({'error': 'Student was modified by another request'}), 412
+        logger.warning("Student with roll number %s not found for patch", roll_number)
+        return jsonify({'error': 'Student not found'}), 404
+    except UniqueViolation:
+        logger.warning("Email address already in use")
+        return jsonify({'error': 'A student with this email address already exists'}), 409
+    except Exception:
+        logger.exception("Error patching student %s", roll_number)
         raise InternalServerError("Internal server error")
 
 @student_bp.route('/<int:roll_number>', methods=['DELETE'])
@@ -226,35 +623,143 @@ def remove_student(roll_number):
     try:
         deleted = delete_student(roll_number)
         if deleted:
-            logger.info(f"Deleted student with roll number {roll_number}")
+            logger.info("Deleted student with roll number %s", roll_number)
             return jsonify({'message': 'Student deleted'})
-        logger.warning(f"Student with roll number {roll_number} not found for deletion")
+        logger.warning("Student with roll number %s not found for deletion", roll_number)
         return jsonify({'error': 'Student not found'}), 404
     except Exception:
-        logger.exception(f"Error deleting student {roll_number}")
+        logger.exception("Error deleting student %s", roll_number)
         raise InternalServerError("Internal server error")
 
+def _queue_export_job(fmt, headers=None):
+    try:
+        job = get_job_manager().submit(fmt)
+    except ExportQueueFull as e:
+        logger.warning("Rejected export job: %s", e)
+        return jsonify({'error': 'Too many export jobs pending, retry later'}), 429
+    body = job.as_dict()
+    body['status_url'] = url_for('student_bp.get_export_job', job_id=job.id)
+    body['download_url'] = url_for('student_bp.download_export_job', job_id=job.id)
+    return jsonify(body), 202, {'Location': body['status_url'], **(headers or {})}
+
 @student_bp.route('/exportToExcel', methods=['GET'])
 @swag_from({
     'tags': ['Students'],
+    'deprecated': True,
+    'description': 'Deprecated: use POST /export/jobs?format=xlsx. Queues the same xlsx export job '
+                   'instead of building the file inside the request.',
     'responses': {
-        200: {
-            'description': 'Student data exported to Excel',
-            'schema': {
-                'type': 'object',
-                'properties': {
-                    'message': {'type': 'string'},
-                    'file_path': {'type': 'string'}
-                }
-            }
-        }
+        202: {'description': 'Export job queued; poll the status URL'},
+        429: {'description': 'Too many export jobs pending'}
     }
 })
 def export_to_excel():
+    logger.warning("Deprecated GET /exportToExcel called; queueing an xlsx export job")
+    return _queue_export_job('xlsx', {
+        'Deprecation': 'true',
+        'Link': f'<{url_for("student_bp.start_export_job")}>; rel="successor-version"'
+    })
+
+@student_bp.route('/export/download', methods=['GET'])
+@swag_from({
+    'tags': ['Students'],
+    'parameters': [
+        {
+            'name': 'format',
+            'in': 'query',
+            'type': 'string',
+            'enum': list(EXPORT_FORMATS),
+            'default': 'csv',
+            'description': 'Export format'
+        }
+    ],
+    'produces': list(EXPORT_FORMATS.values()),
+    'responses': {
+        200: {'description': 'Downloadable export of every student'},
+        400: {'description': 'Unsupported format'}
+    }
+})
+def download_export():
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        raise BadRequest(f"Unsupported format: {fmt}. Use one of {', '.join(EXPORT_FORMATS)}")
+    download_name = f"student_data.{fmt}"
     try:
-        file_path = export_students_to_excel()
-        logger.info(f"Exported student data to Excel at {file_path}")
-        return jsonify({"message": "Student data exported successfully", "file_path": file_path})
+        if fmt == 'csv':
+            # COPY output is relayed to the client as PostgreSQL produces it
+            response = Response(stream_with_context(iter_csv_export()), mimetype=EXPORT_FORMATS[fmt])
+            response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+            return response
+        file_path, stats = export_students(fmt)
+        logger.info("Exported student data to %s for download (%s rows)", fmt, stats.rows)
+        response = send_file(file_path, mimetype=EXPORT_FORMATS[fmt], as_attachment=True,
+                             download_name=download_name)
+        response.call_on_close(lambda: os.remove(file_path))
+        return response
     except Exception:
-        logger.exception("Error exporting student data to Excel")
+        logger.exception("Error exporting student data to %s", fmt)
         raise InternalServerError("Internal server error")
+
+@student_bp.route('/export/jobs', methods=['POST'])
+@swag_from({
+    'tags': ['Students'],
+    'parameters': [
+        {
+            'name': 'format',
+            'in': 'query',
+            'type': 'string',
+            'enum': list(EXPORT_FORMATS),
+            'default': 'xlsx',
+            'description': 'Export format'
+        }
+    ],
+    'responses': {
+        202: {'description': 'Export job queued; poll the status URL'},
+        400: {'description': 'Unsupported format'},
+        429: {'description': 'Too many export jobs pending'}
+    }
+})
+def start_export_job():
+    fmt = request.args.get('format', 'xlsx').lower()
+    if fmt not in EXPORT_FORMATS:
+        raise BadRequest(f"Unsupported format: {fmt}. Use one of {', '.join(EXPORT_FORMATS)}")
+    return _queue_export_job(fmt)
+
+@student_bp.route('/export/jobs/<job_id>', methods=['GET'])
+@swag_from({
+    'tags': ['Students'],
+    'parameters': [{'name': 'job_id', 'in': 'path', 'type': 'string', 'required': True}],
+    'responses': {
+        200: {'description': 'Job status, progress rows and ETA'},
+        404: {'description': 'Job not found'}
+    }
+})
+def get_export_job(job_id):
+    job = get_job_manager().get(job_id)
+    if not job:
+        return jsonify({'error': 'Export job not found'}), 404
+    return jsonify(job.as_dict())
+
+@student_bp.route('/export/jobs/<job_id>/download', methods=['GET'])
+@swag_from({
+    'tags': ['Students'],
+    'parameters': [{'name': 'job_id', 'in': 'path', 'type': 'string', 'required': True}],
+    'produces': list(EXPORT_FORMATS.values()),
+    'responses': {
+        200: {'description': 'Finished export artifact'},
+        404: {'description': 'Job not found'},
+        409: {'description': 'Job has not finished successfully'},
+        410: {'description': 'Export file already pruned'}
+    }
+})
+def download_export_job(job_id):
+    job = get_job_manager().get(job_id)
+    if not job:
+        return jsonify({'error': 'Export job not found'}), 404
+    if job.status != 'done':
+        return jsonify({'error': f'Export job is {job.status}'}), 409
+    if not os.path.exists(job.file_path):
+        # Pruned by the worker that ran it since the status was read
+        return jsonify({'error': 'Export file is no longer available'}), 410
+    return send_file(job.file_path, mimetype=EXPORT_FORMATS[job.format], as_attachment=True,
+                     download_name=f"student_data.{job.format}")
@@ -1,12 +1,173 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
 import psycopg
+from psycopg_pool import ConnectionPool
 from flask import current_app
 
-def get_connection():
-    config = current_app.config['DB_CONFIG']
-    return psycopg.connect(
-        host=config['host'],
-        port=config['port'],
-        dbname=config['dbname'],
-        user=config['user'],
-        password=config['password']
+from db.profiler import ProfilingCursor, profiling_enabled
+from student_common.instrumentation import InstrumentedCursor, configure_connection
+from student_common.replicas import ReplicaSet, replica_conninfo, stick_to_primary
+
+_pool_lock = threading.Lock()
+
+# Checkout latency counters (time spent waiting for a pooled connection)
+_checkout_stats = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+_stats_lock = threading.Lock()
+
+
+def _conninfo_kwargs(config):
+    return {
+        'host': config['host'],
+        'port': config['port'],
+        'dbname': config['dbname'],
+        'user': config['user'],
+        'password': config['password'],
+        # psycopg default of 5; None (PgBouncer mode) disables server-side prepared statements
+        'prepare_threshold': None if config['pgbouncer_compat'] else 5
+    }
+
+
+def _create_pool(config, kwargs=None, name='student_api'):
+    return ConnectionPool(
+        kwargs=kwargs or _conninfo_kwargs(config),
+        min_size=config['pool_min_size'],
+        max_size=config['pool_max_size'],
+        max_idle=config['pool_max_idle'],
+        max_lifetime=config['pool_max_lifetime'],
+        timeout=config['pool_timeout'],
+        check=ConnectionPool.check_connection if config['pool_check'] else None,
+        configure=configure_connection,
+        name=name,
+        open=True
     )
+
+
+def get_pool():
+    # One pool per Flask app, created lazily so forked workers each open their own
+    pool = current_app.extensions.get('db_pool')
+    if pool is None:
+        with _pool_lock:
+            pool = current_app.extensions.get('db_pool')
+            if pool is None:
+                pool = _create_pool(current_app.config['DB_CONFIG'])
+                current_app.extensions['db_pool'] = pool
+    return pool
+
+
+def get_replica_set():
+    """The worker's ReplicaSet, or None when DB_REPLICA_DSNS is empty."""
+    if not current_app.config['DB_REPLICA_DSNS']:
+        return None
+    replicas = current_app.extensions.get('db_replicas')
+    if replicas is None:
+        with _pool_lock:
+            replicas = current_app.extensions.get('db_replicas')
+            if replicas is None:
+                config = current_app.config
+                replicas = ReplicaSet(
+                    replica_conninfo(config['DB_REPLICA_DSNS'], _conninfo_kwargs(config['DB_CONFIG'])),
+                    balance=config['DB_REPLICA_BALANCE'],
+                    max_lag_ms=config['DB_REPLICA_MAX_LAG_MS'],
+                    check_interval=config['DB_REPLICA_CHECK_INTERVAL']
+                )
+                current_app.extensions['db_replica_pools'] = {}
+                current_app.extensions['db_replicas'] = replicas
+    return replicas
+
+
+def _get_replica_pool(replica):
+    pools = current_app.extensions['db_replica_pools']
+    pool = pools.get(replica.name)
+    if pool is None:
+        with _pool_lock:
+            pool = pools.get(replica.name)
+            if pool is None:
+                pool = _create_pool(current_app.config['DB_CONFIG'], replica.kwargs, f'student_api_{replica.name}')
+                pools[replica.name] = pool
+    return pool
+
+
+def close_pool(app):
+    replicas = app.extensions.pop('db_replicas', None)
+    if replicas is not None:
+        replicas.close()
+    for pool in app.extensions.pop('db_replica_pools', {}).values():
+        pool.close()
+    pool = app.extensions.pop('db_pool', None)
+    if pool is not None:
+        pool.close()
+
+
+def _record_checkout(elapsed_ms):
+    with _stats_lock:
+        _checkout_stats['count'] += 1
+        _checkout_stats['total_ms'] += elapsed_ms
+        _checkout_stats['max_ms'] = max(_checkout_stats['max_ms'], elapsed_ms)
+
+
+@contextmanager
+def get_connection(read_only=False):
+    # Borrow a connection from the shared pool; it is returned (not closed) on exit.
+    # read_only connections may come from a replica (see db/replicas.py)
+    replicas = get_replica_set()
+    replica = replicas.choose() if read_only and replicas is not None else None
+    if replica is not None:
+        pool = _get_replica_pool(replica)
+    else:
+        pool = get_pool()
+        if not read_only:
+            stick_to_primary()
+    start = time.perf_counter()
+    conn = None
+    try:
+        with replicas.track(replica) if replica is not None else nullcontext(), pool.connection() as conn:
+            _record_checkout((time.perf_counter() - start) * 1000)
+            if not profiling_enabled():
+                yield conn
+                return
+            conn.cursor_factory = ProfilingCursor
+            try:
+                yield conn
+            finally:
+                conn.cursor_factory = InstrumentedCursor
+    except psycopg.OperationalError as e:
+        # A checkout that failed or a dropped connection takes the replica out until its next good check
+        if replica is not None and (conn is None or conn.broken):
+            replicas.eject(replica, str(e))
+        raise
+
+
+def get_pool_stats():
+    stats = get_pool().get_stats()
+    with _stats_lock:
+        checkouts = dict(_checkout_stats)
+    return {
+        'pool_min': stats.get('pool_min', 0),
+        'pool_max': stats.get('pool_max', 0),
+        'pool_size': stats.get('pool_size', 0),
+        'in_use': stats.get('pool_size', 0) - stats.get('pool_available', 0),
+        'available': stats.get('pool_available', 0),
+        'waiting': stats.get('requests_waiting', 0),
+        'requests_errors': stats.get('requests_errors', 0),
+        'connections_lost': stats.get('connections_lost', 0),
+        'checkouts': checkouts['count'],
+        'checkout_avg_ms': round(checkouts['total_ms'] / checkouts['count'], 3) if checkouts['count'] else 0.0,
+        'checkout_max_ms': round(checkouts['max_ms'], 3)
+    }
+
+
+def get_replica_stats():
+    replicas = get_replica_set()
+    if replicas is None:
+        return {'enabled': False}
+    stats = replicas.stats()
+    pools = current_app.extensions.get('db_replica_pools', {})
+    for replica in stats['replicas']:
+        pool = pools.get(replica['name'])
+        if pool is not None:
+            pool_stats = pool.get_stats()
+            replica['pool_size'] = pool_stats.get('pool_size', 0)
+            replica['waiting'] = pool_stats.get('requests_waiting', 0)
+    return {'enabled': True, **stats}
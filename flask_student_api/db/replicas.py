@@ -0,0 +1,19 @@
+"""Per-request replica routing state for the Flask app (see student_common.replicas)."""
+from flask import g, request
+
+from student_common.replicas import CONSISTENCY_HEADER, begin_request_route, end_request_route
+
+
+def _before_request():
+    primary = request.headers.get(CONSISTENCY_HEADER, '').lower() == 'primary'
+    g.db_route_token = begin_request_route(primary)
+
+
+def _teardown_request(exc):
+    if 'db_route_token' in g:
+        end_request_route(g.pop('db_route_token'))
+
+
+def init_replica_routing(app):
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
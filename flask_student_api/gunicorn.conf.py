@@ -0,0 +1,87 @@
+"""Production server settings for the Flask app.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Every setting can be overridden from the environment. Each worker is a
+process with GUNICORN_THREADS request threads and its own connection pool,
+sized so that every thread can hold a connection at once: with W workers and
+T threads PostgreSQL sees up to W * T connections (DB_CONNECTION_BUDGET caps
+that total). An explicit DB_POOL_MAX_SIZE in the environment wins.
+
+CACHE_BACKEND=memory keeps a separate cache in every worker, and a write
+through one worker would leave the others serving the old student. It
+therefore runs a single worker by default and refuses to start with more;
+use CACHE_BACKEND=redis (or none) to scale out. Export jobs are shared
+through PostgreSQL and work with any number of workers.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+_per_process_cache = os.getenv('CACHE_BACKEND', 'memory').lower() == 'memory'
+
+# Sync code that mostly waits on PostgreSQL: (2 x cores) + 1 processes, a few threads each
+workers = int(os.getenv('WEB_CONCURRENCY', 1 if _per_process_cache else multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Import the app once in the master; workers fork with the code already loaded
+preload_app = True
+
+# Reuse client connections behind a load balancer; keep this above the balancer's idle timeout
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+# Time a worker gets to finish in-flight requests after SIGTERM before it is killed
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+# Recycle workers now and then so slow leaks cannot accumulate
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '10000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '1000'))
+
+accesslog = None  # the app writes its own structured access lines
+errorlog = '-'
+
+# Per-worker pool sizing, applied before the app (and config.py) is imported
+_pool_max = threads
+_budget = int(os.getenv('DB_CONNECTION_BUDGET', '0'))
+if _budget:
+    _pool_max = max(1, min(_pool_max, _budget // workers))
+os.environ.setdefault('DB_POOL_MAX_SIZE', str(_pool_max))
+os.environ.setdefault('DB_POOL_MIN_SIZE', str(min(2, _pool_max)))
+
+
+def on_starting(server):
+    # server.cfg also reflects a --workers given on the command line
+    if server.cfg.workers > 1 and _per_process_cache:
+        raise RuntimeError(f"CACHE_BACKEND=memory cannot be shared by {server.cfg.workers} workers: "
+                           "set CACHE_BACKEND=redis (or none), or WEB_CONCURRENCY=1")
+
+
+def when_ready(server):
+    server.log.info("%d workers x %d threads, pool max %s per worker",
+                    workers, threads, os.environ['DB_POOL_MAX_SIZE'])
+
+
+def post_fork(server, worker):
+    # Threads do not survive fork: restart the log listener in every worker
+    from app import app
+    from student_common.logging_config import setup_logging
+    setup_logging(app.config['LOG_LEVEL'], app.config['LOG_SAMPLE_RATE'])
+
+
+def worker_exit(server, worker):
+    # Runs after the worker has stopped accepting and finished its requests
+    from app import app
+    from db.connection import close_pool
+    from services.export_jobs import shutdown_job_manager
+    from services.write_batcher import shutdown_write_batcher
+    shutdown_job_manager()
+    # Commit any queued writes while the pool is still open
+    shutdown_write_batcher()
+    close_pool(app)
+
+
+def child_exit(server, worker):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
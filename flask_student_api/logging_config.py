@@ -0,0 +1,44 @@
+"""Per-request log tagging and access lines for the Flask app (see student_common.logging_config)."""
+import logging
+import time
+import uuid
+
+from flask import g, request
+
+from student_common.logging_config import REQUEST_ID_HEADER, access_logger, request_id_var, route_var
+
+
+def _before_request():
+    g.log_start = time.perf_counter()
+    g.request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+    g.log_tokens = (request_id_var.set(g.request_id),
+                    route_var.set(request.url_rule.rule if request.url_rule is not None else None))
+
+
+def _after_request(response):
+    # Unset when an earlier before_request hook answered (Talisman's HTTPS redirect)
+    request_id = g.get('request_id') or request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+    response.headers[REQUEST_ID_HEADER] = request_id
+    if access_logger.isEnabledFor(logging.INFO):
+        status = response.status_code
+        start = g.get('log_start')
+        access_logger.log(logging.WARNING if status >= 500 else logging.INFO,
+                          "%s %s %d", request.method, request.path, status,
+                          extra={'method': request.method, 'status': status,
+                                 'duration_ms': round((time.perf_counter() - start) * 1000, 3) if start else None,
+                                 'sample': status < 400})
+    return response
+
+
+def _teardown_request(exc):
+    if 'log_tokens' in g:
+        request_token, route_token = g.pop('log_tokens')
+        route_var.reset(route_token)
+        request_id_var.reset(request_token)
+
+
+def init_request_logging(app):
+    """Tag log records with a per-request id (echoed in X-Request-ID) and emit one access line per request."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
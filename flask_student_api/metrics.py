@@ -0,0 +1,81 @@
+import os
+import time
+
+from flask import Response, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+from student_common.instrumentation import begin_request_stats, end_request_stats
+
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'HTTP request latency', ['method', 'route'],
+                            buckets=(.005, .01, .025, .05, .075, .1, .25, .5, .75, 1, 2.5, 5, 10))
+REQUESTS = Counter('http_requests_total', 'HTTP responses by status', ['method', 'route', 'status'])
+IN_PROGRESS = Gauge('http_requests_in_progress', 'HTTP requests currently being handled', ['method'],
+                    multiprocess_mode='livesum')
+REQUEST_DB_QUERIES = Histogram('http_request_db_queries', 'SQL statements per request', ['route'],
+                               buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+REQUEST_DB_ROWS = Histogram('http_request_db_rows', 'Rows returned by PostgreSQL per request', ['route'],
+                            buckets=(0, 1, 10, 100, 1000, 10000, 100000))
+REQUEST_DB_SECONDS = Histogram('http_request_db_seconds', 'Database time per request', ['route'],
+                               buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5))
+
+
+def _route():
+    # The URL rule keeps label cardinality bounded (/api/students/<int:roll_number>, not /api/students/42)
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.db_stats, g.db_stats_token = begin_request_stats()
+    IN_PROGRESS.labels(request.method).inc()
+
+
+def server_timing(db_stats, elapsed):
+    # Lets clients and benchmarks split latency into database and application time
+    return f'db;dur={db_stats.seconds * 1000:.3f};desc="{db_stats.queries} queries", app;dur={elapsed * 1000:.3f}'
+
+
+def _after_request(response):
+    route = _route()
+    REQUESTS.labels(request.method, route, str(response.status_code)).inc()
+    start = g.get('metrics_start')
+    if start is None:
+        # An earlier before_request hook answered (Talisman's HTTPS redirect), so ours never ran
+        return response
+    elapsed = time.perf_counter() - start
+    REQUEST_SECONDS.labels(request.method, route).observe(elapsed)
+    db_stats = g.db_stats
+    response.headers['Server-Timing'] = server_timing(db_stats, elapsed)
+    REQUEST_DB_QUERIES.labels(route).observe(db_stats.queries)
+    REQUEST_DB_ROWS.labels(route).observe(db_stats.rows)
+    REQUEST_DB_SECONDS.labels(route).observe(db_stats.seconds)
+    return response
+
+
+def _teardown_request(exc):
+    # Runs even when a before_request hook or the view failed
+    if 'db_stats_token' in g:
+        end_request_stats(g.pop('db_stats_token'))
+        IN_PROGRESS.labels(request.method).dec()
+
+
+def _registry():
+    # Under gunicorn each worker keeps its own metrics; with PROMETHEUS_MULTIPROC_DIR set they are merged here
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def metrics_endpoint():
+    return Response(generate_latest(_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """Record request latency, status counts, in-flight requests and per-request DB work; serve /metrics."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_endpoint)
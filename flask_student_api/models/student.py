@@ -1,7 +1,15 @@
 from dataclasses import dataclass
 
-@dataclass
+# Columns a client may write; PATCH builds its SET clause from this whitelist only
+UPDATABLE_FIELDS = ('first_name', 'last_name', 'age', 'email_address')
+
+# Column limits from the school.student table definition
+NAME_MAX_LENGTH = 50
+EMAIL_MAX_LENGTH = 100
+
+@dataclass(frozen=True, slots=True)
 class Student:
+    """Immutable student record; slots keep it compact when many are held in memory."""
     roll_number: int
     first_name: str
     last_name: str
@@ -10,3 +18,46 @@ class Student:
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} (Roll No: {self.roll_number})"
+
+    def to_dict(self):
+        return {
+            'roll_number': self.roll_number,
+            'first_name': self.first_name,
+            'last_name': self.last_name,
+            'age': self.age,
+            'email_address': self.email_address
+        }
+
+
+def validate_student_data(data, partial=False):
+    """Check a student payload (without roll_number) and return a list of error messages.
+
+    With ``partial`` (PATCH) only the fields present are checked, but at least
+    one updatable field is required. ``age`` given as a numeric string (e.g.
+    from CSV) is converted in place.
+    """
+    if not isinstance(data, dict):
+        return ['Expected an object']
+    if partial and not any(field in data for field in UPDATABLE_FIELDS):
+        return [f"Provide at least one of: {', '.join(UPDATABLE_FIELDS)}"]
+    errors = []
+    for field, max_length in (('first_name', NAME_MAX_LENGTH), ('last_name', NAME_MAX_LENGTH),
+                              ('email_address', EMAIL_MAX_LENGTH)):
+        if partial and field not in data:
+            continue
+        value = data.get(field)
+        if not isinstance(value, str) or not value.strip():
+            errors.append(f"{field}: required string")
+        elif len(value) > max_length:
+            errors.append(f"{field}: longer than {max_length} characters")
+    email = data.get('email_address')
+    if isinstance(email, str) and email.strip() and ('@' not in email or email.startswith('@') or email.endswith('@')):
+        errors.append("email_address: not a valid email address")
+    if partial and 'age' not in data:
+        return errors
+    age = data.get('age')
+    if isinstance(age, str) and age.strip().isdigit():
+        age = data['age'] = int(age)
+    if not isinstance(age, int) or isinstance(age, bool) or age < 0:
+        errors.append("age: required non-negative integer")
+    return errors
@@ -0,0 +1,13 @@
+"""Put the repository root on sys.path so the app can import student_common.
+
+Entry points (the app module, the in-app benchmarks) import this before any
+module that uses the shared code.
+"""
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if REPO_ROOT not in sys.path:
+    # Appended so the app's own top-level packages keep precedence
+    sys.path.append(REPO_ROOT)
@@ -0,0 +1,126 @@
+import logging
+
+from db.connection import get_connection
+from models.student import validate_student_data
+from services.cache import get_cache
+from student_common.bulk import (BULK_COLUMNS, BULK_COPY_SQL, UPSERT_COPY_SQL, UPSERT_KEYS, UPSERT_SQL,
+                                 UPSERT_STAGING_SQL, check_upsert_rows, reject_taken_emails, resolve_existing,
+                                 upsert_outcomes)
+from student_common.cache import student_key
+from student_common.queries import run
+
+logger = logging.getLogger(__name__)
+
+
+def validate_bulk_rows(rows, with_roll_number=False):
+    """Validate rows; returns (valid [(index, row)], errors).
+
+    With ``with_roll_number`` an optional ``roll_number`` is accepted too
+    (a numeric string, e.g. from CSV, is converted in place).
+    """
+    valid = []
+    errors = []
+    for index, row in enumerate(rows):
+        row_errors = validate_student_data(row)
+        if with_roll_number and isinstance(row, dict):
+            roll_number = row.get('roll_number')
+            if isinstance(roll_number, str):
+                roll_number = int(roll_number) if roll_number.strip().isdigit() else roll_number.strip() or None
+            if roll_number is not None and (not isinstance(roll_number, int) or isinstance(roll_number, bool)):
+                row_errors.append("roll_number: must be a positive integer")
+            else:
+                row['roll_number'] = roll_number
+        if row_errors:
+            errors.append({'index': index, 'errors': row_errors})
+        else:
+            valid.append((index, row))
+    return valid, errors
+
+
+def bulk_create_students(rows):
+    """Validate rows and load the valid ones with COPY in a single transaction.
+
+    Invalid rows, and rows whose email is taken or repeated in the batch, are
+    reported and skipped rather than aborting the batch. Returns
+    ``{'inserted', 'roll_numbers', 'errors'}`` where ``roll_numbers`` is aligned with
+    the input (None for rejected rows). A UniqueViolation means a concurrent
+    write took one of the emails and nothing was written.
+    """
+    logger.info("Start: bulk_create_students (%s rows)", len(rows))
+    valid, errors = validate_bulk_rows(rows)
+    roll_numbers = [None] * len(rows)
+    if valid:
+        try:
+            with get_connection() as conn:
+                with conn.cursor() as cur:
+                    run(cur, 'email_owners', ([row['email_address'] for _, row in valid],))
+                    valid = reject_taken_emails(valid, errors, dict(cur.fetchall()))
+                    if valid:
+                        # COPY cannot return generated keys, so reserve them from the sequence up front
+                        run(cur, 'reserve_roll_numbers', (len(valid),))
+                        reserved = [r[0] for r in cur.fetchall()]
+                        with cur.copy(BULK_COPY_SQL) as copy:
+                            for roll_number, (index, row) in zip(reserved, valid):
+                                copy.write_row((roll_number, *(row[c] for c in BULK_COLUMNS)))
+                                roll_numbers[index] = roll_number
+                conn.commit()
+            if valid:
+                get_cache().bump_generation()
+        except Exception:
+            logger.exception("Error in bulk_create_students")
+            raise
+    logger.info("End: bulk_create_students - inserted %s, rejected %s", len(valid), len(errors))
+    return {'inserted': len(valid), 'roll_numbers': roll_numbers, 'errors': errors}
+
+
+def bulk_upsert_students(rows, conflict_key='email_address'):
+    """Insert or update many students in one transaction, keyed on ``conflict_key``.
+
+    Rows are COPYed into a temporary staging table and merged with a single
+    INSERT ... ON CONFLICT DO UPDATE, then committed once. With
+    ``roll_number`` as the key, rows without one are inserted and rows with
+    one must name an existing student. Returns per-status counts and
+    ``results`` aligned with the input: inserted/updated/unchanged with the
+    roll number, or rejected with the reasons.
+    """
+    if conflict_key not in UPSERT_KEYS:
+        raise ValueError(f"on must be one of: {', '.join(UPSERT_KEYS)}")
+    logger.info("Start: bulk_upsert_students (%s rows, on %s)", len(rows), conflict_key)
+    valid, errors = validate_bulk_rows(rows, with_roll_number=conflict_key == 'roll_number')
+    candidates, results = check_upsert_rows(valid, errors, len(rows), conflict_key)
+    returned = {}
+    email_owners = {}
+    staged = []
+    if candidates:
+        try:
+            with get_connection() as conn:
+                with conn.cursor() as cur:
+                    run(cur, 'email_owners', ([row['email_address'] for _, row in candidates],))
+                    email_owners = dict(cur.fetchall())
+                    existing_rolls = set()
+                    given = [row['roll_number'] for _, row in candidates if row['roll_number'] is not None]
+                    if given:
+                        run(cur, 'existing_rolls', (given,))
+                        existing_rolls = {r[0] for r in cur.fetchall()}
+                    staged = resolve_existing(candidates, conflict_key, existing_rolls, email_owners, results)
+                    if staged:
+                        cur.execute(UPSERT_STAGING_SQL)
+                        with cur.copy(UPSERT_COPY_SQL) as copy:
+                            for _, row in staged:
+                                copy.write_row((row['roll_number'], *(row[c] for c in BULK_COLUMNS)))
+                        cur.execute(UPSERT_SQL[conflict_key])
+                        returned = {email: (roll_number, inserted) for roll_number, email, inserted in cur.fetchall()}
+                conn.commit()
+            updated = [student_key(roll_number) for roll_number, inserted in returned.values() if not inserted]
+            if updated:
+                # One multi-key delete rather than a round trip per student
+                get_cache().delete(*updated)
+            if returned:
+                get_cache().bump_generation()
+        except Exception:
+            logger.exception("Error in bulk_upsert_students")
+            raise
+    outcome = upsert_outcomes(staged, returned, email_owners, results)
+    logger.info("End: bulk_upsert_students - inserted %s, updated %s, unchanged %s, rejected %s",
+                outcome['inserted'], outcome['updated'], outcome['unchanged'], outcome['rejected'])
+    return outcome
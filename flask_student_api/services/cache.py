@@ -0,0 +1,21 @@
+from flask import current_app
+
+from student_common.cache import LRUCache, NullCache, RedisCache
+
+
+def create_cache(config):
+    backend = config['CACHE_BACKEND']
+    if backend == 'memory':
+        return LRUCache(config['CACHE_MAX_ENTRIES'], config['CACHE_TTL'])
+    if backend == 'redis':
+        import redis
+        return RedisCache(redis.Redis.from_url(config['REDIS_URL']), config['CACHE_TTL'])
+    return NullCache()
+
+
+def get_cache():
+    # Tests can install their own backend, e.g. app.extensions['student_cache'] = RedisCache(fakeredis.FakeRedis(), 60)
+    cache = current_app.extensions.get('student_cache')
+    if cache is None:
+        cache = current_app.extensions['student_cache'] = create_cache(current_app.config)
+    return cache
@@ -0,0 +1,38 @@
+import threading
+
+from flask import current_app
+
+from db.connection import get_connection
+from services.export_service import estimate_student_count, export_students
+from student_common.export_jobs import ExportJobManager, JobStore
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                config = current_app.config
+                _manager = ExportJobManager(
+                    lambda fmt, stats: export_students(fmt, stats=stats),
+                    estimate_student_count,
+                    max_workers=config['EXPORT_MAX_JOBS'],
+                    max_pending=config['EXPORT_MAX_PENDING'],
+                    retention=config['EXPORT_JOB_RETENTION'],
+                    # Jobs run on pool threads; the pool and config are reached through the app context
+                    context=current_app._get_current_object().app_context,
+                    # Job status lives in PostgreSQL so every gunicorn worker can answer for every job
+                    store=JobStore(get_connection)
+                )
+    return _manager
+
+
+def shutdown_job_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.shutdown()
+            _manager = None
@@ -0,0 +1,181 @@
+"""Group commit for single-row student writes (opt-in with WRITE_BATCH_ENABLED).
+
+Concurrent create/update/delete calls are queued for up to
+WRITE_BATCH_MAX_DELAY_MS (or until WRITE_BATCH_MAX_SIZE writes are waiting)
+and applied by one background thread in a single transaction, so a burst of
+N writes pays for one COMMIT and one WAL flush instead of N.
+
+Durability contract:
+
+* ``submit()`` returns only after the batch's COMMIT has succeeded, so an
+  acknowledged write is exactly as durable as an unbatched one under the
+  server's synchronous_commit setting. Nothing is acknowledged early.
+* Each write runs in its own savepoint: a write that fails (a duplicate
+  email, say) raises in its own caller and does not affect the others.
+* If the COMMIT itself fails, every write in the batch raises that error
+  and none of them were applied, unless the connection dropped during
+  COMMIT, where the outcome is unknown exactly as it is without batching.
+* Writes in one batch share a transaction: their row locks are held until
+  the whole batch commits, and a write adds up to the max delay to latency.
+* A caller that gives up after WRITE_BATCH_TIMEOUT seconds gets a
+  TimeoutError but does not withdraw its write; it may still be committed
+  with the rest of the batch.
+* Writes submitted after shutdown raise at once. Shutdown commits what is
+  queued; anything the thread could not take (it died) fails rather than
+  waiting forever.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from flask import current_app
+
+from db.connection import get_connection
+
+logger = logging.getLogger(__name__)
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+class WriteBatcher:
+    def __init__(self, app, max_delay, max_size, timeout):
+        self.app = app
+        self.max_delay = max_delay
+        self.max_size = max_size
+        self.timeout = timeout
+        self._queue = queue.SimpleQueue()
+        self._stats = {'batches': 0, 'writes': 0, 'failed_writes': 0, 'failed_batches': 0, 'max_batch': 0}
+        self._stats_lock = threading.Lock()
+        # Held while checking _closed and enqueueing, so no write can land behind the shutdown sentinel
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='write-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, statement, *args):
+        """Run ``statement(cur, *args)`` in the next batch and return its result once committed."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Write batcher is shut down")
+            self._queue.put((future, statement, args))
+        return future.result(timeout=self.timeout)
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_size:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if item is None:
+                # Shutdown: flush what we have, then stop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = self._collect(item)
+            with self.app.app_context():
+                self._flush(batch)
+
+    def _flush(self, batch):
+        outcomes = []
+        try:
+            with get_connection() as conn:
+                # Outer block is the batch transaction; each nested block is a savepoint
+                with conn.transaction():
+                    with conn.cursor() as cur:
+                        for future, statement, args in batch:
+                            try:
+                                with conn.transaction():
+                                    outcomes.append((future, statement(cur, *args), None))
+                            except Exception as e:
+                                outcomes.append((future, None, e))
+        except Exception as e:
+            logger.exception("Write batch of %s failed to commit", len(batch))
+            self._count(len(batch), len(batch), failed_batch=True)
+            for future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        failed = sum(1 for _, _, error in outcomes if error is not None)
+        self._count(len(batch), failed)
+        if len(batch) > 1:
+            logger.debug("Committed %s writes in one transaction (%s failed)", len(batch), failed)
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _count(self, size, failed, failed_batch=False):
+        with self._stats_lock:
+            self._stats['batches'] += 1
+            self._stats['writes'] += size
+            self._stats['failed_writes'] += failed
+            self._stats['failed_batches'] += int(failed_batch)
+            self._stats['max_batch'] = max(self._stats['max_batch'], size)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['avg_batch'] = round(stats['writes'] / stats['batches'], 2) if stats['batches'] else 0.0
+        return {'enabled': True, 'max_delay_ms': self.max_delay * 1000, 'max_size': self.max_size, **stats}
+
+    def shutdown(self):
+        # Queued writes are still committed before the thread exits
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+        # Whatever is left was never taken by the thread: fail it rather than leave its caller waiting
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and not item[0].done():
+                item[0].set_exception(RuntimeError("Write batcher is shut down"))
+
+
+def get_write_batcher():
+    """The process-wide batcher, or None when write batching is disabled."""
+    global _batcher
+    if not current_app.config['WRITE_BATCH_ENABLED']:
+        return None
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                config = current_app.config
+                _batcher = WriteBatcher(
+                    current_app._get_current_object(),
+                    max_delay=config['WRITE_BATCH_MAX_DELAY_MS'] / 1000,
+                    max_size=config['WRITE_BATCH_MAX_SIZE'],
+                    timeout=config['WRITE_BATCH_TIMEOUT']
+                )
+    return _batcher
+
+
+def get_write_batch_stats():
+    with _batcher_lock:
+        return _batcher.stats() if _batcher is not None else {'enabled': False}
+
+
+def shutdown_write_batcher():
+    global _batcher
+    with _batcher_lock:
+        if _batcher is not None:
+            _batcher.shutdown()
+            _batcher = None
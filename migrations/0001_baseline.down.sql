@@ -0,0 +1,7 @@
+-- Drops every student record along with the schema.
+
+DROP TABLE IF EXISTS school.student;
+DROP TABLE IF EXISTS school.table_version;
+DROP FUNCTION IF EXISTS school.touch_updated_at();
+DROP FUNCTION IF EXISTS school.bump_table_version();
+DROP SCHEMA IF EXISTS school;
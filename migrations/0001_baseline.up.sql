@@ -0,0 +1,52 @@
+-- Baseline: the school.student schema formerly created by CreateTable.py.
+-- Idempotent, so databases created by the old script upgrade cleanly.
+
+CREATE SCHEMA IF NOT EXISTS school;
+
+CREATE TABLE IF NOT EXISTS school.student (
+    roll_number SERIAL PRIMARY KEY,
+    first_name VARCHAR(50),
+    last_name VARCHAR(50),
+    age INTEGER,
+    email_address VARCHAR(100)
+);
+
+-- Row version for ETag / If-Match: updated_at is maintained by a trigger on every UPDATE
+ALTER TABLE school.student
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp();
+
+CREATE OR REPLACE FUNCTION school.touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS student_touch_updated_at ON school.student;
+CREATE TRIGGER student_touch_updated_at
+    BEFORE UPDATE ON school.student
+    FOR EACH ROW EXECUTE FUNCTION school.touch_updated_at();
+
+-- Table-wide version counter so list ETags can be checked with a one-row lookup
+CREATE TABLE IF NOT EXISTS school.table_version (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+);
+
+INSERT INTO school.table_version (table_name) VALUES ('student')
+ON CONFLICT (table_name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION school.bump_table_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE school.table_version
+    SET version = version + 1, updated_at = clock_timestamp()
+    WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS student_bump_version ON school.student;
+CREATE TRIGGER student_bump_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON school.student
+    FOR EACH STATEMENT EXECUTE FUNCTION school.bump_table_version();
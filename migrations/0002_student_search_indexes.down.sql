@@ -0,0 +1,7 @@
+-- migrate:no-transaction
+-- pg_trgm is left installed: other objects in the database may depend on it.
+
+DROP INDEX CONCURRENTLY IF EXISTS school.student_full_name_trgm_idx;
+DROP INDEX CONCURRENTLY IF EXISTS school.student_last_name_prefix_idx;
+DROP INDEX CONCURRENTLY IF EXISTS school.student_full_name_prefix_idx;
+DROP INDEX CONCURRENTLY IF EXISTS school.student_email_address_key;
@@ -0,0 +1,28 @@
+-- migrate:no-transaction
+-- Indexes behind GET /api/students/search.
+--
+-- Built CONCURRENTLY so a live table keeps taking writes, which is why this
+-- file runs outside a transaction, one statement at a time. A failed build
+-- leaves an INVALID index that IF NOT EXISTS would then skip: drop it by hand
+-- and run upgrade again.
+--
+-- The unique index fails if school.student already holds duplicate emails;
+-- find them with
+--   SELECT email_address, count(*) FROM school.student GROUP BY 1 HAVING count(*) > 1
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Exact email lookup, and one student per email address from now on
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS student_email_address_key
+    ON school.student (email_address);
+
+-- Prefix search: text_pattern_ops lets LIKE 'abc%' use a btree under any collation
+CREATE INDEX CONCURRENTLY IF NOT EXISTS student_full_name_prefix_idx
+    ON school.student ((lower(coalesce(first_name, '') || ' ' || coalesce(last_name, ''))) text_pattern_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS student_last_name_prefix_idx
+    ON school.student ((lower(last_name)) text_pattern_ops);
+
+-- Fuzzy search: trigram index serving the <% (word similarity) operator
+CREATE INDEX CONCURRENTLY IF NOT EXISTS student_full_name_trgm_idx
+    ON school.student USING gin ((lower(coalesce(first_name, '') || ' ' || coalesce(last_name, ''))) gin_trgm_ops);
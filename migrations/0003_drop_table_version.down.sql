@@ -0,0 +1,22 @@
+CREATE TABLE IF NOT EXISTS school.table_version (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+);
+
+INSERT INTO school.table_version (table_name) VALUES ('student')
+ON CONFLICT (table_name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION school.bump_table_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE school.table_version
+    SET version = version + 1, updated_at = clock_timestamp()
+    WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS student_bump_version ON school.student;
+CREATE TRIGGER student_bump_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON school.student
+    FOR EACH STATEMENT EXECUTE FUNCTION school.bump_table_version();
@@ -0,0 +1,7 @@
+-- Listing ETags are now derived from the rows of the page served, so the
+-- table-wide version counter is no longer read. Its statement trigger made
+-- every write to school.student update the same row, serializing writers.
+
+DROP TRIGGER IF EXISTS student_bump_version ON school.student;
+DROP FUNCTION IF EXISTS school.bump_table_version();
+DROP TABLE IF EXISTS school.table_version;
@@ -0,0 +1 @@
+DROP TABLE IF EXISTS school.export_job;
@@ -0,0 +1,10 @@
+-- Export job records, so any worker process can answer a job's status and
+-- download requests, not just the one running it. The running worker
+-- rewrites its row every few seconds; updated_at tells a live job from one
+-- whose worker has gone.
+
+CREATE TABLE IF NOT EXISTS school.export_job (
+    job_id VARCHAR(32) PRIMARY KEY,
+    record JSONB NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+);
@@ -0,0 +1,42 @@
+"""Apply or revert the schema migrations in this directory.
+
+    python -m migrations status
+    python -m migrations upgrade                 # everything pending
+    python -m migrations upgrade 2               # up to and including 0002
+    python -m migrations downgrade 1             # revert everything newer than 0001
+    python -m migrations --app fastapi upgrade   # connect via fast_api_student_apis/config.py
+
+Without --app the DB_* environment variables are read directly. Run from the
+repository root.
+"""
+import argparse
+import sys
+
+from migrations.runner import APP_DIRS, MigrationError, app_conninfo, downgrade, env_conninfo, status, upgrade
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m migrations", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=sorted(APP_DIRS),
+                        help="read connection settings from this app's config.py and .env")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status")
+    upgrade_parser = commands.add_parser("upgrade")
+    upgrade_parser.add_argument("target", type=int, nargs="?", help="highest version to apply (default: all)")
+    downgrade_parser = commands.add_parser("downgrade")
+    downgrade_parser.add_argument("target", type=int, help="version to return to (0 reverts everything)")
+    args = parser.parse_args()
+
+    conninfo = app_conninfo(args.app) if args.app else env_conninfo()
+    try:
+        if args.command == "upgrade":
+            upgrade(conninfo, args.target)
+        elif args.command == "downgrade":
+            downgrade(conninfo, args.target)
+        else:
+            for migration, applied_at, changed in status(conninfo):
+                state = f"applied {applied_at:%Y-%m-%d %H:%M:%S}" if applied_at else "pending"
+                print(f"{migration.label:<40} {state}{' (file changed since)' if changed else ''}")
+    except MigrationError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,223 @@
+"""Versioned schema migrations.
+
+Migrations are SQL files in this directory named ``NNNN_description.up.sql``,
+each with an optional ``NNNN_description.down.sql`` that reverts it. Applied
+versions are recorded in public.schema_migrations together with a checksum
+of the up file.
+
+A migration normally runs in one transaction with its version row, so it is
+applied completely or not at all. Files whose first line is
+``-- migrate:no-transaction`` run one statement at a time in autocommit
+instead, which CREATE/DROP INDEX CONCURRENTLY require. A failure part-way
+through such a file leaves the earlier statements applied, so write them to
+be re-runnable (IF NOT EXISTS / IF EXISTS). Their statements are split at
+lines ending in ";".
+"""
+import hashlib
+import importlib.util
+import os
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+import psycopg
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(MIGRATIONS_DIR)
+
+NO_TRANSACTION_MARKER = "-- migrate:no-transaction"
+FILE_PATTERN = re.compile(r"^(\d{4})_(\w+)\.(up|down)\.sql$")
+# Session advisory lock: a second runner waits instead of applying the same migration twice
+LOCK_ID = 4_830_221
+
+# App directories whose config.py can supply the connection settings
+APP_DIRS = {
+    "flask": "flask_student_api",
+    "fastapi": "fast_api_student_apis"
+}
+
+VERSION_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS public.schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        checksum TEXT NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+    )
+"""
+
+
+class MigrationError(Exception):
+    """Raised for an inconsistent set of migration files or a missing down migration."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    up_path: str
+    down_path: Optional[str] = None
+
+    @property
+    def label(self):
+        return f"{self.version:04d}_{self.name}"
+
+    def read(self, direction):
+        with open(self.up_path if direction == "up" else self.down_path) as f:
+            return f.read()
+
+    @property
+    def checksum(self):
+        return hashlib.sha256(self.read("up").encode()).hexdigest()
+
+
+def env_conninfo():
+    """Connection settings from the DB_* variables both apps read (defaults match the old CreateTable.py)."""
+    return {
+        "host": os.getenv("DB_HOST", "localhost"),
+        "port": int(os.getenv("DB_PORT", "5432")),
+        "dbname": os.getenv("DB_NAME", "employee"),
+        "user": os.getenv("DB_USER", "postgres"),
+        "password": os.getenv("DB_PASSWORD", "postgres")
+    }
+
+
+def app_conninfo(app):
+    """Connection settings from an app's own config.py, so its .env file applies too."""
+    app_dir = os.path.join(ROOT, APP_DIRS[app])
+    spec = importlib.util.spec_from_file_location(f"{app}_config", os.path.join(app_dir, "config.py"))
+    config = importlib.util.module_from_spec(spec)
+    cwd = os.getcwd()
+    # pydantic-settings resolves env_file=".env" against the working directory
+    os.chdir(app_dir)
+    try:
+        spec.loader.exec_module(config)
+    finally:
+        os.chdir(cwd)
+    if app == "flask":
+        return {key: config.DB_CONFIG[key] for key in ("host", "port", "dbname", "user", "password")}
+    settings = config.settings
+    return {
+        "host": settings.db_host,
+        "port": settings.db_port,
+        "dbname": settings.db_name,
+        "user": settings.db_user,
+        "password": settings.db_password
+    }
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """Return the migrations in ``directory`` ordered by version."""
+    files = {}
+    for filename in sorted(os.listdir(directory)):
+        match = FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        version, name, direction = int(match[1]), match[2], match[3]
+        entry = files.setdefault(version, {"name": name})
+        if entry["name"] != name:
+            raise MigrationError(f"Migration {version:04d} has files with different names")
+        entry[direction] = os.path.join(directory, filename)
+    migrations = []
+    for version, entry in sorted(files.items()):
+        if "up" not in entry:
+            raise MigrationError(f"Migration {version:04d} has no .up.sql file")
+        migrations.append(Migration(version, entry["name"], entry["up"], entry.get("down")))
+    return migrations
+
+
+def split_statements(sql):
+    statements = []
+    current = []
+    for line in sql.splitlines():
+        if line.lstrip().startswith("--"):
+            continue
+        current.append(line)
+        if line.rstrip().endswith(";"):
+            statements.append("\n".join(current).strip())
+            current = []
+    statements.append("\n".join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+@contextmanager
+def _connect(conninfo):
+    with psycopg.connect(**conninfo, autocommit=True) as conn:
+        conn.execute(VERSION_TABLE_SQL)
+        conn.execute("SELECT pg_advisory_lock(%s)", (LOCK_ID,))
+        try:
+            yield conn
+        finally:
+            conn.execute("SELECT pg_advisory_unlock(%s)", (LOCK_ID,))
+
+
+def _applied(conn):
+    rows = conn.execute("SELECT version, checksum, applied_at FROM public.schema_migrations").fetchall()
+    return {version: (checksum, applied_at) for version, checksum, applied_at in rows}
+
+
+def _run(conn, sql, record_sql, record_params):
+    if sql.startswith(NO_TRANSACTION_MARKER):
+        for statement in split_statements(sql):
+            conn.execute(statement)
+        conn.execute(record_sql, record_params)
+    else:
+        with conn.transaction():
+            # No parameters, so the whole file goes to the server as one multi-statement query
+            conn.execute(sql)
+            conn.execute(record_sql, record_params)
+
+
+def upgrade(conninfo, target=None, log=print):
+    """Apply every pending migration up to and including ``target`` (default: all); returns them."""
+    migrations = discover()
+    with _connect(conninfo) as conn:
+        applied = _applied(conn)
+        for migration in migrations:
+            if migration.version in applied and applied[migration.version][0] != migration.checksum:
+                log(f"Warning: {migration.label} changed after it was applied")
+        pending = [m for m in migrations
+                   if m.version not in applied and (target is None or m.version <= target)]
+        if not pending:
+            log("Schema is up to date")
+        for migration in pending:
+            log(f"Applying {migration.label}")
+            start = time.perf_counter()
+            _run(conn, migration.read("up"),
+                 "INSERT INTO public.schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                 (migration.version, migration.name, migration.checksum))
+            log(f"  done in {time.perf_counter() - start:.2f}s")
+        return pending
+
+
+def downgrade(conninfo, target, log=print):
+    """Revert applied migrations newer than ``target``, newest first (0 reverts everything)."""
+    by_version = {migration.version: migration for migration in discover()}
+    with _connect(conninfo) as conn:
+        versions = sorted((version for version in _applied(conn) if version > target), reverse=True)
+        # Check them all before touching the schema
+        for version in versions:
+            if version not in by_version or by_version[version].down_path is None:
+                raise MigrationError(f"Migration {version:04d} has no .down.sql file")
+        if not versions:
+            log(f"Nothing to revert above {target:04d}")
+        for version in versions:
+            migration = by_version[version]
+            log(f"Reverting {migration.label}")
+            start = time.perf_counter()
+            _run(conn, migration.read("down"), "DELETE FROM public.schema_migrations WHERE version = %s",
+                 (version,))
+            log(f"  done in {time.perf_counter() - start:.2f}s")
+        return [by_version[version] for version in versions]
+
+
+def status(conninfo):
+    """Return (migration, applied_at or None, changed) for every migration file."""
+    with _connect(conninfo) as conn:
+        applied = _applied(conn)
+    result = []
+    for migration in discover():
+        checksum, applied_at = applied.get(migration.version, (None, None))
+        result.append((migration, applied_at, checksum is not None and checksum != migration.checksum))
+    return result
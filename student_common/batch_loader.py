@@ -0,0 +1,73 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BatchLoader:
+    """DataLoader-style coalescing of concurrent single-key lookups.
+
+    Every ``load(key)`` issued during the same event-loop tick is collected and
+    resolved with one call to ``batch_fn(keys)``, which must return results in
+    the order of ``keys``. Concurrent loads of the same key share one result.
+
+    With ``partition``, a zero-argument callable evaluated in each caller's
+    context, only loads whose partition values are equal share a batch, and
+    ``batch_fn(keys, partition_value)`` is called once per partition. Batches
+    run in their own task, so anything caller-specific (such as where reads
+    are routed) must travel through the partition value.
+    """
+
+    def __init__(self, batch_fn, max_batch_size, partition=None):
+        self._batch_fn = batch_fn
+        self._max_batch_size = max_batch_size
+        self._partition = partition
+        self._pending = {}
+        self._dispatching = set()
+
+    async def load(self, key):
+        group = self._partition() if self._partition is not None else None
+        future = self._pending.get((group, key))
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._pending:
+                # First key of this tick: dispatch after the other ready callbacks have run
+                loop.call_soon(self._schedule_dispatch)
+            future = loop.create_future()
+            self._pending[group, key] = future
+        # Shield so one cancelled caller does not cancel the result shared with others
+        return await asyncio.shield(future)
+
+    def _schedule_dispatch(self):
+        pending, self._pending = self._pending, {}
+        groups = {}
+        for (group, key), future in pending.items():
+            groups.setdefault(group, {})[key] = future
+        for group, futures in groups.items():
+            keys = list(futures)
+            for start in range(0, len(keys), self._max_batch_size):
+                batch = {key: futures[key] for key in keys[start:start + self._max_batch_size]}
+                task = asyncio.ensure_future(self._dispatch(group, batch))
+                self._dispatching.add(task)
+                task.add_done_callback(self._dispatching.discard)
+
+    async def _dispatch(self, group, batch):
+        try:
+            if self._partition is not None:
+                results = await self._batch_fn(list(batch), group)
+            else:
+                results = await self._batch_fn(list(batch))
+        except BaseException as e:
+            # Cancellation (shutdown, a disconnect propagating) must not leave the coalesced callers waiting forever
+            error = e if isinstance(e, Exception) else RuntimeError("Batched lookup was cancelled")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(error)
+            if error is not e:
+                raise
+            return
+        if len(batch) > 1:
+            logger.debug("Coalesced %s lookups into one query", len(batch))
+        for future, result in zip(batch.values(), results):
+            if not future.done():
+                future.set_result(result)
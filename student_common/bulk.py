@@ -0,0 +1,170 @@
+"""Bulk insert/upsert pieces shared by both apps: payload parsing, SQL and per-row bookkeeping.
+
+Each app validates rows with its own models and runs the statements on its
+own (blocking or async) connection in ``services/bulk_service.py``.
+"""
+import csv
+import io
+import json
+
+MAX_BULK_ROWS = 100000
+BULK_COLUMNS = ("first_name", "last_name", "age", "email_address")
+UPSERT_KEYS = ("email_address", "roll_number")
+
+BULK_COPY_SQL = """
+    COPY school.student (roll_number, first_name, last_name, age, email_address)
+    FROM STDIN
+"""
+
+UPSERT_STAGING_SQL = """
+    CREATE TEMP TABLE student_upsert (
+        roll_number INTEGER,
+        first_name VARCHAR(50),
+        last_name VARCHAR(50),
+        age INTEGER,
+        email_address VARCHAR(100)
+    ) ON COMMIT DROP
+"""
+
+UPSERT_COPY_SQL = """
+    COPY student_upsert (roll_number, first_name, last_name, age, email_address)
+    FROM STDIN
+"""
+
+# xmax = 0 only on freshly inserted tuples, which tells inserts from updates.
+# DO UPDATE ... WHERE skips rows that would not change: no new tuple version,
+# no index churn, and updated_at (the ETag) stays put.
+UPSERT_SQL = {
+    "email_address": """
+        INSERT INTO school.student AS t (first_name, last_name, age, email_address)
+        SELECT first_name, last_name, age, email_address FROM student_upsert
+        ON CONFLICT (email_address) DO UPDATE
+        SET first_name = EXCLUDED.first_name, last_name = EXCLUDED.last_name, age = EXCLUDED.age
+        WHERE (t.first_name, t.last_name, t.age)
+            IS DISTINCT FROM (EXCLUDED.first_name, EXCLUDED.last_name, EXCLUDED.age)
+        RETURNING roll_number, email_address, xmax = 0 AS inserted
+    """,
+    "roll_number": """
+        INSERT INTO school.student AS t (roll_number, first_name, last_name, age, email_address)
+        SELECT coalesce(roll_number, nextval(pg_get_serial_sequence('school.student', 'roll_number'))),
+               first_name, last_name, age, email_address
+        FROM student_upsert
+        ON CONFLICT (roll_number) DO UPDATE
+        SET first_name = EXCLUDED.first_name, last_name = EXCLUDED.last_name, age = EXCLUDED.age,
+            email_address = EXCLUDED.email_address
+        WHERE (t.first_name, t.last_name, t.age, t.email_address)
+            IS DISTINCT FROM (EXCLUDED.first_name, EXCLUDED.last_name, EXCLUDED.age, EXCLUDED.email_address)
+        RETURNING roll_number, email_address, xmax = 0 AS inserted
+    """
+}
+
+
+def parse_bulk_payload(body, content_type):
+    """Decode a JSON array, NDJSON or CSV upload into a list of row dicts.
+
+    Raises ValueError when the payload itself cannot be parsed.
+    """
+    text = body.decode("utf-8-sig")
+    if content_type == "text/csv":
+        rows = list(csv.DictReader(io.StringIO(text)))
+    elif content_type == "application/x-ndjson":
+        try:
+            rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid NDJSON on line {e.lineno}: {e.msg}")
+    else:
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e.msg}")
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON array of students")
+    if len(rows) > MAX_BULK_ROWS:
+        raise ValueError(f"At most {MAX_BULK_ROWS} rows per request")
+    return rows
+
+
+def reject_taken_emails(valid, errors, email_owners):
+    """Move rows whose email belongs to a student, or repeats an earlier row, from valid to errors.
+
+    A single such row would abort the whole COPY with a unique violation, so
+    they are reported like validation errors instead. ``email_owners`` maps
+    the existing emails to their roll numbers. Returns the rows still valid;
+    ``errors`` is kept in input order.
+    """
+    kept = []
+    seen = {}
+    for index, row in valid:
+        email = row["email_address"]
+        owner = email_owners.get(email)
+        if owner is not None:
+            errors.append({"index": index, "errors": [f"email_address: already used by roll_number {owner}"]})
+        elif email in seen:
+            errors.append({"index": index, "errors": [f"email_address: duplicates row {seen[email]} of this batch"]})
+        else:
+            seen[email] = index
+            kept.append((index, row))
+    errors.sort(key=lambda error: error["index"])
+    return kept
+
+
+def check_upsert_rows(valid, errors, row_count, conflict_key):
+    """Drop in-batch duplicates of the keys from validated rows.
+
+    Returns (candidates [(index, row)], results) where results holds a
+    rejection for every row that did not make it into candidates.
+    """
+    results = [None] * row_count
+    for error in errors:
+        results[error["index"]] = {"status": "rejected", "errors": error["errors"]}
+    candidates = []
+    seen = {}
+    for index, row in valid:
+        row_errors = []
+        if conflict_key != "roll_number":
+            row["roll_number"] = None
+        elif row["roll_number"] is not None and row["roll_number"] < 1:
+            row_errors.append("roll_number: must be a positive integer")
+        # ON CONFLICT cannot touch the same row twice in one statement
+        for key in ("email_address", "roll_number"):
+            if row[key] is not None and (key, row[key]) in seen:
+                row_errors.append(f"{key}: duplicates row {seen[key, row[key]]} of this batch")
+        if row_errors:
+            results[index] = {"status": "rejected", "errors": row_errors}
+            continue
+        for key in ("email_address", "roll_number"):
+            seen[key, row[key]] = index
+        candidates.append((index, row))
+    return candidates, results
+
+
+def resolve_existing(candidates, conflict_key, existing_rolls, email_owners, results):
+    """Reject rows naming unknown roll numbers or another student's email; returns the rows to stage."""
+    staged = []
+    for index, row in candidates:
+        owner = email_owners.get(row["email_address"])
+        if conflict_key == "roll_number":
+            if row["roll_number"] is not None and row["roll_number"] not in existing_rolls:
+                results[index] = {"status": "rejected", "errors": ["roll_number: not found"]}
+                continue
+            if owner is not None and owner != row["roll_number"]:
+                results[index] = {"status": "rejected",
+                                  "errors": [f"email_address: already used by roll_number {owner}"]}
+                continue
+        staged.append((index, row))
+    return staged
+
+
+def upsert_outcomes(staged, returned, email_owners, results):
+    """Fill in the results of the staged rows from the upsert's RETURNING rows; returns per-status counts."""
+    for index, row in staged:
+        if row["email_address"] in returned:
+            roll_number, inserted = returned[row["email_address"]]
+            results[index] = {"status": "inserted" if inserted else "updated", "roll_number": roll_number}
+        else:
+            results[index] = {"status": "unchanged",
+                              "roll_number": row["roll_number"] or email_owners.get(row["email_address"])}
+    counts = {status: 0 for status in ("inserted", "updated", "unchanged", "rejected")}
+    for result in results:
+        counts[result["status"]] += 1
+    return {**counts, "results": results}
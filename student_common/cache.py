@@ -0,0 +1,223 @@
+"""Student cache backends shared by both apps.
+
+The Flask app uses the blocking backends directly. The FastAPI app awaits
+every cache call, so it wraps the in-process backends in ``AsyncCache`` and
+talks to Redis through ``AsyncRedisCache``. Which backend is used, and where
+the instance lives, is each app's ``services/cache.py``.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """In-process LRU cache with a per-entry TTL and a bound on the number of entries."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    self._stats["invalidations"] += 1
+
+    def generation(self):
+        return self._generation
+
+    def bump_generation(self):
+        # List pages are keyed by generation, so bumping it retires every cached page at once
+        with self._lock:
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            return {"backend": "memory", "entries": len(self._data), "max_entries": self.max_entries,
+                    "ttl": self.ttl, **self._stats}
+
+
+class NullCache:
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def generation(self):
+        return None
+
+    def bump_generation(self):
+        pass
+
+    def stats(self):
+        return {"backend": "none"}
+
+
+class _RedisStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "errors": 0, "invalidations": 0}
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    def stats(self):
+        with self._lock:
+            return {"backend": "redis", "ttl": self.ttl, "evictions": None, **self._stats}
+
+
+class RedisCache(_RedisStats):
+    """Cache backed by any Redis-compatible client (redis.Redis, fakeredis.FakeRedis, ...)."""
+
+    def __init__(self, client, ttl, prefix="student_api:"):
+        super().__init__()
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception:
+            # A cache outage degrades to database reads rather than failing requests
+            self._count("errors")
+            return None
+        self._count("hits" if raw is not None else "misses")
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value):
+        try:
+            self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+        except Exception:
+            self._count("errors")
+
+    def delete(self, *keys):
+        try:
+            self._count("invalidations", self.client.delete(*(self.prefix + key for key in keys)))
+        except Exception:
+            self._count("errors")
+
+    def generation(self):
+        try:
+            return int(self.client.get(self.prefix + "generation") or 0)
+        except Exception:
+            self._count("errors")
+            return None
+
+    def bump_generation(self):
+        try:
+            self.client.incr(self.prefix + "generation")
+        except Exception:
+            self._count("errors")
+
+
+class AsyncRedisCache(_RedisStats):
+    """Cache backed by an asyncio Redis-compatible client (redis.asyncio.Redis, fakeredis.FakeAsyncRedis, ...)."""
+
+    def __init__(self, client, ttl, prefix="student_api:"):
+        super().__init__()
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key):
+        try:
+            raw = await self.client.get(self.prefix + key)
+        except Exception:
+            # A cache outage degrades to database reads rather than failing requests
+            self._count("errors")
+            return None
+        self._count("hits" if raw is not None else "misses")
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key, value):
+        try:
+            await self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+        except Exception:
+            self._count("errors")
+
+    async def delete(self, *keys):
+        try:
+            self._count("invalidations", await self.client.delete(*(self.prefix + key for key in keys)))
+        except Exception:
+            self._count("errors")
+
+    async def generation(self):
+        try:
+            return int(await self.client.get(self.prefix + "generation") or 0)
+        except Exception:
+            self._count("errors")
+            return None
+
+    async def bump_generation(self):
+        try:
+            await self.client.incr(self.prefix + "generation")
+        except Exception:
+            self._count("errors")
+
+
+class AsyncCache:
+    """Awaitable facade over an in-process backend (LRUCache, NullCache); none of its calls block."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def get(self, key):
+        return self.backend.get(key)
+
+    async def set(self, key, value):
+        self.backend.set(key, value)
+
+    async def delete(self, *keys):
+        self.backend.delete(*keys)
+
+    async def generation(self):
+        return self.backend.generation()
+
+    async def bump_generation(self):
+        self.backend.bump_generation()
+
+    def stats(self):
+        return self.backend.stats()
+
+
+def student_key(roll_number):
+    return f"student:{roll_number}"
+
+
+def student_page_key(generation, *params):
+    return f"students:{generation}:" + ":".join("" if p is None else str(p) for p in params)
@@ -0,0 +1,87 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _to_micros(dt):
+    return (dt - EPOCH) // timedelta(microseconds=1)
+
+
+def student_etag(roll_number, updated_at):
+    # Strong validator derived from the row's updated_at (microsecond precision)
+    return f'"{roll_number}-{_to_micros(updated_at)}"'
+
+
+def listing_etag(version, *params):
+    # version comes from page_version(); the digest distinguishes pages/filters
+    digest = hashlib.sha1(repr(params).encode()).hexdigest()[:16]
+    return f'"v{version}-{digest}"'
+
+
+def page_version(rows, next_cursor):
+    """Digest of the rows on a listing page (roll_number, updated_at) and whether another page follows.
+
+    Any insert, update or delete that changes what the page shows changes
+    the digest, so the page's ETag is derived from the rows actually served.
+    """
+    digest = hashlib.sha1(repr(next_cursor).encode())
+    for row in rows:
+        digest.update(f"{row['roll_number']}-{_to_micros(row['updated_at'])};".encode())
+    return digest.hexdigest()[:16]
+
+
+def versioned_record(row):
+    """Make a student row carrying updated_at safe to cache (an ISO 8601 string survives JSON)."""
+    row["updated_at"] = row["updated_at"].isoformat()
+    return row
+
+
+def split_version(student):
+    """(response body, updated_at) for a record from versioned_record(); the record itself is left untouched."""
+    body = {key: value for key, value in student.items() if key != "updated_at"}
+    return body, datetime.fromisoformat(student["updated_at"])
+
+
+def parse_student_etag(etag, roll_number):
+    """Return the updated_at encoded in a student ETag, or None if it is not one for this roll number."""
+    etag = etag.strip()
+    if etag.startswith("W/"):
+        return None
+    try:
+        etag_roll, micros = etag.strip('"').split("-")
+        if int(etag_roll) != roll_number:
+            return None
+        return EPOCH + timedelta(microseconds=int(micros))
+    except ValueError:
+        return None
+
+
+def etag_in(header_value, etag, weak=True):
+    """True if ``etag`` is listed in an If-None-Match (weak comparison) or If-Match header."""
+    if not header_value:
+        return False
+    candidates = [c.strip() for c in header_value.split(",")]
+    if "*" in candidates:
+        return True
+    if weak:
+        candidates = [c[2:] if c.startswith("W/") else c for c in candidates]
+    return etag in candidates
+
+
+def not_modified_since(header_value, last_modified):
+    """True if ``last_modified`` is not newer than an If-Modified-Since date (second precision)."""
+    if not header_value:
+        return False
+    try:
+        since = parsedate_to_datetime(header_value)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def http_date(dt):
+    return format_datetime(dt.astimezone(timezone.utc), usegmt=True)
@@ -0,0 +1,247 @@
+"""Background export jobs shared by both apps; each app builds its manager in ``services/export_jobs.py``.
+
+A job runs in the worker process that accepted it. With a ``JobStore`` the
+manager also publishes each job's status to PostgreSQL, so whichever worker
+receives a status or download request can answer it. The artifact is read
+from EXPORT_DIR, so every worker must see the same directory: the local disk
+does for the workers of one server, several servers need shared storage.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from psycopg.types.json import Jsonb
+
+from student_common.exports import ExportStats
+from student_common.queries import run
+
+logger = logging.getLogger(__name__)
+
+# Seconds between status writes for unfinished jobs; one not rewritten for STALE_AFTER has lost its worker
+PUBLISH_INTERVAL = 2.0
+STALE_AFTER = 30.0
+# Seconds a published record outlives its job at most (records of pruned jobs are deleted sooner)
+RECORD_TTL = 86400
+
+
+class ExportQueueFull(Exception):
+    """Raised when too many export jobs are already queued or running."""
+
+
+class ExportJob:
+    def __init__(self, fmt):
+        self.id = uuid.uuid4().hex
+        self.format = fmt
+        self.status = "queued"
+        self.stats = ExportStats(fmt)
+        self.rows_total = None
+        self.file_path = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def as_dict(self):
+        rows_done = self.stats.rows
+        progress = None
+        eta_seconds = None
+        if self.status == "done":
+            progress = 1.0
+            eta_seconds = 0
+        elif self.status == "running" and self.rows_total:
+            progress = min(rows_done / self.rows_total, 1.0)
+            elapsed = time.perf_counter() - self.stats.started
+            if rows_done:
+                eta_seconds = round(max(self.rows_total - rows_done, 0) * elapsed / rows_done, 1)
+        return {
+            "job_id": self.id,
+            "format": self.format,
+            "status": self.status,
+            "rows_done": rows_done,
+            "rows_total": self.rows_total,
+            "progress": round(progress, 4) if progress is not None else None,
+            "eta_seconds": eta_seconds,
+            "error": self.error,
+            "stats": self.stats.as_dict() if self.status == "done" else None
+        }
+
+    def record(self):
+        """as_dict() plus what another worker needs to serve the download."""
+        return {**self.as_dict(), "file_path": self.file_path}
+
+
+class StoredJob:
+    """A job as last published by the worker running it (see JobStore)."""
+
+    def __init__(self, record, age):
+        self.id = record["job_id"]
+        self.format = record["format"]
+        self.status = record["status"]
+        self.error = record["error"]
+        self.file_path = record.get("file_path")
+        self._record = record
+        if not self.finished and age > STALE_AFTER:
+            # Its worker stopped publishing: it exited or was killed mid-export
+            self.status = "failed"
+            self.error = "Export worker stopped before the job finished"
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def as_dict(self):
+        body = {key: value for key, value in self._record.items() if key != "file_path"}
+        return {**body, "status": self.status, "error": self.error}
+
+
+class JobStore:
+    """Job records in school.export_job (migration 0004), visible to every worker.
+
+    ``connect`` is a zero-argument callable returning a connection context
+    manager on the primary, such as the app's ``get_connection``.
+    """
+
+    def __init__(self, connect):
+        self.connect = connect
+
+    def save(self, records):
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                for record in records:
+                    run(cur, "export_job_save", (record["job_id"], Jsonb(record)))
+            conn.commit()
+
+    def load(self, job_id):
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                run(cur, "export_job_load", (job_id,))
+                row = cur.fetchone()
+        return StoredJob(row[0], float(row[1])) if row else None
+
+    def delete(self, job_ids):
+        # Also drops records past RECORD_TTL, such as those of jobs whose worker went away
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                run(cur, "export_job_delete", (job_ids, RECORD_TTL))
+            conn.commit()
+
+
+class ExportJobManager:
+    """Runs exports on a small, bounded thread pool so they cannot starve CRUD traffic.
+
+    At most ``max_workers`` exports run at once (each holds one pooled DB connection)
+    and at most ``max_pending`` may be queued or running; further submissions are refused.
+
+    Both limits apply per worker process.
+
+    ``export(fmt, stats)`` writes the file and returns (file_path, stats),
+    ``estimate()`` returns the expected row count, and ``context()`` (for
+    example a Flask ``app.app_context``) is entered around every job and
+    every status write. With ``store`` (a JobStore) jobs run by other workers
+    can be looked up too.
+    """
+
+    def __init__(self, export, estimate, max_workers, max_pending, retention, context=nullcontext, store=None):
+        self.export = export
+        self.estimate = estimate
+        self.context = context
+        self.max_pending = max_pending
+        self.retention = retention
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        # Serializes status writes so an older snapshot never lands after a newer one
+        self._publish_lock = threading.Lock()
+        self._stop = threading.Event()
+        if store is not None:
+            threading.Thread(target=self._publish_unfinished, name="export-job-publisher", daemon=True).start()
+
+    def submit(self, fmt):
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if not job.finished)
+            if active >= self.max_pending:
+                raise ExportQueueFull(f"{active} export jobs already pending")
+            job = ExportJob(fmt)
+            self._jobs[job.id] = job
+            pruned = self._prune()
+        # Published before the id is handed out, so any worker can answer the first poll
+        self._publish([job])
+        self._forget(pruned)
+        self._executor.submit(self._run, job)
+        logger.info("Queued export job %s (%s)", job.id, fmt)
+        return job
+
+    def get(self, job_id):
+        """The job, whichever worker runs it; None if unknown. Other workers' jobs come from the store."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = self.store.load(job_id)
+        return job
+
+    def _run(self, job):
+        with self.context():
+            job.status = "running"
+            try:
+                job.rows_total = self.estimate()
+                job.stats.started = time.perf_counter()
+                job.file_path, _ = self.export(job.format, job.stats)
+                job.status = "done"
+                logger.info("Export job %s finished: %s", job.id, job.file_path)
+            except Exception as e:
+                logger.exception("Export job %s failed", job.id)
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.finished_at = time.time()
+                self._publish([job])
+
+    def _publish(self, jobs):
+        if self.store is None or not jobs:
+            return
+        try:
+            with self._publish_lock:
+                self.store.save([job.record() for job in jobs])
+        except Exception:
+            # Other workers see the previous status until the next write; the export itself carries on
+            logger.exception("Could not publish the status of %s export job(s)", len(jobs))
+
+    def _publish_unfinished(self):
+        # Heartbeat: keeps progress current for other workers and tells them this worker is alive
+        while not self._stop.wait(PUBLISH_INTERVAL):
+            with self._lock:
+                unfinished = [job for job in self._jobs.values() if not job.finished]
+            if unfinished:
+                with self.context():
+                    self._publish(unfinished)
+
+    def _forget(self, job_ids):
+        if self.store is None:
+            return
+        try:
+            self.store.delete(job_ids)
+        except Exception:
+            logger.exception("Could not delete export job records")
+
+    def _prune(self):
+        # Keep only the most recent finished jobs and delete their artifacts; returns the ids dropped
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished_at)
+        pruned = []
+        for job in finished[:max(len(finished) - self.retention, 0)]:
+            del self._jobs[job.id]
+            pruned.append(job.id)
+            if job.file_path and os.path.exists(job.file_path):
+                os.remove(job.file_path)
+        return pruned
+
+    def shutdown(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,163 @@
+import time
+from contextvars import ContextVar
+
+from prometheus_client import Counter, Histogram
+from psycopg import AsyncCursor, AsyncServerCursor, Cursor, ServerCursor
+
+DB_QUERY_SECONDS = Histogram("db_query_duration_seconds", "Time spent executing or fetching a statement",
+                             buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5))
+DB_ROWS = Counter("db_rows_returned_total", "Rows returned to the application by PostgreSQL")
+
+
+class RequestDBStats:
+    """Database work done on behalf of one HTTP request."""
+
+    __slots__ = ("queries", "rows", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self.seconds = 0.0
+
+
+_request_db_stats = ContextVar("request_db_stats", default=None)
+
+
+def begin_request_stats():
+    """Start collecting DB stats for the current request; returns (stats, reset token)."""
+    stats = RequestDBStats()
+    return stats, _request_db_stats.set(stats)
+
+
+def end_request_stats(token):
+    _request_db_stats.reset(token)
+
+
+def _record(elapsed, rows, statements=1):
+    DB_QUERY_SECONDS.observe(elapsed)
+    if rows:
+        DB_ROWS.inc(rows)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats.queries += statements
+        stats.rows += rows
+        stats.seconds += elapsed
+
+
+def _rows_returned(cur):
+    # rowcount is the affected-row count for DML without RETURNING; only result sets count
+    return cur.rowcount if cur.description is not None and cur.rowcount > 0 else 0
+
+
+class InstrumentedCursor(Cursor):
+    def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, params, **kwargs)
+        finally:
+            _record(time.perf_counter() - start, _rows_returned(self))
+
+    def executemany(self, query, params_seq, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, params_seq, **kwargs)
+        finally:
+            _record(time.perf_counter() - start, 0)
+
+
+class InstrumentedServerCursor(ServerCursor):
+    # Named cursors return rows on fetch, so fetch time and rows are recorded there
+
+    def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, params, **kwargs)
+        finally:
+            _record(time.perf_counter() - start, 0)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        _record(time.perf_counter() - start, 1 if row is not None else 0, statements=0)
+        return row
+
+    def fetchmany(self, size=0):
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        _record(time.perf_counter() - start, len(rows), statements=0)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        _record(time.perf_counter() - start, len(rows), statements=0)
+        return rows
+
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(self.itersize)
+            if not rows:
+                return
+            yield from rows
+
+
+class InstrumentedAsyncCursor(AsyncCursor):
+    async def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            _record(time.perf_counter() - start, _rows_returned(self))
+
+    async def executemany(self, query, params_seq, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().executemany(query, params_seq, **kwargs)
+        finally:
+            _record(time.perf_counter() - start, 0)
+
+
+class InstrumentedAsyncServerCursor(AsyncServerCursor):
+    async def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            _record(time.perf_counter() - start, 0)
+
+    async def fetchone(self):
+        start = time.perf_counter()
+        row = await super().fetchone()
+        _record(time.perf_counter() - start, 1 if row is not None else 0, statements=0)
+        return row
+
+    async def fetchmany(self, size=0):
+        start = time.perf_counter()
+        rows = await super().fetchmany(size)
+        _record(time.perf_counter() - start, len(rows), statements=0)
+        return rows
+
+    async def fetchall(self):
+        start = time.perf_counter()
+        rows = await super().fetchall()
+        _record(time.perf_counter() - start, len(rows), statements=0)
+        return rows
+
+    async def __aiter__(self):
+        while True:
+            rows = await self.fetchmany(self.itersize)
+            if not rows:
+                return
+            for row in rows:
+                yield row
+
+
+def configure_connection(conn):
+    """Pool ``configure`` callback: route every cursor through the instrumented classes."""
+    conn.cursor_factory = InstrumentedCursor
+    conn.server_cursor_factory = InstrumentedServerCursor
+
+
+async def configure_async_connection(conn):
+    conn.cursor_factory = InstrumentedAsyncCursor
+    conn.server_cursor_factory = InstrumentedAsyncServerCursor
@@ -0,0 +1,107 @@
+"""Structured JSON logging for the whole process.
+
+Records are rendered in the request thread (message args and tracebacks are
+resolved there, while they are still valid) and handed to a ``QueueHandler``;
+a ``QueueListener`` thread does the JSON encoding and the actual I/O. Every
+record carries the id of the request that emitted it and, where the app
+knows it, the matched route. Successful-request access lines are sampled at
+``LOG_SAMPLE_RATE``; warnings, errors and failed requests are always kept.
+
+Each app tags requests and writes the access line from its own hooks
+(``logging_config`` in the app directory); this module has no framework code.
+"""
+import atexit
+import copy
+import logging
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+request_id_var = ContextVar("request_id", default=None)
+route_var = ContextVar("route", default=None)
+
+access_logger = logging.getLogger("student_api.access")
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRS = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "request_id", "route", "sample"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            entry["request_id"] = request_id
+        route = getattr(record, "route", None)
+        if route is not None:
+            entry["route"] = route
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only ``rate`` of the records logged with ``extra={"sample": True}``."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return not getattr(record, "sample", False) or random.random() < self.rate
+
+
+class RequestQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Resolve everything that depends on the calling thread before the record is queued
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.request_id = request_id_var.get()
+        record.route = route_var.get()
+        return record
+
+
+def setup_logging(level="INFO", sample_rate=1.0, stream=None):
+    """Route all logging through a queue to a JSON stream handler; returns the started listener."""
+    log_queue = queue.SimpleQueue()
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter())
+    listener = QueueListener(log_queue, output, respect_handler_level=True)
+
+    handler = RequestQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(sample_rate))
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    listener.start()
+    atexit.register(_stop_listener, listener)
+    return listener
+
+
+def _stop_listener(listener):
+    # Flush what is still queued at exit; stop() may already have been called
+    if listener._thread is not None:
+        listener.stop()
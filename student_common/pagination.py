@@ -0,0 +1,49 @@
+import base64
+import binascii
+import json
+
+# Page size bounds for keyset-paginated listings
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(roll_number):
+    # Opaque next-page token: clients pass it back verbatim as ?after=
+    payload = json.dumps({"r": roll_number}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        roll_number = json.loads(base64.urlsafe_b64decode(padded.encode()))["r"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("Invalid page cursor")
+    if not isinstance(roll_number, int):
+        raise ValueError("Invalid page cursor")
+    return roll_number
+
+
+def escape_like(value):
+    # Escape LIKE wildcards so user input is matched literally
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def build_student_filters(after=None, min_age=None, max_age=None, last_name_prefix=None):
+    """Return (where_sql, params) for the keyset listing; where_sql may be empty."""
+    conditions = []
+    params = []
+    if after is not None:
+        conditions.append("roll_number > %s")
+        params.append(decode_cursor(after))
+    if min_age is not None:
+        conditions.append("age >= %s")
+        params.append(min_age)
+    if max_age is not None:
+        conditions.append("age <= %s")
+        params.append(max_age)
+    if last_name_prefix:
+        conditions.append("last_name LIKE %s")
+        params.append(escape_like(last_name_prefix) + "%")
+    where_sql = "WHERE " + " AND ".join(conditions) if conditions else ""
+    return where_sql, params
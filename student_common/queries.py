@@ -0,0 +1,155 @@
+"""Named SQL statements for the student service.
+
+Every statement is registered once here and executed through ``run()``, which
+asks psycopg to run it as a server-side prepared statement so PostgreSQL parses
+and plans it once per pooled connection instead of on every call. When the pool
+is configured for PgBouncer transaction mode (``prepare_threshold=None``)
+statements are sent unprepared. ``run()`` also keeps per-statement timings.
+"""
+import threading
+import time
+
+QUERIES = {
+    "student_page": """
+        SELECT roll_number, first_name, last_name, age, email_address, updated_at
+        FROM school.student
+        {where}
+        ORDER BY roll_number
+        LIMIT %s
+    """,
+    "student_by_roll": """
+        SELECT roll_number, first_name, last_name, age, email_address, updated_at
+        FROM school.student
+        WHERE roll_number = %s
+    """,
+    "students_by_rolls": """
+        SELECT roll_number, first_name, last_name, age, email_address, updated_at
+        FROM school.student
+        WHERE roll_number = ANY(%s)
+    """,
+    "student_by_email": """
+        SELECT roll_number, first_name, last_name, age, email_address
+        FROM school.student
+        WHERE email_address = %s
+    """,
+    # The name expression must match the migration's indexes exactly for them to be used
+    "student_search_prefix": """
+        SELECT roll_number, first_name, last_name, age, email_address
+        FROM school.student
+        WHERE lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '')) LIKE %s
+           OR lower(last_name) LIKE %s
+        ORDER BY lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '')) = %s DESC,
+                 length(coalesce(first_name, '') || ' ' || coalesce(last_name, '')),
+                 roll_number
+        LIMIT %s
+    """,
+    "student_search_fuzzy": """
+        SELECT roll_number, first_name, last_name, age, email_address
+        FROM school.student
+        WHERE %s <%% lower(coalesce(first_name, '') || ' ' || coalesce(last_name, ''))
+        ORDER BY word_similarity(%s, lower(coalesce(first_name, '') || ' ' || coalesce(last_name, ''))) DESC,
+                 roll_number
+        LIMIT %s
+    """,
+    "student_version": """
+        SELECT updated_at FROM school.student WHERE roll_number = %s
+    """,
+    "student_insert": """
+        INSERT INTO school.student (first_name, last_name, age, email_address)
+        VALUES (%s, %s, %s, %s) RETURNING roll_number
+    """,
+    "student_update": """
+        UPDATE school.student
+        SET first_name = %s, last_name = %s, age = %s, email_address = %s
+        WHERE roll_number = %s
+          AND (%s::timestamptz IS NULL OR updated_at = %s)
+    """,
+    # {assignments} is built from UPDATABLE_FIELDS only, never from request keys
+    "student_patch": """
+        UPDATE school.student
+        SET {assignments}
+        WHERE roll_number = %s
+          AND (%s::timestamptz IS NULL OR updated_at = %s)
+        RETURNING roll_number, first_name, last_name, age, email_address, updated_at
+    """,
+    "existing_rolls": """
+        SELECT roll_number FROM school.student WHERE roll_number = ANY(%s)
+    """,
+    "email_owners": """
+        SELECT email_address, roll_number FROM school.student WHERE email_address = ANY(%s)
+    """,
+    "student_delete": """
+        DELETE FROM school.student WHERE roll_number = %s
+    """,
+    "reserve_roll_numbers": """
+        SELECT nextval(pg_get_serial_sequence('school.student', 'roll_number'))
+        FROM generate_series(1, %s)
+    """,
+    "export_job_save": """
+        INSERT INTO school.export_job (job_id, record, updated_at)
+        VALUES (%s, %s, clock_timestamp())
+        ON CONFLICT (job_id) DO UPDATE SET record = EXCLUDED.record, updated_at = EXCLUDED.updated_at
+    """,
+    "export_job_load": """
+        SELECT record, extract(epoch FROM clock_timestamp() - updated_at) FROM school.export_job WHERE job_id = %s
+    """,
+    "export_job_delete": """
+        DELETE FROM school.export_job WHERE job_id = ANY(%s) OR updated_at < clock_timestamp() - make_interval(secs => %s)
+    """
+}
+
+_timings = {}
+_timings_lock = threading.Lock()
+
+
+def _prepare_flag(cur):
+    # prepare_threshold=None is the PgBouncer-compatible mode: never prepare
+    return None if cur.connection.prepare_threshold is None else True
+
+
+def _record(name, elapsed_ms):
+    with _timings_lock:
+        stats = _timings.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+
+def run(cur, name, params=None, **fragments):
+    """Execute the registered statement ``name`` on ``cur``.
+
+    ``fragments`` fill trusted placeholders such as ``{where}``; each distinct
+    resulting text is prepared separately.
+    """
+    sql = QUERIES[name]
+    if fragments:
+        sql = sql.format(**fragments)
+    start = time.perf_counter()
+    try:
+        return cur.execute(sql, params, prepare=_prepare_flag(cur))
+    finally:
+        _record(name, (time.perf_counter() - start) * 1000)
+
+
+async def run_async(cur, name, params=None, **fragments):
+    """Async counterpart of ``run()`` for AsyncCursor."""
+    sql = QUERIES[name]
+    if fragments:
+        sql = sql.format(**fragments)
+    start = time.perf_counter()
+    try:
+        return await cur.execute(sql, params, prepare=_prepare_flag(cur))
+    finally:
+        _record(name, (time.perf_counter() - start) * 1000)
+
+
+def get_query_stats():
+    with _timings_lock:
+        return {
+            name: {
+                "count": stats["count"],
+                "avg_ms": round(stats["total_ms"] / stats["count"], 3),
+                "max_ms": round(stats["max_ms"], 3)
+            }
+            for name, stats in _timings.items()
+        }
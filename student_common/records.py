@@ -0,0 +1,95 @@
+from array import array
+from dataclasses import dataclass
+
+import orjson
+
+STUDENT_FIELDS = ("roll_number", "first_name", "last_name", "age", "email_address")
+
+
+@dataclass(frozen=True, slots=True)
+class StudentRecord:
+    """Immutable, slotted student row for bulk in-memory work.
+
+    The pydantic ``Student`` model validates request/response payloads; this is
+    the cheap container for data that is already known to be valid.
+    """
+    roll_number: int
+    first_name: str
+    last_name: str
+    age: int
+    email_address: str
+
+    def to_dict(self):
+        return {
+            "roll_number": self.roll_number,
+            "first_name": self.first_name,
+            "last_name": self.last_name,
+            "age": self.age,
+            "email_address": self.email_address
+        }
+
+
+class StudentBatch:
+    """Columnar container for many students.
+
+    ``roll_number`` and ``age`` live in 4-byte typed arrays (both are int4
+    columns) and the string columns in plain lists, so a batch costs far less
+    than one object or dict per student.
+    """
+
+    __slots__ = ("roll_numbers", "first_names", "last_names", "ages", "email_addresses")
+
+    def __init__(self):
+        self.roll_numbers = array("i")
+        self.first_names = []
+        self.last_names = []
+        self.ages = array("i")
+        self.email_addresses = []
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a batch from (roll_number, first_name, last_name, age, email_address) tuples."""
+        batch = cls()
+        batch.extend(rows)
+        return batch
+
+    def append(self, roll_number, first_name, last_name, age, email_address):
+        self.roll_numbers.append(roll_number)
+        self.first_names.append(first_name)
+        self.last_names.append(last_name)
+        self.ages.append(age)
+        self.email_addresses.append(email_address)
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(*row)
+
+    def __len__(self):
+        return len(self.roll_numbers)
+
+    def rows(self):
+        return zip(self.roll_numbers, self.first_names, self.last_names, self.ages, self.email_addresses)
+
+    def __iter__(self):
+        for row in self.rows():
+            yield StudentRecord(*row)
+
+    def columns(self):
+        return dict(zip(STUDENT_FIELDS, (self.roll_numbers, self.first_names, self.last_names,
+                                         self.ages, self.email_addresses)))
+
+    def to_json(self):
+        """Serialize as a JSON array of student objects."""
+        return orjson.dumps([dict(zip(STUDENT_FIELDS, row)) for row in self.rows()])
+
+    def to_dataframe(self):
+        import numpy as np
+        import pandas as pd
+        # The typed arrays are handed to numpy without copying element by element
+        return pd.DataFrame({
+            "roll_number": np.frombuffer(self.roll_numbers, dtype=np.int32),
+            "first_name": self.first_names,
+            "last_name": self.last_names,
+            "age": np.frombuffer(self.ages, dtype=np.int32),
+            "email_address": self.email_addresses
+        })
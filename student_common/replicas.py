@@ -0,0 +1,216 @@
+"""Read-replica routing: health checks, balancing and per-request pinning.
+
+Replicas are listed in ``DB_REPLICA_DSNS`` (comma-separated libpq connection
+strings; parameters a DSN leaves out, such as the password, come from the
+DB_* settings). Reads that ask for ``get_connection(read_only=True)`` or
+``get_async_connection(read_only=True)`` go to a healthy replica picked
+round-robin or by fewest connections in use (``DB_REPLICA_BALANCE``); every
+other connection, and every read while no replica is healthy, uses the primary.
+
+A background thread checks each replica every ``DB_REPLICA_CHECK_INTERVAL``
+seconds. A replica is ejected while it is unreachable, while its replay lag
+is over ``DB_REPLICA_MAX_LAG_MS`` (or unknown; 0 turns the lag check off), and
+as soon as a read finds its connection broken. The next
+passing check puts it back.
+
+Within a request the first replica chosen is reused, so every read it makes
+comes from the same server. Once the request takes a primary
+connection (any write) its later reads stay on the primary, and requests
+sent with ``X-Read-Consistency: primary`` read from the primary throughout.
+
+Rows read from a replica are not written to the student cache (see
+read_from_replica): a replica can still serve the pre-write row just after a
+write invalidated it, and a cached copy would outlive the lag by CACHE_TTL.
+"""
+import itertools
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import psycopg
+from psycopg.conninfo import conninfo_to_dict
+
+logger = logging.getLogger(__name__)
+
+CONSISTENCY_HEADER = "X-Read-Consistency"
+BALANCE_STRATEGIES = ("round_robin", "least_connections")
+# Seconds a health check may take to connect
+CHECK_TIMEOUT = 2
+# Replicas serve reads at most this far behind the primary
+DEFAULT_MAX_LAG_MS = 1000
+
+# Lag is zero while the replica has replayed everything it received, otherwise the age of the last replayed commit
+REPLICA_STATUS_SQL = """
+    SELECT pg_is_in_recovery(),
+           CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) * 1000
+           END;
+"""
+
+
+class _Route:
+    __slots__ = ("primary", "replica")
+
+    def __init__(self, primary):
+        self.primary = primary
+        self.replica = None
+
+
+# Set per request by the app (Flask hooks / ASGI middleware); threads outside a request pick a replica per connection
+_route = ContextVar("db_route", default=None)
+
+
+def begin_request_route(primary=False):
+    """Give the current request its own routing state; returns the reset token."""
+    return _route.set(_Route(primary))
+
+
+def end_request_route(token):
+    _route.reset(token)
+
+
+def reads_from_primary():
+    """Whether the current request's reads must go to the primary."""
+    route = _route.get()
+    return route is not None and route.primary
+
+
+def read_from_replica():
+    """Whether the current request's latest read may have come from a replica (always True outside a request)."""
+    route = _route.get()
+    return route is None or (not route.primary and route.replica is not None)
+
+
+def stick_to_primary():
+    """Keep the rest of the current request on the primary (read-your-writes)."""
+    route = _route.get()
+    if route is not None:
+        route.primary = True
+
+
+def replica_conninfo(dsns, primary_kwargs):
+    """Connection kwargs per replica DSN; anything a DSN leaves out is taken from the primary."""
+    return [{**primary_kwargs, **conninfo_to_dict(dsn)} for dsn in dsns]
+
+
+class Replica:
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+        self.name = f"{kwargs.get('host')}:{kwargs.get('port')}"
+        # No reads until the first check passes
+        self.healthy = False
+        self.in_use = 0
+        self.reads = 0
+        self.in_recovery = None
+        self.lag_ms = None
+        self.ejections = 0
+        self.last_error = None
+
+
+class ReplicaSet:
+    def __init__(self, replica_kwargs, balance="round_robin", max_lag_ms=DEFAULT_MAX_LAG_MS, check_interval=5.0):
+        if balance not in BALANCE_STRATEGIES:
+            raise ValueError(f"DB_REPLICA_BALANCE must be one of: {', '.join(BALANCE_STRATEGIES)}")
+        self.replicas = [Replica(kwargs) for kwargs in replica_kwargs]
+        self.balance = balance
+        self.max_lag_ms = max_lag_ms
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def choose(self):
+        """Replica for a read, or None to use the primary."""
+        route = _route.get()
+        if route is not None:
+            if route.primary:
+                return None
+            if route.replica is not None and route.replica.healthy:
+                return route.replica
+        with self._lock:
+            healthy = [replica for replica in self.replicas if replica.healthy]
+            if not healthy:
+                replica = None
+            else:
+                # Rotate the starting point so least_connections spreads ties too
+                start = next(self._turn) % len(healthy)
+                candidates = healthy[start:] + healthy[:start]
+                if self.balance == "least_connections":
+                    replica = min(candidates, key=lambda candidate: candidate.in_use)
+                else:
+                    replica = candidates[0]
+        if route is not None:
+            route.replica = replica
+        return replica
+
+    @contextmanager
+    def track(self, replica):
+        with self._lock:
+            replica.in_use += 1
+            replica.reads += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                replica.in_use -= 1
+
+    def eject(self, replica, reason):
+        with self._lock:
+            replica.last_error = reason
+            if not replica.healthy:
+                return
+            replica.healthy = False
+            replica.ejections += 1
+        logger.warning("Replica %s ejected: %s", replica.name, reason)
+
+    def _reinstate(self, replica):
+        with self._lock:
+            replica.last_error = None
+            if replica.healthy:
+                return
+            replica.healthy = True
+        logger.info("Replica %s is serving reads", replica.name)
+
+    def check(self, replica):
+        try:
+            with psycopg.connect(**{**replica.kwargs, "connect_timeout": CHECK_TIMEOUT}, autocommit=True) as conn:
+                in_recovery, lag_ms = conn.execute(REPLICA_STATUS_SQL).fetchone()
+        except psycopg.Error as e:
+            self.eject(replica, f"health check failed: {e}")
+            return
+        replica.in_recovery = in_recovery
+        replica.lag_ms = round(float(lag_ms), 1) if lag_ms is not None else None
+        if self.max_lag_ms and (replica.lag_ms is None or replica.lag_ms > self.max_lag_ms):
+            self.eject(replica, f"replication lag {replica.lag_ms} ms over {self.max_lag_ms} ms")
+        else:
+            self._reinstate(replica)
+
+    def _run(self):
+        while not self._stop.is_set():
+            for replica in self.replicas:
+                self.check(replica)
+            self._stop.wait(self.check_interval)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=CHECK_TIMEOUT + 1)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "balance": self.balance,
+                "max_lag_ms": self.max_lag_ms,
+                "replicas": [{
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "in_use": replica.in_use,
+                    "reads": replica.reads,
+                    "in_recovery": replica.in_recovery,
+                    "lag_ms": replica.lag_ms,
+                    "ejections": replica.ejections,
+                    "last_error": replica.last_error
+                } for replica in self.replicas]
+            }
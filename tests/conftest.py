@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tests import the shared packages (migrations, ...) from the repository root, however pytest is started
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
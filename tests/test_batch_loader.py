@@ -0,0 +1,123 @@
+"""Request coalescing (student_common.batch_loader)."""
+import asyncio
+
+import pytest
+
+from student_common.batch_loader import BatchLoader
+
+
+def test_concurrent_loads_share_one_batch():
+    calls = []
+
+    async def batch_fn(keys):
+        calls.append(list(keys))
+        return [key * 10 for key in keys]
+
+    async def scenario():
+        loader = BatchLoader(batch_fn, max_batch_size=100)
+        return await asyncio.gather(*(loader.load(key) for key in (1, 2, 1, 3)))
+
+    assert asyncio.run(scenario()) == [10, 20, 10, 30]
+    # The repeated key is fetched once
+    assert calls == [[1, 2, 3]]
+
+
+def test_batches_are_split_at_max_size():
+    calls = []
+
+    async def batch_fn(keys):
+        calls.append(list(keys))
+        return keys
+
+    async def scenario():
+        loader = BatchLoader(batch_fn, max_batch_size=2)
+        return await asyncio.gather(*(loader.load(key) for key in range(5)))
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3, 4]
+    assert calls == [[0, 1], [2, 3], [4]]
+
+
+def test_loads_in_later_ticks_start_a_new_batch():
+    calls = []
+
+    async def batch_fn(keys):
+        calls.append(list(keys))
+        return keys
+
+    async def scenario():
+        loader = BatchLoader(batch_fn, max_batch_size=100)
+        await loader.load(1)
+        await loader.load(2)
+
+    asyncio.run(scenario())
+    assert calls == [[1], [2]]
+
+
+def test_batch_failure_reaches_every_caller():
+    async def batch_fn(keys):
+        raise RuntimeError("database is down")
+
+    async def scenario():
+        loader = BatchLoader(batch_fn, max_batch_size=100)
+        return await asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert [str(result) for result in results] == ["database is down", "database is down"]
+
+
+def test_partitions_are_batched_separately():
+    calls = []
+    partition = {}
+
+    async def batch_fn(keys, group):
+        calls.append((group, list(keys)))
+        return [f"{group}:{key}" for key in keys]
+
+    async def load(loader, key, group):
+        partition["current"] = group
+        return await loader.load(key)
+
+    async def scenario():
+        loader = BatchLoader(batch_fn, max_batch_size=100, partition=lambda: partition["current"])
+        return await asyncio.gather(load(loader, 1, "replica"), load(loader, 1, "primary"),
+                                    load(loader, 2, "replica"))
+
+    assert asyncio.run(scenario()) == ["replica:1", "primary:1", "replica:2"]
+    assert sorted(calls) == [("primary", [1]), ("replica", [1, 2])]
+
+
+def test_cancelled_caller_does_not_cancel_shared_result():
+    async def batch_fn(keys):
+        await asyncio.sleep(0.01)
+        return keys
+
+    async def scenario():
+        loader = BatchLoader(batch_fn, max_batch_size=100)
+        first = asyncio.ensure_future(loader.load(1))
+        second = asyncio.ensure_future(loader.load(1))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_cancelled_batch_fails_its_callers():
+    started = asyncio.Event()
+
+    async def batch_fn(keys):
+        started.set()
+        await asyncio.sleep(10)
+
+    async def scenario():
+        loader = BatchLoader(batch_fn, max_batch_size=100)
+        loads = asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True)
+        await started.wait()
+        for task in list(loader._dispatching):
+            task.cancel()
+        return await asyncio.wait_for(loads, timeout=1)
+
+    results = asyncio.run(scenario())
+    assert [str(result) for result in results] == ["Batched lookup was cancelled"] * 2
@@ -0,0 +1,101 @@
+"""Student cache backends (student_common.cache)."""
+import asyncio
+
+import pytest
+
+from student_common import cache as cache_module
+from student_common.cache import AsyncCache, LRUCache, NullCache, RedisCache, student_key, student_page_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = LRUCache(max_entries=10, ttl=5)
+    cache.set("a", 1)
+    clock[0] += 4.9
+    assert cache.get("a") == 1
+    clock[0] += 0.2
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["entries"]) == (1, 1, 1, 0)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = LRUCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_delete_counts_only_present_keys():
+    cache = LRUCache(max_entries=10, ttl=60)
+    cache.set(student_key(1), {"roll_number": 1})
+    cache.delete(student_key(1), student_key(2))
+    assert cache.get(student_key(1)) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_generation_bump_retires_listing_pages():
+    cache = LRUCache(max_entries=10, ttl=60)
+    before = student_page_key(cache.generation(), 100, None)
+    cache.set(before, [[], None, "v"])
+    cache.bump_generation()
+    after = student_page_key(cache.generation(), 100, None)
+    assert after != before
+    assert cache.get(after) is None
+
+
+def test_page_key_tells_none_from_empty_params():
+    assert student_page_key(0, 100, None, 18) != student_page_key(0, 100, 18, None)
+
+
+def test_null_cache_never_stores():
+    cache = NullCache()
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    # No generation: callers skip caching listing pages altogether
+    assert cache.generation() is None
+
+
+def test_async_facade_delegates():
+    async def scenario():
+        cache = AsyncCache(LRUCache(max_entries=10, ttl=60))
+        await cache.set("a", 1)
+        await cache.bump_generation()
+        return await cache.get("a"), await cache.generation()
+
+    assert asyncio.run(scenario()) == (1, 1)
+
+
+def test_redis_backend_round_trips_json():
+    fakeredis = pytest.importorskip("fakeredis")
+    cache = RedisCache(fakeredis.FakeRedis(), ttl=60)
+    cache.set(student_key(1), {"roll_number": 1, "updated_at": "2024-01-01T00:00:00+00:00"})
+    assert cache.get(student_key(1)) == {"roll_number": 1, "updated_at": "2024-01-01T00:00:00+00:00"}
+    cache.bump_generation()
+    assert cache.generation() == 1
+    cache.delete(student_key(1))
+    assert cache.get(student_key(1)) is None
+
+
+def test_redis_outage_degrades_to_misses():
+    class DownRedis:
+        def __getattr__(self, name):
+            def fail(*args, **kwargs):
+                raise ConnectionError("redis is down")
+            return fail
+
+    cache = RedisCache(DownRedis(), ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert cache.generation() is None
+    assert cache.stats()["errors"] == 3
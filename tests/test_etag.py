@@ -0,0 +1,66 @@
+"""ETag / conditional request helpers (student_common.etag)."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from student_common.etag import (etag_in, http_date, listing_etag, not_modified_since, page_version,
+                                 parse_student_etag, split_version, student_etag, versioned_record)
+
+UPDATED_AT = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+def test_student_etag_round_trip_keeps_microseconds():
+    etag = student_etag(7, UPDATED_AT)
+    assert etag.startswith('"7-')
+    assert parse_student_etag(etag, 7) == UPDATED_AT
+
+
+@pytest.mark.parametrize("etag", [student_etag(8, UPDATED_AT), "W/" + student_etag(7, UPDATED_AT), '"abc"', '"7"', ""])
+def test_foreign_weak_or_malformed_etags_do_not_parse(etag):
+    assert parse_student_etag(etag, 7) is None
+
+
+def test_etag_in_if_none_match():
+    etag = student_etag(7, UPDATED_AT)
+    assert etag_in(f'"other", {etag}', etag)
+    assert etag_in(f"W/{etag}", etag)
+    assert etag_in("*", etag)
+    assert not etag_in('"other"', etag)
+    assert not etag_in(None, etag)
+
+
+def test_strong_comparison_rejects_weak_etags():
+    etag = student_etag(7, UPDATED_AT)
+    assert not etag_in(f"W/{etag}", etag, weak=False)
+
+
+def test_not_modified_since_uses_second_precision():
+    header = http_date(UPDATED_AT)
+    assert not_modified_since(header, UPDATED_AT)
+    assert not not_modified_since(header, UPDATED_AT + timedelta(seconds=1))
+    assert not not_modified_since("not a date", UPDATED_AT)
+    assert not not_modified_since(None, UPDATED_AT)
+
+
+def test_page_version_changes_with_rows_and_next_page():
+    rows = [{"roll_number": 1, "updated_at": UPDATED_AT}, {"roll_number": 2, "updated_at": UPDATED_AT}]
+    version = page_version(rows, None)
+    assert page_version(list(rows), None) == version
+    assert page_version(rows[:1], None) != version
+    assert page_version(rows, "next") != version
+    touched = [rows[0], {"roll_number": 2, "updated_at": UPDATED_AT + timedelta(microseconds=1)}]
+    assert page_version(touched, None) != version
+
+
+def test_listing_etag_distinguishes_filters():
+    assert listing_etag("v1", 100, None) != listing_etag("v1", 50, None)
+    assert listing_etag("v1", 100, None) != listing_etag("v2", 100, None)
+
+
+def test_versioned_record_survives_json_and_splits_back():
+    record = versioned_record({"roll_number": 7, "first_name": "Ada", "updated_at": UPDATED_AT})
+    assert record["updated_at"] == UPDATED_AT.isoformat()
+    body, updated_at = split_version(record)
+    assert body == {"roll_number": 7, "first_name": "Ada"}
+    assert updated_at == UPDATED_AT
+    assert "updated_at" in record
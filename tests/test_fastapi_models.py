@@ -0,0 +1,34 @@
+"""Request models of the FastAPI app (skipped unless pydantic and email-validator are installed)."""
+import os
+import sys
+
+import pytest
+
+for module in ("pydantic", "email_validator"):
+    pytest.importorskip(module)
+
+FASTAPI_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fast_api_student_apis")
+
+
+@pytest.fixture(scope="module")
+def models():
+    sys.path.insert(0, FASTAPI_DIR)
+    try:
+        from models import models
+    finally:
+        sys.path.remove(FASTAPI_DIR)
+    return models
+
+
+ROW = {"first_name": "Ada", "last_name": "Lovelace", "age": "36", "email_address": "ada@example.com"}
+
+
+@pytest.mark.parametrize("cell", ["", "  "])
+def test_blank_upsert_roll_number_is_none(models, cell):
+    assert models.StudentUpsert(**ROW, roll_number=cell).roll_number is None
+
+
+def test_upsert_roll_number_from_csv_text(models):
+    assert models.StudentUpsert(**ROW, roll_number="42").roll_number == 42
+    with pytest.raises(ValueError):
+        models.StudentUpsert(**ROW, roll_number="forty-two")
@@ -0,0 +1,72 @@
+"""HTTP error responses of the Flask app (skipped unless its dependencies are installed)."""
+import importlib.util
+import os
+
+import pytest
+
+for module in ("flask", "flasgger", "flask_talisman", "psycopg_pool"):
+    pytest.importorskip(module)
+
+FLASK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "flask_student_api")
+
+
+@pytest.fixture(scope="module")
+def client():
+    with pytest.MonkeyPatch.context() as patch:
+        # No database is contacted: pools are created lazily and these requests fail validation first
+        for name, value in {"DB_HOST": "localhost", "DB_PORT": "5432", "DB_NAME": "employee", "DB_USER": "postgres",
+                            "DB_PASSWORD": "", "FORCE_HTTPS": "False", "CACHE_BACKEND": "none"}.items():
+            patch.setenv(name, value)
+        patch.chdir(FLASK_DIR)
+        patch.syspath_prepend(FLASK_DIR)
+        import app as flask_app
+        flask_app.app.config["TESTING"] = True
+        yield flask_app.app.test_client()
+
+
+def test_bad_cursor_is_a_400(client):
+    response = client.get("/api/students/?after=not-a-cursor")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid page cursor"}
+
+
+def test_bad_limit_is_a_400(client):
+    response = client.get("/api/students/?limit=0")
+    assert response.status_code == 400
+    assert "limit must be between" in response.get_json()["error"]
+
+
+def test_unknown_route_is_a_404(client):
+    response = client.get("/api/no-such-route")
+    assert response.status_code == 404
+    assert "error" in response.get_json()
+
+
+def test_wrong_method_keeps_allow_header(client):
+    response = client.delete("/api/students/")
+    assert response.status_code == 405
+    assert "GET" in response.headers["Allow"]
+
+
+@pytest.fixture(scope="module")
+def https_client():
+    with pytest.MonkeyPatch.context() as patch:
+        # Production defaults: Talisman redirects plain HTTP before the app's own hooks run
+        for name, value in {"DB_HOST": "localhost", "DB_PORT": "5432", "DB_NAME": "employee", "DB_USER": "postgres",
+                            "DB_PASSWORD": "", "FORCE_HTTPS": "True", "FLASK_DEBUG": "False",
+                            "CACHE_BACKEND": "none"}.items():
+            patch.setenv(name, value)
+        patch.chdir(FLASK_DIR)
+        patch.syspath_prepend(FLASK_DIR)
+        # A second app instance, configured with the environment above
+        spec = importlib.util.spec_from_file_location("flask_app_https", os.path.join(FLASK_DIR, "app.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        assert not module.app.debug
+        yield module.app.test_client()
+
+
+def test_plain_http_is_redirected_to_https(https_client):
+    response = https_client.get("/apidocs/")
+    assert response.status_code == 302
+    assert response.headers["Location"] == "https://localhost/apidocs/"
@@ -0,0 +1,54 @@
+"""Migration discovery and statement splitting (no database needed)."""
+import pytest
+
+pytest.importorskip("psycopg")
+
+from migrations.runner import MigrationError, discover, split_statements
+
+
+def test_discover_finds_the_shipped_migrations_in_order():
+    migrations = discover()
+    assert [migration.version for migration in migrations] == list(range(1, len(migrations) + 1))
+    assert migrations[0].label == "0001_baseline"
+    assert all(migration.down_path for migration in migrations)
+
+
+def test_discover_ignores_other_files(tmp_path):
+    (tmp_path / "0001_first.up.sql").write_text("SELECT 1;")
+    (tmp_path / "README.md").write_text("")
+    (tmp_path / "1_bad_name.up.sql").write_text("")
+    [migration] = discover(tmp_path)
+    assert migration.label == "0001_first"
+    assert migration.down_path is None
+
+
+def test_discover_rejects_mismatched_names(tmp_path):
+    (tmp_path / "0001_first.up.sql").write_text("")
+    (tmp_path / "0001_other.down.sql").write_text("")
+    with pytest.raises(MigrationError, match="different names"):
+        discover(tmp_path)
+
+
+def test_discover_rejects_missing_up_file(tmp_path):
+    (tmp_path / "0001_first.down.sql").write_text("")
+    with pytest.raises(MigrationError, match="no .up.sql"):
+        discover(tmp_path)
+
+
+def test_split_statements():
+    sql = """-- migrate:no-transaction
+CREATE INDEX CONCURRENTLY IF NOT EXISTS a
+    ON school.student (last_name);
+-- a comment; not a statement
+DROP INDEX CONCURRENTLY IF EXISTS b;
+
+SELECT 1"""
+    assert split_statements(sql) == [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS a\n    ON school.student (last_name);",
+        "DROP INDEX CONCURRENTLY IF EXISTS b;",
+        "SELECT 1"
+    ]
+
+
+def test_split_statements_of_comments_only_is_empty():
+    assert split_statements("-- nothing here\n\n") == []
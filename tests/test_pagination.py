@@ -0,0 +1,31 @@
+"""Keyset cursors and listing filters (student_common.pagination)."""
+import pytest
+
+from student_common.pagination import build_student_filters, decode_cursor, encode_cursor, escape_like
+
+
+@pytest.mark.parametrize("roll_number", [1, 42, 2**31 - 1])
+def test_cursor_round_trip(roll_number):
+    token = encode_cursor(roll_number)
+    assert "=" not in token
+    assert decode_cursor(token) == roll_number
+
+
+@pytest.mark.parametrize("token", ["", "not-a-cursor", "e30", encode_cursor("7"), encode_cursor(None)])
+def test_invalid_cursor_raises(token):
+    with pytest.raises(ValueError, match="Invalid page cursor"):
+        decode_cursor(token)
+
+
+def test_escape_like_matches_wildcards_literally():
+    assert escape_like("50%_off\\") == "50\\%\\_off\\\\"
+
+
+def test_filters_combine_in_parameter_order():
+    where_sql, params = build_student_filters(encode_cursor(10), 18, 30, "O_B")
+    assert where_sql == "WHERE roll_number > %s AND age >= %s AND age <= %s AND last_name LIKE %s"
+    assert params == [10, 18, 30, "O\\_B%"]
+
+
+def test_no_filters_means_no_where_clause():
+    assert build_student_filters() == ("", [])
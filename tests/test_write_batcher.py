@@ -0,0 +1,91 @@
+"""Savepoint isolation of the Flask group-commit batcher (skipped unless Flask and psycopg_pool are installed)."""
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+
+import pytest
+
+for module in ("flask", "psycopg_pool"):
+    pytest.importorskip(module)
+
+FLASK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "flask_student_api")
+
+
+class FakeConnection:
+    """Applies writes to ``committed`` the way nested transactions would: a failing block is rolled back."""
+
+    def __init__(self):
+        self.committed = []
+        self._levels = []
+
+    @contextmanager
+    def transaction(self):
+        self._levels.append([])
+        try:
+            yield
+        except Exception:
+            self._levels.pop()
+            raise
+        applied = self._levels.pop()
+        (self._levels[-1] if self._levels else self.committed).extend(applied)
+
+    def cursor(self):
+        return nullcontext(self)
+
+    def write(self, value):
+        self._levels[-1].append(value)
+
+
+class FakeApp:
+    def app_context(self):
+        return nullcontext()
+
+
+@pytest.fixture
+def write_batcher(monkeypatch):
+    monkeypatch.syspath_prepend(FLASK_DIR)
+    from services import write_batcher
+    conn = FakeConnection()
+    monkeypatch.setattr(write_batcher, "get_connection", lambda: nullcontext(conn))
+    batcher = write_batcher.WriteBatcher(FakeApp(), max_delay=0.2, max_size=3, timeout=5)
+    yield batcher, conn
+    batcher.shutdown()
+
+
+def insert(cur, value):
+    cur.write(value)
+    if value == "bad":
+        raise ValueError("duplicate email")
+    return value
+
+
+def test_failed_write_is_rolled_back_alone(write_batcher):
+    batcher, conn = write_batcher
+    results = {}
+
+    def submit(value):
+        try:
+            results[value] = batcher.submit(insert, value)
+        except ValueError as e:
+            results[value] = e
+
+    threads = [threading.Thread(target=submit, args=(value,)) for value in ("a", "bad", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results["a"] == "a" and results["b"] == "b"
+    assert str(results["bad"]) == "duplicate email"
+    assert sorted(conn.committed) == ["a", "b"]
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["writes"] == 3 and stats["failed_writes"] == 1
+
+
+def test_submit_after_shutdown_raises(write_batcher):
+    batcher, conn = write_batcher
+    batcher.shutdown()
+    with pytest.raises(RuntimeError, match="shut down"):
+        batcher.submit(insert, "late")
+    assert conn.committed == []